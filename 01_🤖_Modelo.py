@@ -1,6 +1,8 @@
 import pandas as pd
-from joblib import load
 from plots import *
+from artefatos import carregar_artefatos
+from pontuacao import preparar_matriz, prever_probabilidades, classificar_faixas
+from diagnostico import painel_diagnostico
 import streamlit as st
 import pandas as pd
 
@@ -8,11 +10,10 @@ import pandas as pd
 # Configuração da página
 st.set_page_config(page_title="Detecção de Fraudes", layout="centered")
 
-# Carregar objetos
-modelo = load("objects/modelo_fraude.pkl")
-seletor = load("objects/seletor.pkl")
-colunas_selecionadas = load("objects/colunas_selecionadas.pkl")
-accuracy, confusion = load("objects/metricas.pkl")
+# Carregar objetos (em cache, compartilhados entre sessões)
+artefatos = carregar_artefatos()
+colunas_selecionadas = artefatos["colunas_selecionadas"]
+accuracy = artefatos["acuracia"]
 
 # Interface lateral
 with st.sidebar:
@@ -24,6 +25,8 @@ with st.sidebar:
             <span style='font-size: 16px; color: #090;'>Desempenho baseado nos dados de validação</span>
         </div>
         """, unsafe_allow_html=True)
+    if artefatos.versao is not None:
+        st.caption(f"Versão do modelo: {artefatos.versao}")
     st.markdown("---")
     st.markdown(markdown, unsafe_allow_html=True)
     # (links e rodapé mantidos)
@@ -31,53 +34,37 @@ with st.sidebar:
 # Interface principal
 st.title("🕵️‍♂️ Avaliação de Risco de Fraude")
 
-# Entrada dinâmica de dados
-dataset = pd.read_csv("Fraud_transactions.csv")
-dataset.rename(columns=colunas_traduzidas, inplace=True)
-mapeamentos = {0: 'Não', 1: 'Sim'}
-dataset['autenticacao_3ds'] = dataset['autenticacao_3ds'].map(mapeamentos)
-dataset['promocao_usada'] = dataset['promocao_usada'].map(mapeamentos)
-dataset['resultado_cvv'] = dataset['resultado_cvv'].map(mapeamentos)
-dataset['verificacao_endereco'] = dataset['verificacao_endereco'].map(mapeamentos)  
-
-# Salvalmento de objetos com streamlit
-st.session_state['modelo'] = modelo
-st.session_state['colunas_selecionadas'] = colunas_selecionadas
-
+# Entrada dinâmica de dados (metadados salvos no treinamento ou, sem eles, categorias dos encoders e faixas padrão)
+metadados = artefatos["metadados_formulario"]
 
 entrada = {}
 for coluna in colunas_selecionadas:
-    valores_unicos = dataset[coluna].unique()
-    if dataset[coluna].dtype == 'object':
-        entrada[coluna] = st.selectbox(f"{coluna}", valores_unicos)
+    info = metadados[coluna]
+    if info["tipo"] == "categorica":
+        entrada[coluna] = st.selectbox(f"{coluna}", info["valores"])
     else:        
-        entrada[coluna] = st.number_input(f"{coluna}", value=dataset[coluna].median()
-                                           if dataset[coluna].dtype in ['float'] else int(dataset[coluna].median()))
-
-# Limpar Memória
-if dataset is not None:
-    del dataset
+        entrada[coluna] = st.number_input(f"{coluna}", value=info["mediana"],
+                                          help=f"Faixa observada no treinamento: {info['minimo']} a {info['maximo']}")
         
 
 # Botão de previsão
 if st.button("Avaliar Transação"):
     progress = st.progress(50, "Aguarde... Avaliando a Transação")
-    dados_novos = pd.DataFrame([entrada])
-    for coluna in colunas_selecionadas:
-        if dados_novos[coluna].dtype == 'object':        
-            le = load('objects/label_encoder_' + coluna + '.pkl')
-            dados_novos[coluna] = le.transform(dados_novos[coluna].astype(str))       
+    dados_novos = preparar_matriz(entrada, artefatos)
 
-    probabilidade = modelo.predict_proba(dados_novos)[0][1] * 100
-    classe = "Fraude" if probabilidade >= 50 else "Suspeita" if probabilidade < 30 else "Legítima"
+    probabilidade = prever_probabilidades(dados_novos, artefatos)[0]
+    classe = classificar_faixas(probabilidade) # Mesmas faixas usadas na pontuação em lote
+    probabilidade *= 100
 
     if classe == "Fraude":        
         st.error(f"🚨 Transação suspeita! Probabilidade de fraude: {probabilidade:.2f}%")
     
-    elif classe == "Legítima":
+    elif classe == "Suspeita":
         st.warning(f"⚠️ Transação suspeita! Probabilidade de fraude: {probabilidade:.2f}%")
 
     else:
         st.success(f"✅ Transação legítima. Probabilidade de fraude: {probabilidade:.2f}%")
     
-    progress.progress(100, "Avaliação Concluída!")        
\ No newline at end of file
+    progress.progress(100, "Avaliação Concluída!")
+
+painel_diagnostico() # Apenas com RADAR_METRICAS=1
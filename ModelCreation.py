@@ -1,43 +1,69 @@
-import pandas as pd
+import argparse
 import numpy as np
-from joblib import dump
 from sklearn.metrics import accuracy_score, confusion_matrix
 from sklearn.model_selection import train_test_split
 from sklearn.feature_selection import SelectKBest, chi2
 from lightgbm import LGBMClassifier
-from plots import preprocessar_colunas_categoricas, melhores_parametros, colunas_traduzidas
+from plots import carregar_melhores_parametros, gerar_metadados_formulario, varrer_limiares
+from dados import abrir_dataset, ler_colunas, ler_csv_compacto
+from desempenho import memoria_pico_mb
+from explicabilidade import gerar_explicabilidade_teste, resumir_explicacoes, colunas_segmento
+from arvores_numpy import FlorestaNumpy
+from preprocessamento import PreProcessador
+from registro_modelos import publicar_versao
+from monitor_drift import PerfilDrift
+from figuras import gerar_figuras_padrao
+from indice_transacoes import IndiceTransacoes
+from velocidade import calcular_velocidade, colunas_entrada, MotorVelocidade
 
-# Carregar e preparar os dados
-np.random.seed(1432)
-dataset = pd.read_csv("Fraud_transactions.csv")
-dataset.rename(columns=colunas_traduzidas, inplace=True) # Renomeia com dicionário de plots.py
+parser = argparse.ArgumentParser(description="Treina o modelo de fraude e salva os artefatos em objects/.")
+parser.add_argument("--enxuto", action="store_true",
+                    help="Lê o CSV em blocos com tipos compactos (float32) em vez de usar o cache em disco")
+parser.add_argument("--tamanho-bloco", type=int, default=1_000_000, help="Linhas lidas por vez no modo --enxuto")
+parser.add_argument("--velocidade", action="store_true",
+                    help="Acrescenta as características de velocidade (ver velocidade.py) aos previsores")
+parser.add_argument("--processos", type=int, default=1, help="Processos usados no cálculo do SHAP do conjunto de teste")
+args = parser.parse_args()
 
-# Mapear valores categóricos
-mapeamentos = {0: 'Não', 1: 'Sim'}
-dataset['autenticacao_3ds'] = dataset['autenticacao_3ds'].map(mapeamentos)
-dataset['promocao_usada'] = dataset['promocao_usada'].map(mapeamentos)
-dataset['resultado_cvv'] = dataset['resultado_cvv'].map(mapeamentos)
-dataset['verificacao_endereco'] = dataset['verificacao_endereco'].map(mapeamentos)  
+# Carregar e preparar os dados (cache colunar já traduzido e codificado, ver dados.py)
+np.random.seed(1432)
+if args.enxuto:
+    dataset = ler_csv_compacto("Fraud_transactions.csv", args.tamanho_bloco)
+else:
+    dataset = abrir_dataset("Fraud_transactions.csv")
 
-# Separar variáveis
-X = dataset.drop(['fraude', 'id_transacao', 'id_usuario', 'hora_transacao'], axis=1)
-y = dataset['fraude']
+# Codificação das variáveis categóricas vem pronta do cache; os encoders equivalentes são salvos para a aplicação
+objetos = {f"label_encoder_{coluna}.pkl": le for coluna, le in dataset.encoders().items()}
 
+# Características de velocidade calculadas sobre o histórico, com o estado final do motor usado na pontuação
+if args.velocidade:
+    historico = ler_colunas("Fraud_transactions.csv", colunas_entrada, incluir=())
+    dataset = dataset.com_colunas(calcular_velocidade(historico))
+    MotorVelocidade.construir(historico).salvar("objects/velocidade.pkl")
+    del historico
 
-# Codificar variáveis categóricas
-categoricas = X.select_dtypes(include='object').columns.tolist()
-X_treino, X_teste, y_treino, y_teste = train_test_split(X, y, test_size=0.25, random_state=1432)
-X_treino, X_teste = preprocessar_colunas_categoricas(X_treino, X_teste, categoricas) # Acessa função do plots.py
+# Separar variáveis (previsores sem 'fraude', 'id_transacao', 'id_usuario' e 'hora_transacao', usada só pela velocidade)
+# A divisão é feita por índices (mesma partição que dividir o DataFrame), copiando só as linhas e colunas usadas
+y = np.asarray(dataset.y)
+indices_treino, indices_teste = train_test_split(np.arange(len(dataset)), test_size=0.25, random_state=1432)
+y_treino, y_teste = y[indices_treino], y[indices_teste]
 
 # Seleção de características
 seletor = SelectKBest(chi2, k=10)
-X_treino_final = seletor.fit_transform(X_treino, y_treino)
-X_teste_final = seletor.transform(X_teste)
-colunas_selecionadas = X_treino.columns[seletor.get_support()].tolist()
+if args.enxuto: # Direto da matriz float32, sem a cópia em DataFrame de todas as colunas do treino
+    seletor.fit(dataset.X[indices_treino], y_treino)
+else:
+    seletor.fit(dataset.previsores(linhas=indices_treino), y_treino)
+colunas_selecionadas = np.array(dataset.colunas)[seletor.get_support()].tolist()
+X_treino_final = dataset.previsores(colunas_selecionadas, indices_treino).to_numpy()
+X_teste_final = dataset.previsores(colunas_selecionadas, indices_teste).to_numpy()
+preprocessador = PreProcessador.de_dataset(dataset, colunas_selecionadas) # Conversão completa usada na pontuação
+metadados_formulario = gerar_metadados_formulario(dataset.decodificar(colunas_selecionadas), colunas_selecionadas) # Usado pelo formulário da aplicação
 
 # Treinar modelo
-lgbm_model = LGBMClassifier(**melhores_parametros) # Melhores parâmetros encontrados com Bayesian Optimization
-final_model = lgbm_model.fit(X_treino_final, y_treino)
+lgbm_model = LGBMClassifier(**carregar_melhores_parametros()) # Resultado do busca_hiperparametros.py, se houver
+final_model = lgbm_model.fit(X_treino_final, y_treino) # O Dataset binário do LightGBM é construído direto da matriz
+del X_treino_final
 
 # Avaliar
 y_pred = final_model.predict_proba(X_teste_final)[:, 1]
@@ -49,9 +75,41 @@ print(f"Acurácia do modelo: {accuracy*100:.2f}%")
 print("Matriz de Confusão:")
 print(confusion)
 
-# Salvar modelo e objetos
-dump(final_model, "objects/modelo_fraude.pkl")
-dump(colunas_selecionadas, "objects/colunas_selecionadas.pkl")
-dump(seletor, "objects/seletor.pkl")
-dump((accuracy, confusion), "objects/metricas.pkl")
+# Pré-calcular explicações SHAP do conjunto de teste para a página de explicabilidade
+explicabilidade_teste = gerar_explicabilidade_teste(final_model, X_teste_final, y_teste,
+                                                    dataset.decodificar(colunas_selecionadas, indices_teste),
+                                                    colunas_selecionadas,
+                                                    dataset.decodificar(colunas_segmento, indices_teste),
+                                                    args.processos,
+                                                    None if dataset.id_transacao is None else dataset.id_transacao[indices_teste])
+explicacoes_globais = resumir_explicacoes(explicabilidade_teste["shap"], explicabilidade_teste["dados_originais"],
+                                          colunas_selecionadas, explicabilidade_teste["valor_base"],
+                                          explicabilidade_teste["segmentos"]) # Visão global (amostras maiores: explicabilidade.py)
+
+pontuacoes_teste = {"y_teste": y_teste.astype(np.int8), "probabilidades": y_pred, # Para a varredura de limiares
+                    "valores": dataset.previsores(["valor"], indices_teste)["valor"].to_numpy(np.float32)} # E para o impacto financeiro
+figuras_resultados = gerar_figuras_padrao({"matriz_confusao": confusion, "pontuacoes_teste": pontuacoes_teste,
+                                           "varredura_limiares": varrer_limiares(y_teste, y_pred)}) # Página de resultados
+
+# Salvar modelo e objetos como uma nova versão do registro (ver registro_modelos.py), ativada ao final
+objetos.update({
+    "modelo_fraude.pkl": final_model,
+    "modelo_fraude_arvores.npz": FlorestaNumpy.de_modelo(final_model), # Caminho rápido para poucas linhas
+    "colunas_selecionadas.pkl": colunas_selecionadas,
+    "seletor.pkl": seletor,
+    "preprocessador.pkl": preprocessador,
+    "metricas.pkl": (accuracy, confusion),
+    "metadados_formulario.pkl": metadados_formulario,
+    "explicabilidade_teste.pkl": explicabilidade_teste,
+    "explicacoes_globais.pkl": explicacoes_globais,
+    "perfil_drift.pkl": PerfilDrift.construir(X_teste_final, colunas_selecionadas, preprocessador.classes, y_pred), # Referência do drift
+    "pontuacoes_teste.pkl": pontuacoes_teste,
+    "indice_teste.pkl": IndiceTransacoes.de_explicabilidade(explicabilidade_teste, pontuacoes_teste), # Busca na explicabilidade
+    "figuras_resultados.pkl": figuras_resultados,
+})
+versao = publicar_versao(objetos, "objects", descricao="ModelCreation.py" + (" --velocidade" if args.velocidade else ""))
+print(f"Versão {versao} publicada e ativada")
 
+pico = memoria_pico_mb()
+if pico is not None:
+    print(f"Pico de memória (RSS): {pico:,.0f} MB")
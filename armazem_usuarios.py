@@ -0,0 +1,282 @@
+"""
+Armazém em memória dos agregados por usuário usados pelo modelo (total de transações,
+valor médio e idade da conta), para que a pontuação receba apenas a transação bruta.
+
+Uso (construção a partir do histórico e gravação do snapshot):
+    python armazem_usuarios.py --csv Fraud_transactions.csv --saida objects/armazem_usuarios.npy
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from plots import colunas_traduzidas
+
+VAZIO = -1 # id_usuario de uma posição livre da tabela
+CARGA_MAXIMA = 0.7 # Fração ocupada a partir da qual a tabela dobra de tamanho
+_MULTIPLICADOR = 0x9E3779B97F4A7C15 # Hash multiplicativo (Fibonacci) sobre 64 bits
+_NANOSSEGUNDOS_DIA = 86_400 * 10**9
+CAMINHO_ARMAZEM = "objects/armazem_usuarios.npy"
+colunas_usuario = ['total_transacoes_usuario', 'valor_medio_usuario', 'idade_conta_dias'] # Preenchidas pelo armazém
+_nomes_originais = {traduzida: original for original, traduzida in colunas_traduzidas.items()}
+
+
+def obter_coluna(dados, nome):
+    """Coluna do DataFrame pelo nome em português ou no original (None se não houver)."""
+    for candidato in (nome, _nomes_originais.get(nome)):
+        if candidato in dados.columns:
+            return dados[candidato]
+    return None
+
+
+def nanossegundos_desde_epoca(horas):
+    """Instante (ns desde 1970-01-01 UTC) de cada horário; horários ausentes ou inválidos usam o instante atual."""
+    horas = pd.to_datetime(pd.Series(horas), utc=True, errors="coerce")
+    instantes = horas.dt.tz_convert(None).to_numpy().astype("datetime64[ns]").astype(np.int64)
+    return np.where(horas.isna().to_numpy(), pd.Timestamp.now(tz="UTC").value, instantes)
+
+
+def dias_desde_epoca(horas):
+    """Dia (inteiro, desde 1970-01-01 UTC) de cada horário; horários ausentes ou inválidos usam o dia atual."""
+    return nanossegundos_desde_epoca(horas) // _NANOSSEGUNDOS_DIA
+
+
+class ArmazemUsuarios:
+    """
+    Tabela hash de endereçamento aberto (sondagem linear) sobre um único array estruturado
+    NumPy: id_usuario, contagem de transações, soma dos valores e dia de criação da conta.
+
+    São 28 bytes por posição, sem objetos Python por usuário. Consultas e atualizações de um
+    usuário custam O(1); as versões em lote (consultar, registrar_lote) são vetorizadas.
+    O snapshot é um único .npy, aberto por mapeamento de memória em modo cópia-na-escrita.
+    """
+
+    tipo = np.dtype([("id_usuario", np.int64), ("contagem", np.int64), ("soma", np.float64), ("dia_criacao", np.int32)])
+
+    def __init__(self, capacidade=1024, tabela=None):
+        if tabela is None:
+            tabela = np.zeros(1 << max(int(capacidade - 1).bit_length(), 4), dtype=self.tipo)
+            tabela["id_usuario"] = VAZIO
+        self.tabela = tabela
+        self._bits = tabela.size.bit_length() - 1
+        self.usuarios = int(np.count_nonzero(tabela["id_usuario"] != VAZIO))
+
+    def __len__(self):
+        return self.usuarios
+
+    @property
+    def memoria_bytes(self):
+        return self.tabela.nbytes
+
+    # ------------------------------ Tabela hash ------------------------------
+
+    def _posicoes(self, ids):
+        ids = np.asarray(ids, dtype=np.int64).astype(np.uint64)
+        return ((ids * np.uint64(_MULTIPLICADOR)) >> np.uint64(64 - self._bits)).astype(np.int64)
+
+    def _posicao(self, id_usuario):
+        """Posição do usuário ou, se ele não existir, da posição livre onde entraria."""
+        chaves, mascara = self.tabela["id_usuario"], self.tabela.size - 1
+        posicao = ((int(id_usuario) * _MULTIPLICADOR) & 0xFFFFFFFFFFFFFFFF) >> (64 - self._bits)
+        while chaves[posicao] != id_usuario and chaves[posicao] != VAZIO:
+            posicao = (posicao + 1) & mascara
+        return posicao
+
+    def _localizar(self, ids):
+        """Versão vetorizada de _posicao: retorna (posições, existe) para cada id."""
+        chaves, mascara = self.tabela["id_usuario"], self.tabela.size - 1
+        posicoes = self._posicoes(ids)
+        existe = np.zeros(len(ids), dtype=bool)
+        pendentes = np.arange(len(ids))
+        while pendentes.size:
+            encontradas = chaves[posicoes[pendentes]]
+            achou = encontradas == ids[pendentes]
+            existe[pendentes[achou]] = True
+            pendentes = pendentes[~achou & (encontradas != VAZIO)]
+            posicoes[pendentes] = (posicoes[pendentes] + 1) & mascara
+        return posicoes, existe
+
+    def _inserir(self, ids):
+        """Insere ids distintos que ainda não estão na tabela e retorna a posição de cada um."""
+        self._garantir_capacidade(self.usuarios + len(ids))
+        chaves, mascara = self.tabela["id_usuario"], self.tabela.size - 1
+        posicoes, _ = self._localizar(ids)
+        pendentes = np.arange(len(ids))
+        while pendentes.size:
+            candidatas = posicoes[pendentes]
+            vence = np.zeros(pendentes.size, dtype=bool)
+            vence[np.unique(candidatas, return_index=True)[1]] = True # Um id por posição disputada
+            vence &= chaves[candidatas] == VAZIO
+            chaves[candidatas[vence]] = ids[pendentes[vence]]
+            pendentes = pendentes[~vence]
+            posicoes[pendentes] = (posicoes[pendentes] + 1) & mascara
+        self.usuarios += len(ids)
+        return posicoes
+
+    def _garantir_capacidade(self, usuarios):
+        if usuarios <= CARGA_MAXIMA * self.tabela.size:
+            return
+        antigos = self.tabela[self.tabela["id_usuario"] != VAZIO]
+        capacidade = 1 << int(np.ceil(usuarios / CARGA_MAXIMA) * 2 - 1).bit_length()
+        self.tabela = np.zeros(capacidade, dtype=self.tipo)
+        self.tabela["id_usuario"] = VAZIO
+        self._bits, self.usuarios = capacidade.bit_length() - 1, 0
+        self.tabela[self._inserir(antigos["id_usuario"])] = antigos
+
+    # ------------------------------ Consultas e atualizações ------------------------------
+
+    def registrar(self, id_usuario, valor, dia):
+        """Soma uma transação aos agregados do usuário (cria o usuário no primeiro registro)."""
+        posicao = self._posicao(id_usuario)
+        if self.tabela["id_usuario"][posicao] == VAZIO:
+            if self.usuarios + 1 > CARGA_MAXIMA * self.tabela.size:
+                self._garantir_capacidade(self.usuarios + 1)
+                posicao = self._posicao(id_usuario)
+            self.tabela[posicao] = (id_usuario, 0, 0.0, dia)
+            self.usuarios += 1
+        self.tabela["contagem"][posicao] += 1
+        self.tabela["soma"][posicao] += valor
+
+    def consultar(self, ids):
+        """Agregados atuais de cada id: (contagem, soma, dia_criacao, existe). Ausentes têm contagem 0."""
+        ids = np.asarray(ids, dtype=np.int64)
+        posicoes, existe = self._localizar(ids)
+        linhas = self.tabela[posicoes]
+        return (np.where(existe, linhas["contagem"], 0), np.where(existe, linhas["soma"], 0.0),
+                np.where(existe, linhas["dia_criacao"], -1), existe)
+
+    def registrar_lote(self, ids, valores, dias):
+        """Versão vetorizada de registrar para várias transações (em ordem cronológica)."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if ids.size == 0:
+            return
+        distintos, inverso = np.unique(ids, return_inverse=True)
+        contagens = np.bincount(inverso, minlength=distintos.size)
+        somas = np.bincount(inverso, weights=np.asarray(valores, dtype=np.float64), minlength=distintos.size)
+        primeiro_dia = np.full(distintos.size, np.iinfo(np.int64).max)
+        np.minimum.at(primeiro_dia, inverso, np.asarray(dias, dtype=np.int64))
+
+        posicoes, existe = self._localizar(distintos)
+        self.tabela["contagem"][posicoes[existe]] += contagens[existe]
+        self.tabela["soma"][posicoes[existe]] += somas[existe]
+        novos = ~existe
+        if novos.any():
+            posicoes = self._inserir(distintos[novos])
+            self.tabela["contagem"][posicoes] = contagens[novos]
+            self.tabela["soma"][posicoes] = somas[novos]
+            self.tabela["dia_criacao"][posicoes] = primeiro_dia[novos]
+
+    def caracteristicas(self, ids, valores, dias):
+        """
+        Agregados de cada transação considerando apenas o que veio antes dela: o armazém
+        mais as transações anteriores do mesmo usuário no próprio lote.
+
+        Retorna:
+        - DataFrame com total_transacoes_usuario, valor_medio_usuario (NaN sem histórico) e idade_conta_dias
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        valores, dias = np.asarray(valores, dtype=np.float64), np.asarray(dias, dtype=np.int64)
+        contagem, soma, dia_criacao, existe = self.consultar(ids)
+
+        grupos = pd.Series(valores).groupby(ids, sort=False)
+        contagem = contagem + grupos.cumcount().to_numpy()
+        soma = soma + (grupos.cumsum().to_numpy() - valores)
+        primeiro_dia = pd.Series(dias).groupby(ids, sort=False).transform("first").to_numpy()
+        dia_criacao = np.where(existe, dia_criacao, primeiro_dia)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            media = np.where(contagem > 0, soma / contagem, np.nan)
+        return pd.DataFrame({"total_transacoes_usuario": contagem, "valor_medio_usuario": media,
+                             "idade_conta_dias": np.maximum(dias - dia_criacao, 0)})
+
+    def _entradas(self, dados):
+        """DataFrame, ids, valores e dias das transações (nomes em português ou originais)."""
+        if isinstance(dados, dict):
+            dados = [dados]
+        if not isinstance(dados, pd.DataFrame):
+            dados = pd.DataFrame(dados)
+        ids, valores, horas = obter_coluna(dados, "id_usuario"), obter_coluna(dados, "valor"), obter_coluna(dados, "hora_transacao")
+        if ids is None or valores is None:
+            raise ValueError("As transações precisam de id_usuario (user_id) e valor (amount)")
+        return dados, ids.to_numpy(), valores.to_numpy(), dias_desde_epoca(horas if horas is not None else [None] * len(dados))
+
+    def enriquecer(self, transacoes):
+        """
+        Preenche total_transacoes_usuario, valor_medio_usuario e idade_conta_dias quando não
+        vierem na transação, sem alterar o armazém (ver registrar_transacoes).
+
+        Retorna:
+        - DataFrame com as transações e as colunas de agregados preenchidas
+        """
+        dados, ids, valores, dias = self._entradas(transacoes)
+        dados = dados.copy()
+        calculadas = self.caracteristicas(ids, valores, dias).set_axis(dados.index) # Blocos lidos não começam em 0
+        for coluna in colunas_usuario:
+            informada = obter_coluna(dados, coluna)
+            dados[coluna] = calculadas[coluna].to_numpy() if informada is None else informada.fillna(calculadas[coluna]).to_numpy()
+        return dados
+
+    def registrar_transacoes(self, transacoes):
+        """Soma as transações (já pontuadas) aos agregados dos usuários."""
+        _, ids, valores, dias = self._entradas(transacoes)
+        self.registrar_lote(ids, valores, dias)
+
+    # ------------------------------ Persistência ------------------------------
+
+    def salvar(self, caminho=CAMINHO_ARMAZEM):
+        """Grava o snapshot em um único .npy (troca atômica do arquivo)."""
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(caminho) or ".")
+        with os.fdopen(descritor, "wb") as arquivo:
+            np.save(arquivo, self.tabela)
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho=CAMINHO_ARMAZEM):
+        """Abre o snapshot por mapeamento de memória; atualizações ficam só no processo (modo 'c')."""
+        return cls(tabela=np.load(caminho, mmap_mode="c"))
+
+    @classmethod
+    def construir_de_csv(cls, caminho_csv="Fraud_transactions.csv", tamanho_bloco=1_000_000):
+        """
+        Constrói o armazém a partir do histórico, lendo só as colunas necessárias em blocos.
+
+        O estado de cada usuário parte da sua transação mais recente no arquivo, com os mesmos
+        agregados usados no treinamento: contagem = total_transactions_user,
+        soma = avg_amount_user x contagem e dia de criação = dia da transação - account_age_days.
+        """
+        colunas = ["user_id", "transaction_time", "account_age_days", "total_transactions_user", "avg_amount_user"]
+        ultimas = []
+        for bloco in pd.read_csv(caminho_csv, usecols=colunas, chunksize=tamanho_bloco):
+            bloco["dia"] = dias_desde_epoca(bloco["transaction_time"])
+            ultimas.append(bloco.sort_values("transaction_time", kind="stable").drop_duplicates("user_id", keep="last"))
+        ultimas = (pd.concat(ultimas).sort_values("transaction_time", kind="stable")
+                   .drop_duplicates("user_id", keep="last"))
+
+        armazem = cls(capacidade=int(len(ultimas) / CARGA_MAXIMA) + 1)
+        posicoes = armazem._inserir(ultimas["user_id"].to_numpy(dtype=np.int64))
+        armazem.tabela["contagem"][posicoes] = ultimas["total_transactions_user"].to_numpy()
+        armazem.tabela["soma"][posicoes] = (ultimas["avg_amount_user"] * ultimas["total_transactions_user"]).to_numpy()
+        armazem.tabela["dia_criacao"][posicoes] = (ultimas["dia"] - ultimas["account_age_days"]).to_numpy()
+        return armazem
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Constrói o armazém de agregados por usuário a partir do histórico.")
+    parser.add_argument("--csv", default="Fraud_transactions.csv")
+    parser.add_argument("--saida", default=CAMINHO_ARMAZEM, help="Snapshot .npy do armazém")
+    parser.add_argument("--tamanho-bloco", type=int, default=1_000_000, help="Linhas lidas por vez")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    armazem = ArmazemUsuarios.construir_de_csv(args.csv, args.tamanho_bloco)
+    armazem.salvar(args.saida)
+    print(f"{len(armazem):,} usuários em {time.perf_counter() - inicio:.1f}s "
+          f"({armazem.memoria_bytes / 2**20:,.1f} MB), gravado em {args.saida}")
+
+    armazem = ArmazemUsuarios.carregar(args.saida)
+    ids = armazem.tabela["id_usuario"][armazem.tabela["id_usuario"] != VAZIO][:1000]
+    inicio = time.perf_counter()
+    for id_usuario in ids:
+        armazem.tabela[armazem._posicao(id_usuario)]
+    print(f"Consulta de um usuário: {(time.perf_counter() - inicio) / max(len(ids), 1) * 1e6:.1f} µs")
@@ -0,0 +1,226 @@
+import os
+import threading
+import warnings
+from collections.abc import Mapping
+from joblib import load
+from plots import metadados_de_encoders, varrer_limiares
+from arvores_numpy import FlorestaNumpy
+from dados import calcular_hash
+from indice_transacoes import IndiceTransacoes
+from desempenho import medido
+from preprocessamento import PreProcessador
+from registro_modelos import (VersaoCorrompida, diretorio_ativo, diretorio_versao, ler_manifesto,
+                              migrar_objetos_soltos, publicar_versao, versao_atual)
+
+DIRETORIO_OBJETOS = "objects" # Diretório onde o ModelCreation.py salva os artefatos
+PREFIXO_ENCODER = "label_encoder_"
+arquivos_identificadores = ["modelo_fraude.pkl", "metricas.pkl", "pontuacoes_teste.pkl", "figuras_resultados.pkl"]
+
+
+def _carregar_opcional(caminho):
+    """Carrega um artefato que pode não existir em treinamentos antigos (retorna None nesse caso)."""
+    return load(caminho) if os.path.exists(caminho) else None
+
+
+def carregar_encoders(diretorio=DIRETORIO_OBJETOS, colunas=None):
+    """LabelEncoders salvos no treinamento: coluna -> encoder, de todas as colunas ou apenas das informadas."""
+    diretorio = diretorio_ativo(diretorio)
+    if colunas is None:
+        colunas = [arquivo[len(PREFIXO_ENCODER):-len(".pkl")] for arquivo in sorted(os.listdir(diretorio))
+                   if arquivo.startswith(PREFIXO_ENCODER) and arquivo.endswith(".pkl")]
+    caminhos = {coluna: os.path.join(diretorio, f"{PREFIXO_ENCODER}{coluna}.pkl") for coluna in colunas}
+    return {coluna: load(caminho) for coluna, caminho in caminhos.items() if os.path.exists(caminho)}
+
+
+class ArtefatosModelo(Mapping):
+    """
+    Mapeamento somente leitura com os artefatos de uma versão do modelo.
+
+    Os membros usados na pontuação são carregados na criação; os pesados, usados só por algumas
+    páginas (explicações, pontuações do teste, varredura de limiares...), no primeiro acesso,
+    uma única vez mesmo com várias sessões acessando ao mesmo tempo.
+    """
+
+    def __init__(self, versao, imediatos, tardios, identificador=None):
+        self.versao = versao # None para os arquivos soltos de objects/ (sem registro)
+        self.identificador = versao if identificador is None else identificador # Distingue conteúdos diferentes (caches)
+        self._nomes = list(imediatos) + list(tardios)
+        self._valores = dict(imediatos)
+        self._tardios = tardios # Nome -> função que recebe o próprio mapeamento e carrega o membro
+        self._lock = threading.RLock() # Reentrante: a varredura de limiares depende das pontuações do teste
+
+    def __getitem__(self, nome):
+        if nome in self._valores:
+            return self._valores[nome]
+        if nome not in self._tardios:
+            raise KeyError(nome)
+        with self._lock:
+            if nome not in self._valores:
+                self._valores[nome] = self._tardios[nome](self)
+        return self._valores[nome]
+
+    def __iter__(self):
+        return iter(self._nomes)
+
+    def __len__(self):
+        return len(self._nomes)
+
+    def aquecer(self):
+        """Carrega todos os membros tardios (usado antes de trocar de versão). Retorna o próprio mapeamento."""
+        for nome in self._nomes:
+            self[nome]
+        return self
+
+
+@medido("carregamento_artefatos")
+def ler_artefatos(diretorio=DIRETORIO_OBJETOS, versao=None):
+    """
+    Lê do disco, sem cache, os artefatos de uma versão do registro (ver registro_modelos.py).
+
+    Parâmetros:
+    - diretorio: diretório de objetos (com objects/ATUAL e objects/versoes/) ou, em treinamentos
+      anteriores ao registro, com os arquivos .pkl soltos gerados pelo ModelCreation.py
+    - versao: versão a carregar (padrão: a apontada por ATUAL)
+
+    Retorna:
+    - ArtefatosModelo com modelo, floresta (ver arvores_numpy.py), seletor, colunas_selecionadas,
+      acuracia, matriz_confusao, preprocessador (ver preprocessamento.py),
+      metadados_formulario (sem o arquivo, derivado dos encoders: ver plots.metadados_de_encoders),
+      explicabilidade_teste, explicacoes_globais, pontuacoes_teste, perfil_drift, figuras_resultados,
+      varredura_limiares e indice_teste (None se ainda não foram gerados).
+      Cada arquivo de uma versão é conferido com o hash do manifesto ao ser carregado
+      (VersaoCorrompida se divergir).
+    """
+    versao = versao or versao_atual(diretorio)
+    pasta = diretorio if versao is None else diretorio_versao(diretorio, versao)
+    hashes = None if versao is None else ler_manifesto(diretorio, versao)["arquivos"]
+
+    def caminho(nome):
+        caminho_arquivo = os.path.join(pasta, nome)
+        if hashes is not None and nome in hashes and calcular_hash(caminho_arquivo) != hashes[nome]:
+            raise VersaoCorrompida(f"Arquivo {nome} da versão {versao} foi alterado")
+        return caminho_arquivo
+
+    accuracy, confusion = load(caminho("metricas.pkl"))
+    colunas_selecionadas = load(caminho("colunas_selecionadas.pkl"))
+
+    caminho_preprocessador = caminho("preprocessador.pkl")
+    preprocessador = (PreProcessador.carregar(caminho_preprocessador) if os.path.exists(caminho_preprocessador)
+                      else PreProcessador.de_encoders(carregar_encoders(pasta, colunas_selecionadas), colunas_selecionadas))
+
+    modelo = load(caminho("modelo_fraude.pkl"))
+    caminho_floresta = caminho("modelo_fraude_arvores.npz")
+    floresta = (FlorestaNumpy.carregar(caminho_floresta) if os.path.exists(caminho_floresta)
+                else FlorestaNumpy.de_modelo(modelo)) # Treinamentos antigos: compila a partir do modelo
+
+    def varredura(artefatos):
+        pontuacoes = artefatos["pontuacoes_teste"]
+        return None if pontuacoes is None else varrer_limiares(pontuacoes["y_teste"], pontuacoes["probabilidades"])
+
+    def indice(artefatos):
+        caminho_indice = caminho("indice_teste.pkl")
+        if os.path.exists(caminho_indice):
+            return load(caminho_indice)
+        explicabilidade = artefatos["explicabilidade_teste"] # Treinamentos antigos: construído a partir das explicações
+        return None if explicabilidade is None else IndiceTransacoes.de_explicabilidade(explicabilidade, artefatos["pontuacoes_teste"])
+
+    identificador = None
+    if versao is None: # Sem registro não há nome de versão: diretório e estado dos arquivos identificam o conteúdo
+        estados = {nome: os.stat(caminho(nome)) for nome in arquivos_identificadores if os.path.exists(caminho(nome))}
+        identificador = (os.path.abspath(pasta),) + tuple((nome, estado.st_size, estado.st_mtime_ns)
+                                                           for nome, estado in estados.items())
+
+    return ArtefatosModelo(versao, {
+        "modelo": modelo,
+        "floresta": floresta, # Mesmo modelo em arrays NumPy, caminho rápido para poucas linhas
+        "colunas_selecionadas": colunas_selecionadas,
+        "acuracia": accuracy,
+        "matriz_confusao": confusion,
+        "preprocessador": preprocessador, # Transações brutas -> matriz do modelo (encoders e seletor em um só objeto)
+    }, {
+        "seletor": lambda _: load(caminho("seletor.pkl")),
+        "metadados_formulario": lambda _: (_carregar_opcional(caminho("metadados_formulario.pkl")) or # Sem o arquivo: dos encoders
+                                           metadados_de_encoders(carregar_encoders(pasta, colunas_selecionadas),
+                                                                 colunas_selecionadas)),
+        "explicabilidade_teste": lambda _: _carregar_opcional(caminho("explicabilidade_teste.pkl")),
+        "explicacoes_globais": lambda _: _carregar_opcional(caminho("explicacoes_globais.pkl")), # Ver explicabilidade.py
+        "pontuacoes_teste": lambda _: _carregar_opcional(caminho("pontuacoes_teste.pkl")),
+        "perfil_drift": lambda _: _carregar_opcional(caminho("perfil_drift.pkl")), # Ver monitor_drift.py
+        "figuras_resultados": lambda _: _carregar_opcional(caminho("figuras_resultados.pkl")), # Ver figuras.py
+        "varredura_limiares": varredura, # Métricas para todos os limiares, calculadas uma vez por versão
+        "indice_teste": indice, # Busca de transações do teste (ver indice_transacoes.py)
+    }, identificador)
+
+
+_em_uso = {} # Diretório de objetos -> ArtefatosModelo servido por carregar_artefatos
+_aquecendo = {} # Diretório de objetos -> versão sendo carregada em segundo plano
+_lock_troca = threading.Lock()
+
+
+def carregar_artefatos(diretorio=DIRETORIO_OBJETOS):
+    """
+    Artefatos da versão atual, carregados uma única vez por processo.
+
+    O resultado é compartilhado entre todas as sessões do Streamlit (e entre as páginas), evitando
+    desserializar o modelo a cada interação. A cada chamada o ponteiro ATUAL do registro é relido
+    (um arquivo de poucos bytes): quando aponta para uma versão nova, ela é carregada e aquecida em
+    uma thread em segundo plano enquanto a anterior continua sendo servida, e só então substitui a
+    anterior, sem reiniciar o processo nem deixar sessões esperando pelo carregamento.
+
+    Parâmetros:
+    - diretorio: diretório de objetos (ver ler_artefatos)
+
+    Retorna:
+    - ArtefatosModelo (ver ler_artefatos)
+    """
+    em_uso = _em_uso.get(diretorio)
+    if em_uso is None:
+        with _lock_troca:
+            if diretorio not in _em_uso:
+                _em_uso[diretorio] = ler_artefatos(diretorio)
+            return _em_uso[diretorio]
+    versao = versao_atual(diretorio)
+    if versao is not None and versao != em_uso.versao:
+        _trocar_em_segundo_plano(diretorio, versao)
+    return em_uso
+
+
+def _trocar_em_segundo_plano(diretorio, versao):
+    with _lock_troca:
+        if _aquecendo.get(diretorio) == versao: # Já em andamento (ou falhou: só tenta de novo com outra versão)
+            return
+        _aquecendo[diretorio] = versao
+
+    def trocar():
+        try:
+            artefatos = ler_artefatos(diretorio, versao).aquecer()
+        except Exception as erro:
+            warnings.warn(f"Versão {versao} não pôde ser carregada; mantendo a versão em uso ({erro})")
+            return
+        with _lock_troca:
+            _em_uso[diretorio] = artefatos
+
+    threading.Thread(target=trocar, daemon=True, name=f"troca-versao-{versao}").start()
+
+
+def salvar_artefatos(objetos, diretorio=DIRETORIO_OBJETOS, descricao=""):
+    """
+    Grava vários artefatos em `diretorio` de uma só vez.
+
+    Publica uma nova versão com esses arquivos e os demais herdados da versão atual, e aponta
+    ATUAL para ela (ver registro_modelos.publicar_versao). Sem o registro, os arquivos soltos de
+    `diretorio` são migrados na mesma versão: trocar arquivo por arquivo deixaria um processo
+    lendo `objects/` no meio da troca com artefatos de dois treinamentos, enquanto a versão é
+    montada à parte e entra em uso com a troca única do ponteiro.
+
+    Parâmetros:
+    - objetos: dicionário nome do arquivo -> objeto (FlorestaNumpy é salva em .npz; o resto com joblib)
+    - descricao: texto guardado no manifesto da nova versão
+
+    Retorna:
+    - Nome da versão publicada
+    """
+    base = versao_atual(diretorio)
+    if base is None:
+        return migrar_objetos_soltos(diretorio, objetos, descricao=descricao)
+    return publicar_versao(objetos, diretorio, base=base, descricao=descricao)
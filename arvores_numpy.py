@@ -0,0 +1,165 @@
+"""
+Avaliação do modelo LightGBM com arrays NumPy planos, sem passar pelo wrapper do scikit-learn.
+
+Uso (verificação de paridade e comparação de latência com predict_proba):
+    python arvores_numpy.py --linhas 2000 --repeticoes 300
+"""
+import argparse
+import sys
+import numpy as np
+
+AUSENTE_NENHUM, AUSENTE_ZERO, AUSENTE_NAN = 0, 1, 2 # Valores de missing_type do LightGBM
+_tipos_ausente = {"None": AUSENTE_NENHUM, "Zero": AUSENTE_ZERO, "NaN": AUSENTE_NAN}
+LIMIAR_ZERO = float(np.float32(1e-35)) # Mesmo kZeroThreshold do LightGBM (1e-35f: float32, não 1e-35 em float64)
+
+
+class FlorestaNumpy:
+    """
+    Conjunto de árvores compilado em arrays planos: um nó por posição, com a coluna usada na
+    divisão (-1 nas folhas), o limiar, os filhos esquerdo/direito e o valor da folha.
+
+    A avaliação percorre todas as árvores de todas as linhas ao mesmo tempo, um nível por
+    iteração, e reproduz as probabilidades do predict_proba dentro da tolerância numérica.
+    """
+
+    def __init__(self, coluna, limiar, esquerda, direita, valor, padrao_esquerda, tipo_ausente,
+                 raizes, profundidade, sigmoide=1.0):
+        self.coluna = coluna
+        self.limiar = limiar
+        self.esquerda = esquerda
+        self.direita = direita
+        self.valor = valor
+        self.padrao_esquerda = padrao_esquerda
+        self.tipo_ausente = tipo_ausente
+        self.raizes = raizes
+        self.profundidade = int(profundidade)
+        self.sigmoide = float(sigmoide)
+
+        # Folhas apontam para si mesmas com limiar infinito, dispensando máscaras de "nó interno"
+        folha = coluna < 0
+        posicoes = np.arange(coluna.size, dtype=np.int32)
+        self._coluna = np.where(folha, 0, coluna)
+        self._limiar = np.where(folha, np.inf, limiar)
+        self._esquerda = np.where(folha, posicoes, esquerda)
+        self._direita = np.where(folha, posicoes, direita)
+        self._tipo_ausente = np.where(folha, AUSENTE_NENHUM, tipo_ausente)
+        self._trata_ausentes = bool((self._tipo_ausente != AUSENTE_NENHUM).any())
+
+    @classmethod
+    def de_modelo(cls, modelo):
+        """Compila um LGBMClassifier (ou Booster) binário treinado, com divisões numéricas."""
+        booster = getattr(modelo, "booster_", modelo)
+        estrutura = booster.dump_model()
+        objetivo = estrutura["objective"].split()
+        if objetivo[0] != "binary":
+            raise ValueError(f"Objetivo não suportado: {estrutura['objective']}")
+        sigmoide = next((float(p.split(":")[1]) for p in objetivo[1:] if p.startswith("sigmoid:")), 1.0)
+
+        nos = {"coluna": [], "limiar": [], "esquerda": [], "direita": [], "valor": [],
+               "padrao_esquerda": [], "tipo_ausente": []}
+        raizes, profundidade = [], 0
+
+        def adicionar(no, nivel):
+            nonlocal profundidade
+            posicao = len(nos["coluna"])
+            for lista in nos.values():
+                lista.append(0)
+            if "leaf_value" in no:
+                nos["coluna"][posicao], nos["valor"][posicao] = -1, no["leaf_value"]
+                profundidade = max(profundidade, nivel)
+                return posicao
+            if no["decision_type"] != "<=":
+                raise ValueError("Divisões categóricas não são suportadas")
+            nos["coluna"][posicao], nos["limiar"][posicao] = no["split_feature"], no["threshold"]
+            nos["padrao_esquerda"][posicao] = no["default_left"]
+            nos["tipo_ausente"][posicao] = _tipos_ausente[no["missing_type"]]
+            nos["esquerda"][posicao] = adicionar(no["left_child"], nivel + 1)
+            nos["direita"][posicao] = adicionar(no["right_child"], nivel + 1)
+            return posicao
+
+        for arvore in estrutura["tree_info"]:
+            raizes.append(adicionar(arvore["tree_structure"], 0))
+
+        return cls(np.array(nos["coluna"], dtype=np.int32), np.array(nos["limiar"], dtype=np.float64),
+                   np.array(nos["esquerda"], dtype=np.int32), np.array(nos["direita"], dtype=np.int32),
+                   np.array(nos["valor"], dtype=np.float64), np.array(nos["padrao_esquerda"], dtype=bool),
+                   np.array(nos["tipo_ausente"], dtype=np.int8), np.array(raizes, dtype=np.int32),
+                   profundidade, sigmoide)
+
+    def salvar(self, caminho):
+        """Salva os arrays em um único arquivo .npz."""
+        np.savez(caminho, coluna=self.coluna, limiar=self.limiar, esquerda=self.esquerda, direita=self.direita,
+                 valor=self.valor, padrao_esquerda=self.padrao_esquerda, tipo_ausente=self.tipo_ausente,
+                 raizes=self.raizes, profundidade=self.profundidade, sigmoide=self.sigmoide)
+
+    @classmethod
+    def carregar(cls, caminho):
+        with np.load(caminho) as arquivo:
+            return cls(**{nome: arquivo[nome] for nome in arquivo.files})
+
+    def prever_bruto(self, X, tamanho_bloco=2048):
+        """Soma dos valores das folhas (escala logit) para cada linha de X."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        saida = np.empty(X.shape[0])
+        for inicio in range(0, X.shape[0], tamanho_bloco): # Limita a memória da matriz linhas x árvores
+            saida[inicio:inicio + tamanho_bloco] = self._percorrer(X[inicio:inicio + tamanho_bloco])
+        return saida
+
+    def _percorrer(self, X):
+        X = np.where(np.isnan(X), 0.0, X) if not self._trata_ausentes else X
+        linhas = np.arange(X.shape[0])[:, None]
+        no = np.broadcast_to(self.raizes, (X.shape[0], self.raizes.size))
+        for _ in range(self.profundidade):
+            x = X[linhas, self._coluna[no]]
+            if self._trata_ausentes:
+                tipo = self._tipo_ausente[no]
+                nan = np.isnan(x)
+                x = np.where(nan & (tipo != AUSENTE_NAN), 0.0, x) # Como no LightGBM, NaN vira 0 se não for o valor ausente
+                ausente = ((tipo == AUSENTE_ZERO) & (np.abs(x) <= LIMIAR_ZERO)) | ((tipo == AUSENTE_NAN) & nan)
+                vai_esquerda = np.where(ausente, self.padrao_esquerda[no], x <= self._limiar[no])
+            else:
+                vai_esquerda = x <= self._limiar[no]
+            no = np.where(vai_esquerda, self._esquerda[no], self._direita[no])
+        return self.valor[no].sum(axis=1)
+
+    def probabilidade(self, X):
+        """Probabilidade de fraude (classe 1) para cada linha de X, como predict_proba(X)[:, 1]."""
+        return 1.0 / (1.0 + np.exp(-self.sigmoide * self.prever_bruto(X)))
+
+
+if __name__ == "__main__":
+    from artefatos import carregar_artefatos, DIRETORIO_OBJETOS
+    from desempenho import cronometrar
+
+    parser = argparse.ArgumentParser(description="Verifica a paridade e compara a latência com predict_proba.")
+    parser.add_argument("--objetos", default=DIRETORIO_OBJETOS, help="Diretório dos artefatos do modelo")
+    parser.add_argument("--linhas", type=int, default=2000, help="Linhas usadas na verificação de paridade")
+    parser.add_argument("--repeticoes", type=int, default=300, help="Repetições na medição de latência")
+    parser.add_argument("--tolerancia", type=float, default=1e-6)
+    args = parser.parse_args()
+
+    artefatos = carregar_artefatos(args.objetos)
+    modelo = artefatos["modelo"]
+    floresta = FlorestaNumpy.de_modelo(modelo)
+
+    # Linhas reais do teste quando disponíveis; caso contrário, valores aleatórios em torno dos limiares
+    if artefatos["explicabilidade_teste"] is not None:
+        X = np.asarray(artefatos["explicabilidade_teste"]["X_teste"][:args.linhas], dtype=np.float64)
+    else:
+        gerador = np.random.default_rng(1432)
+        limiares = floresta.limiar[floresta.coluna >= 0]
+        X = gerador.choice(limiares, size=(args.linhas, modelo.n_features_in_)) * gerador.uniform(0.5, 1.5, (args.linhas, 1))
+
+    diferenca = np.abs(floresta.probabilidade(X) - modelo.predict_proba(X)[:, 1]).max()
+    print(f"Paridade: diferença máxima {diferenca:.2e} em {len(X):,} linhas (tolerância {args.tolerancia:.0e})")
+
+    linha = X[:1]
+    print(f"1 linha    -> predict_proba: {np.median(cronometrar(lambda: modelo.predict_proba(linha), args.repeticoes)):.3f} ms | "
+          f"NumPy: {np.median(cronometrar(lambda: floresta.probabilidade(linha), args.repeticoes)):.3f} ms")
+    lote = X[:256]
+    print(f"{len(lote)} linhas -> predict_proba: {np.median(cronometrar(lambda: modelo.predict_proba(lote), 20)):.3f} ms | "
+          f"NumPy: {np.median(cronometrar(lambda: floresta.probabilidade(lote), 20)):.3f} ms")
+
+    sys.exit(0 if diferenca <= args.tolerancia else 1)
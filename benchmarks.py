@@ -0,0 +1,143 @@
+"""
+Benchmarks dos caminhos críticos: treinamento, carregamento de artefatos, pré-processamento,
+pontuação e explicabilidade.
+
+Roda offline, sobre dados sintéticos (ver dados_sinteticos.py) em um diretório temporário,
+e grava os resultados em JSON para que duas execuções possam ser comparadas.
+
+Uso:
+    python benchmarks.py --linhas 50000 --saida benchmarks.json
+    python benchmarks.py --comparar base.json benchmarks.json --tolerancia 0.10
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import lightgbm
+import shap
+import sklearn
+from shap import TreeExplainer
+from artefatos import carregar_artefatos, ler_artefatos
+from dados import converter_csv, ler_colunas, DatasetCodificado
+from dados_sinteticos import gerar_transacoes
+from desempenho import cronometrar
+from pontuacao import preparar_matriz
+
+DIRETORIO_REPO = os.path.dirname(os.path.abspath(__file__))
+
+
+def _resumo(tempos_ms, linhas=None):
+    """Mediana, mínimo e número de repetições; com `linhas`, também a vazão em linhas por segundo."""
+    mediana = float(np.median(tempos_ms))
+    resumo = {"mediana_ms": round(mediana, 4), "min_ms": round(float(np.min(tempos_ms)), 4),
+              "repeticoes": len(tempos_ms)}
+    if linhas:
+        resumo["linhas_por_segundo"] = round(linhas / (mediana / 1000), 1)
+    return resumo
+
+
+def executar(linhas=50_000, repeticoes=5, semente=1432):
+    """Gera os dados sintéticos, treina o modelo com o ModelCreation.py e mede cada etapa."""
+    resultados = {}
+    with tempfile.TemporaryDirectory(prefix="radar-benchmarks-") as pasta:
+        caminho_csv = os.path.join(pasta, "Fraud_transactions.csv")
+        gerar_transacoes(linhas, semente).to_csv(caminho_csv, index=False)
+        objetos = os.path.join(pasta, "objects")
+        os.makedirs(objetos)
+
+        # Treinamento de ponta a ponta (inclui a conversão para o cache e o pré-cálculo do SHAP)
+        ambiente = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [DIRETORIO_REPO, os.environ.get("PYTHONPATH")])))
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(DIRETORIO_REPO, "ModelCreation.py")], cwd=pasta, env=ambiente,
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        resultados["treinamento_completo"] = _resumo([(time.perf_counter() - inicio) * 1000], linhas)
+        print("Treinamento concluído")
+
+        # Artefatos de objects/, incluindo os membros carregados sob demanda (sem o cache de processo do carregar_artefatos)
+        resultados["carregamento_artefatos"] = _resumo(cronometrar(lambda: dict(ler_artefatos(objetos)), repeticoes))
+        artefatos = carregar_artefatos(objetos)
+        modelo = artefatos["modelo"]
+
+        # Leitura do CSV e pré-processamento, como nas páginas e na pontuação em lote (só as colunas selecionadas)
+        colunas = artefatos["colunas_selecionadas"]
+        resultados["leitura_csv"] = _resumo(cronometrar(lambda: ler_colunas(caminho_csv, colunas), repeticoes), linhas)
+        dados = ler_colunas(caminho_csv, colunas)
+
+        destinos = iter(os.path.join(pasta, "cache", f"execucao_{i}") for i in range(repeticoes + 1))
+        resultados["conversao_cache"] = _resumo(cronometrar(lambda: converter_csv(caminho_csv, next(destinos)), repeticoes), linhas)
+        resultados["abertura_cache"] = _resumo(cronometrar(lambda: DatasetCodificado(os.path.join(pasta, "cache", "execucao_0")),
+                                                           repeticoes))
+
+        resultados["codificacao_categoricas"] = _resumo(cronometrar(lambda: preparar_matriz(dados, artefatos), repeticoes), linhas)
+        matriz = preparar_matriz(dados, artefatos)
+
+        # Pontuação: uma linha (como no formulário) e em lote
+        linha, lote = matriz[:1], matriz[:10_000]
+        resultados["predict_proba_1_linha"] = _resumo(cronometrar(lambda: modelo.predict_proba(linha), repeticoes * 40, aquecimento=5))
+        resultados["floresta_numpy_1_linha"] = _resumo(cronometrar(lambda: artefatos["floresta"].probabilidade(linha),
+                                                                   repeticoes * 40, aquecimento=5))
+        resultados["predict_proba_lote"] = _resumo(cronometrar(lambda: modelo.predict_proba(lote), repeticoes, aquecimento=1), len(lote))
+
+        # Explicabilidade
+        resultados["shap_construcao_explainer"] = _resumo(cronometrar(lambda: TreeExplainer(modelo), repeticoes))
+        explainer = TreeExplainer(modelo)
+        resultados["shap_1_linha"] = _resumo(cronometrar(lambda: explainer.shap_values(linha), repeticoes * 4, aquecimento=1))
+
+    return {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": {"python": platform.python_version(), "plataforma": platform.platform(),
+                     "numpy": np.__version__, "pandas": pd.__version__, "scikit-learn": sklearn.__version__,
+                     "lightgbm": lightgbm.__version__, "shap": shap.__version__},
+        "parametros": {"linhas": linhas, "repeticoes": repeticoes, "semente": semente},
+        "resultados": resultados,
+    }
+
+
+def comparar(base, atual, tolerancia=0.10):
+    """
+    Imprime a variação da mediana de cada benchmark entre duas execuções.
+
+    Retorna:
+    - Lista com os nomes dos benchmarks que ficaram mais lentos do que a tolerância (ex.: 0.10 = 10%)
+    """
+    regressoes = []
+    print(f"{'benchmark':<30} {'base (ms)':>12} {'atual (ms)':>12} {'variação':>9}")
+    for nome in sorted(set(base["resultados"]) & set(atual["resultados"])):
+        antes, depois = base["resultados"][nome]["mediana_ms"], atual["resultados"][nome]["mediana_ms"]
+        variacao = (depois - antes) / antes if antes > 0 else 0.0
+        marcador = ""
+        if variacao > tolerancia:
+            regressoes.append(nome)
+            marcador = "  <- regressão"
+        print(f"{nome:<30} {antes:>12.3f} {depois:>12.3f} {variacao:>+9.1%}{marcador}")
+    return regressoes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks dos caminhos críticos do Radar de Fraudes.")
+    parser.add_argument("--linhas", type=int, default=50_000, help="Transações sintéticas geradas")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Repetições por benchmark")
+    parser.add_argument("--semente", type=int, default=1432)
+    parser.add_argument("--saida", default="benchmarks.json", help="Arquivo JSON com os resultados")
+    parser.add_argument("--comparar", nargs=2, metavar=("BASE", "ATUAL"), help="Compara dois arquivos de resultados")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="Aumento relativo tolerado na comparação")
+    args = parser.parse_args()
+
+    if args.comparar:
+        with open(args.comparar[0], encoding="utf-8") as arquivo_base, open(args.comparar[1], encoding="utf-8") as arquivo_atual:
+            regressoes = comparar(json.load(arquivo_base), json.load(arquivo_atual), args.tolerancia)
+        sys.exit(1 if regressoes else 0)
+
+    relatorio = executar(args.linhas, args.repeticoes, args.semente)
+    with open(args.saida, "w", encoding="utf-8") as arquivo:
+        json.dump(relatorio, arquivo, ensure_ascii=False, indent=2, sort_keys=True)
+    for nome, resumo in relatorio["resultados"].items():
+        print(f"{nome:<30} {resumo['mediana_ms']:>12.3f} ms")
+    print(f"Resultados gravados em {args.saida}")
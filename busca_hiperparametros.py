@@ -0,0 +1,208 @@
+"""
+Busca de hiperparâmetros do LGBMClassifier em paralelo, com poda e retomada.
+
+Cada tentativa sorteia parâmetros do mesmo espaço usado no FraudDetection.ipynb e é avaliada
+por validação cruzada estratificada (f1_macro) em um processo separado. A matriz de treino é
+gravada uma única vez em .npy e aberta por mapeamento de memória em todos os processos.
+Tentativas cuja média parcial fica abaixo da mediana das tentativas concluídas no mesmo fold
+são interrompidas (poda). Todas as tentativas ficam em um arquivo SQLite: rodar o comando de
+novo continua de onde parou. Os melhores parâmetros são gravados em objects/melhores_parametros.json,
+lido pelo ModelCreation.py.
+
+Uso:
+    python busca_hiperparametros.py --tentativas 64 --processos 8 --banco busca.sqlite
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+import numpy as np
+from lightgbm import LGBMClassifier
+from sklearn.feature_selection import SelectKBest, chi2
+from sklearn.metrics import f1_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from dados import abrir_dataset
+
+CAMINHO_PARAMETROS = "objects/melhores_parametros.json"
+espaco_busca = { # Mesmo espaço do BayesSearchCV do notebook
+    'num_leaves': ('inteiro', 20, 100),
+    'max_depth': ('inteiro', 3, 15),
+    'learning_rate': ('log', 0.005, 0.2),
+    'n_estimators': ('inteiro', 100, 500),
+    'min_child_samples': ('inteiro', 10, 100),
+    'subsample': ('real', 0.5, 1.0),
+    'colsample_bytree': ('real', 0.5, 1.0),
+    'reg_alpha': ('log', 1e-3, 10.0),
+    'reg_lambda': ('log', 1e-3, 10.0),
+    'scale_pos_weight': ('log', 1, 50),
+    'boosting_type': ('categorica', ['gbdt', 'dart']),
+}
+
+_dados_processo = {} # Matriz e rótulos de treino, abertos uma vez por processo
+
+
+def sortear_parametros(numero, semente=1432):
+    """Parâmetros da tentativa `numero`; dependem só da semente e do número, para que a retomada sorteie os mesmos."""
+    gerador = np.random.default_rng([semente, numero])
+    parametros = {}
+    for nome, (tipo, *limites) in espaco_busca.items():
+        if tipo == 'inteiro':
+            parametros[nome] = int(gerador.integers(limites[0], limites[1] + 1))
+        elif tipo == 'real':
+            parametros[nome] = float(gerador.uniform(limites[0], limites[1]))
+        elif tipo == 'log':
+            parametros[nome] = float(np.exp(gerador.uniform(np.log(limites[0]), np.log(limites[1]))))
+        else:
+            parametros[nome] = limites[0][gerador.integers(len(limites[0]))]
+    return parametros
+
+
+def _iniciar_processo(caminho_X, caminho_y):
+    _dados_processo["X"] = np.load(caminho_X, mmap_mode="r")
+    _dados_processo["y"] = np.load(caminho_y, mmap_mode="r")
+
+
+def avaliar_tentativa(numero, parametros, folds, medianas, semente=1432):
+    """
+    Avalia uma tentativa por validação cruzada, fold a fold, no processo de trabalho.
+
+    Parâmetros:
+    - medianas: mediana da média parcial das tentativas concluídas após cada fold (None = sem poda)
+
+    Retorna:
+    - Dicionário com numero, estado ('completa' ou 'podada'), pontuações por fold e duração
+    """
+    X, y = _dados_processo["X"], _dados_processo["y"]
+    inicio, pontuacoes = time.perf_counter(), []
+    divisao = StratifiedKFold(n_splits=folds, shuffle=True, random_state=semente)
+    for k, (treino, validacao) in enumerate(divisao.split(np.zeros(len(y)), y)):
+        modelo = LGBMClassifier(**parametros, n_jobs=1, verbose=-1).fit(X[treino], y[treino])
+        pontuacoes.append(float(f1_score(y[validacao], modelo.predict(X[validacao]), average="macro")))
+        if k < folds - 1 and medianas[k] is not None and np.mean(pontuacoes) < medianas[k]:
+            return {"numero": numero, "estado": "podada", "pontuacoes": pontuacoes,
+                    "duracao": time.perf_counter() - inicio}
+    return {"numero": numero, "estado": "completa", "pontuacoes": pontuacoes, "duracao": time.perf_counter() - inicio}
+
+
+def abrir_banco(caminho):
+    conexao = sqlite3.connect(caminho)
+    conexao.execute("""CREATE TABLE IF NOT EXISTS tentativas (
+                           numero INTEGER PRIMARY KEY, parametros TEXT NOT NULL, estado TEXT NOT NULL,
+                           pontuacoes TEXT, pontuacao REAL, duracao REAL, concluida_em TEXT)""")
+    conexao.commit()
+    return conexao
+
+
+def _medianas(conexao, folds, tentativas_iniciais):
+    """Mediana, entre as tentativas completas, da média das pontuações acumuladas até cada fold."""
+    completas = [json.loads(linha[0]) for linha in
+                 conexao.execute("SELECT pontuacoes FROM tentativas WHERE estado = 'completa'")]
+    if not completas or len(completas) < tentativas_iniciais:
+        return [None] * folds
+    acumuladas = np.cumsum(completas, axis=1) / np.arange(1, folds + 1)
+    return np.median(acumuladas, axis=0).tolist()
+
+
+def gravar_melhores(conexao, caminho=CAMINHO_PARAMETROS):
+    """Grava os parâmetros da melhor tentativa completa (troca atômica do arquivo). Retorna a linha vencedora."""
+    melhor = conexao.execute("""SELECT numero, parametros, pontuacao FROM tentativas WHERE estado = 'completa'
+                                ORDER BY pontuacao DESC, numero LIMIT 1""").fetchone()
+    if melhor is None:
+        return None
+    conteudo = {"parametros": json.loads(melhor[1]), "pontuacao_f1_macro": melhor[2], "tentativa": melhor[0],
+                "gerado_em": datetime.now().isoformat(timespec="seconds")}
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(caminho) or ".",
+                                     suffix=".tmp", delete=False) as arquivo:
+        json.dump(conteudo, arquivo, ensure_ascii=False, indent=2)
+    os.replace(arquivo.name, caminho)
+    return melhor
+
+
+def executar(caminho_csv="Fraud_transactions.csv", banco="busca.sqlite", tentativas=64, processos=None, folds=5,
+             tentativas_iniciais=5, semente=1432, caminho_parametros=CAMINHO_PARAMETROS):
+    """
+    Executa (ou retoma) a busca até completar `tentativas` tentativas no banco.
+
+    Usa a mesma divisão treino/teste e a mesma seleção de características do ModelCreation.py,
+    avaliando apenas no conjunto de treino.
+    """
+    conexao = abrir_banco(banco)
+    conexao.execute("DELETE FROM tentativas WHERE estado = 'executando'") # Interrompidas na execução anterior
+    conexao.commit()
+    feitas = {linha[0] for linha in conexao.execute("SELECT numero FROM tentativas")}
+    pendentes = [numero for numero in range(tentativas) if numero not in feitas]
+    print(f"{len(feitas)} tentativas no banco, {len(pendentes)} a executar")
+
+    if pendentes:
+        dataset = abrir_dataset(caminho_csv)
+        indices_treino, _ = train_test_split(np.arange(len(dataset)), test_size=0.25, random_state=1432)
+        y_treino = np.asarray(dataset.y)[indices_treino]
+        seletor = SelectKBest(chi2, k=10).fit(dataset.previsores(linhas=indices_treino), y_treino)
+        colunas = np.array(dataset.colunas)[seletor.get_support()].tolist()
+
+        with tempfile.TemporaryDirectory(prefix="radar-busca-") as pasta:
+            caminho_X, caminho_y = os.path.join(pasta, "X.npy"), os.path.join(pasta, "y.npy")
+            np.save(caminho_X, dataset.previsores(colunas, indices_treino).to_numpy())
+            np.save(caminho_y, y_treino)
+
+            processos = processos or os.cpu_count()
+            with ProcessPoolExecutor(processos, initializer=_iniciar_processo, initargs=(caminho_X, caminho_y)) as executor:
+                em_execucao, fila = set(), iter(pendentes)
+
+                def submeter():
+                    numero = next(fila, None)
+                    if numero is None:
+                        return
+                    parametros = sortear_parametros(numero, semente)
+                    conexao.execute("INSERT INTO tentativas (numero, parametros, estado) VALUES (?, ?, 'executando')",
+                                    (numero, json.dumps(parametros)))
+                    conexao.commit()
+                    medianas = _medianas(conexao, folds, tentativas_iniciais)
+                    em_execucao.add(executor.submit(avaliar_tentativa, numero, parametros, folds, medianas, semente))
+
+                for _ in range(processos):
+                    submeter()
+                while em_execucao:
+                    concluidas, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+                    for futuro in concluidas:
+                        em_execucao.discard(futuro)
+                        resultado = futuro.result()
+                        conexao.execute("""UPDATE tentativas SET estado = ?, pontuacoes = ?, pontuacao = ?, duracao = ?,
+                                           concluida_em = ? WHERE numero = ?""",
+                                        (resultado["estado"], json.dumps(resultado["pontuacoes"]),
+                                         float(np.mean(resultado["pontuacoes"])), resultado["duracao"],
+                                         datetime.now().isoformat(timespec="seconds"), resultado["numero"]))
+                        conexao.commit()
+                        print(f"Tentativa {resultado['numero']:>3}: {resultado['estado']:<8} "
+                              f"f1_macro {np.mean(resultado['pontuacoes']):.4f} "
+                              f"({len(resultado['pontuacoes'])} folds, {resultado['duracao']:.1f}s)")
+                        submeter()
+
+    melhor = gravar_melhores(conexao, caminho_parametros)
+    conexao.close()
+    return melhor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Busca de hiperparâmetros do modelo de fraude (paralela e retomável).")
+    parser.add_argument("--csv", default="Fraud_transactions.csv")
+    parser.add_argument("--banco", default="busca.sqlite", help="Arquivo SQLite com as tentativas")
+    parser.add_argument("--tentativas", type=int, default=64, help="Total de tentativas (inclui as já feitas)")
+    parser.add_argument("--processos", type=int, default=None, help="Processos em paralelo (padrão: núcleos da CPU)")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--tentativas-iniciais", type=int, default=5, help="Tentativas completas antes de começar a podar")
+    parser.add_argument("--semente", type=int, default=1432)
+    parser.add_argument("--saida", default=CAMINHO_PARAMETROS, help="JSON com os melhores parâmetros")
+    args = parser.parse_args()
+
+    melhor = executar(args.csv, args.banco, args.tentativas, args.processos, args.folds,
+                      args.tentativas_iniciais, args.semente, args.saida)
+    if melhor is None:
+        print("Nenhuma tentativa completa")
+    else:
+        print(f"Melhor tentativa: {melhor[0]} (f1_macro {melhor[2]:.4f}), gravada em {args.saida}")
@@ -0,0 +1,353 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+from desempenho import medido, medir
+from plots import colunas_traduzidas, traduzir_dataset
+
+CAMINHO_CSV = "Fraud_transactions.csv"
+DIRETORIO_CACHE = "cache" # Um subdiretório por versão do CSV (identificada pelo hash do conteúdo)
+colunas_descartadas = ['fraude', 'id_transacao', 'id_usuario', 'hora_transacao'] # Não entram nos previsores
+tipos_compactos = {'account_age_days': np.int32, 'total_transactions_user': np.int32, 'avg_amount_user': np.float32,
+                   'amount': np.float32, 'country': 'category', 'bin_country': 'category', 'channel': 'category',
+                   'merchant_category': 'category', 'promo_used': np.int8, 'avs_match': np.int8, 'cvv_result': np.int8,
+                   'three_ds_flag': np.int8, 'shipping_distance_km': np.float32, 'is_fraud': np.int8} # Leitura em blocos
+
+
+def calcular_hash(caminho, tamanho_bloco=1 << 20):
+    """Calcula o hash SHA-256 (16 primeiros caracteres) do conteúdo do arquivo, lendo em blocos."""
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b""):
+            sha.update(bloco)
+    return sha.hexdigest()[:16]
+
+
+def contar_linhas(caminho, tamanho_bloco=1 << 20):
+    """Conta as linhas de dados do CSV (sem o cabeçalho) lendo o arquivo em blocos de bytes."""
+    total, ultimo = 0, b"\n"
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b""):
+            total += bloco.count(b"\n")
+            ultimo = bloco[-1:]
+    return total + (ultimo != b"\n") - 1
+
+
+@medido("conversao_csv")
+def converter_csv(caminho_csv, destino):
+    """
+    Converte o CSV bruto para o formato de cache: matriz de previsores codificada, rótulos e ids.
+
+    A matriz é salva em ordem de colunas (Fortran), de modo que cada coluna é contígua no disco,
+    e as variáveis categóricas são codificadas com as classes ordenadas, como faz o LabelEncoder.
+    A gravação é feita em um diretório temporário renomeado ao final, para que outros processos
+    nunca vejam um cache incompleto.
+    """
+    dataset = traduzir_dataset(pd.read_csv(caminho_csv))
+    X = dataset.drop(columns=colunas_descartadas)
+
+    matriz = np.empty(X.shape, dtype=np.float64, order="F")
+    tipos, categorias = {}, {}
+    for j, coluna in enumerate(X.columns):
+        serie = X[coluna]
+        if serie.dtype == 'object':
+            classes, codigos = np.unique(serie.astype(str).to_numpy(), return_inverse=True)
+            matriz[:, j] = codigos
+            tipos[coluna], categorias[coluna] = "categorica", classes.tolist()
+        else:
+            matriz[:, j] = serie.to_numpy()
+            tipos[coluna] = "float" if serie.dtype.kind == "f" else "int"
+
+    _gravar_cache(destino, caminho_csv, dataset, matriz, X.columns.tolist(), tipos, categorias)
+
+
+@medido("conversao_csv")
+def codificar_particao(caminho_csv, encoders, destino):
+    """
+    Converte uma nova partição de transações para o formato de cache usando os LabelEncoders
+    já treinados, em vez de recalcular as classes.
+
+    Categorias que os encoders nunca viram recebem código NaN (valor ausente para o LightGBM),
+    então a partição pode ser pontuada e usada no treino sem erro.
+
+    Retorna:
+    - Tupla (DatasetCodificado da partição, dicionário coluna -> quantidade de valores desconhecidos)
+    """
+    dataset = traduzir_dataset(pd.read_csv(caminho_csv))
+    X = dataset.drop(columns=colunas_descartadas)
+
+    matriz = np.empty(X.shape, dtype=np.float64, order="F")
+    tipos, categorias, desconhecidas = {}, {}, {}
+    for j, coluna in enumerate(X.columns):
+        serie = X[coluna]
+        if coluna in encoders:
+            classes = encoders[coluna].classes_.astype(str)
+            valores = serie.astype(str).to_numpy()
+            posicoes = np.minimum(np.searchsorted(classes, valores), len(classes) - 1) # Classes em ordem, como no LabelEncoder
+            conhecidas = classes[posicoes] == valores
+            matriz[:, j] = np.where(conhecidas, posicoes, np.nan)
+            tipos[coluna], categorias[coluna] = "categorica", classes.tolist()
+            desconhecidas[coluna] = int((~conhecidas).sum())
+        else:
+            matriz[:, j] = serie.to_numpy()
+            tipos[coluna] = "float" if serie.dtype.kind == "f" else "int"
+
+    if not os.path.isdir(destino):
+        _gravar_cache(destino, caminho_csv, dataset, matriz, X.columns.tolist(), tipos, categorias)
+    return DatasetCodificado(destino), desconhecidas
+
+
+def _gravar_cache(destino, caminho_csv, dataset, matriz, colunas, tipos, categorias):
+    os.makedirs(os.path.dirname(destino) or ".", exist_ok=True)
+    temporario = tempfile.mkdtemp(prefix=".tmp-", dir=os.path.dirname(destino) or ".")
+    np.save(os.path.join(temporario, "X.npy"), matriz)
+    np.save(os.path.join(temporario, "y.npy"), dataset['fraude'].to_numpy(dtype=np.int8))
+    np.save(os.path.join(temporario, "id_transacao.npy"), dataset['id_transacao'].to_numpy(dtype=np.int64))
+    np.save(os.path.join(temporario, "id_usuario.npy"), dataset['id_usuario'].to_numpy(dtype=np.int64))
+    with open(os.path.join(temporario, "metadados.json"), "w", encoding="utf-8") as arquivo:
+        json.dump({"origem": os.path.basename(caminho_csv), "linhas": len(matriz), "colunas": colunas,
+                   "tipos": tipos, "categorias": categorias}, arquivo, ensure_ascii=False, indent=2)
+    try:
+        os.rename(temporario, destino)
+    except OSError:
+        shutil.rmtree(temporario) # Outro processo terminou a conversão primeiro
+
+
+class DatasetCodificado:
+    """
+    Acesso somente leitura ao cache de um CSV. Os arrays são mapeados em memória (np.load com
+    mmap_mode='r'), então abrir o cache não copia os dados e várias instâncias do Streamlit
+    no mesmo servidor compartilham as mesmas páginas do sistema operacional.
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        with open(os.path.join(diretorio, "metadados.json"), encoding="utf-8") as arquivo:
+            metadados = json.load(arquivo)
+        self.colunas = metadados["colunas"]
+        self.tipos = metadados["tipos"]
+        self.categorias = metadados["categorias"]
+        self.X = self._abrir("X")
+        self.y = self._abrir("y")
+        self.id_transacao = self._abrir("id_transacao")
+        self.id_usuario = self._abrir("id_usuario")
+
+    @classmethod
+    def em_memoria(cls, X, y, colunas, tipos, categorias):
+        """Mesma interface, sobre arrays já carregados (sem ids e sem diretório de cache)."""
+        dataset = cls.__new__(cls)
+        dataset.diretorio = None
+        dataset.colunas, dataset.tipos, dataset.categorias = colunas, tipos, categorias
+        dataset.X, dataset.y = X, y
+        dataset.id_transacao = dataset.id_usuario = None
+        return dataset
+
+    def com_colunas(self, extras):
+        """
+        Dataset em memória com as colunas numéricas de `extras` (DataFrame alinhado às linhas)
+        acrescentadas aos previsores, no mesmo tipo da matriz X.
+        """
+        X = np.empty((len(self), len(self.colunas) + extras.shape[1]), dtype=self.X.dtype, order="F")
+        X[:, :len(self.colunas)] = self.X
+        X[:, len(self.colunas):] = extras.to_numpy()
+        tipos = dict(self.tipos, **{coluna: "float" if extras[coluna].dtype.kind == "f" else "int" for coluna in extras.columns})
+        dataset = DatasetCodificado.em_memoria(X, self.y, self.colunas + extras.columns.tolist(), tipos, self.categorias)
+        dataset.id_transacao, dataset.id_usuario = self.id_transacao, self.id_usuario
+        return dataset
+
+    def _abrir(self, nome):
+        return np.load(os.path.join(self.diretorio, f"{nome}.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return self.X.shape[0]
+
+    def indices(self, colunas):
+        """Posições das colunas informadas na matriz X."""
+        return [self.colunas.index(coluna) for coluna in colunas]
+
+    def previsores(self, colunas=None, linhas=None):
+        """DataFrame com os previsores codificados (todas as colunas ou apenas as informadas; opcionalmente, só algumas linhas)."""
+        colunas = self.colunas if colunas is None else list(colunas)
+        if linhas is not None:
+            return pd.DataFrame(self.X[np.ix_(linhas, self.indices(colunas))], columns=colunas) # Uma única cópia
+        if colunas == self.colunas:
+            return pd.DataFrame(self.X, columns=colunas, copy=False)
+        return pd.DataFrame(self.X[:, self.indices(colunas)], columns=colunas)
+
+    def encoders(self, colunas=None):
+        """LabelEncoders equivalentes à codificação do cache, um por coluna categórica (todas ou só as informadas)."""
+        encoders = {}
+        for coluna, classes in self.categorias.items():
+            if colunas is not None and coluna not in colunas:
+                continue
+            le = LabelEncoder()
+            le.classes_ = np.array(classes, dtype=object)
+            encoders[coluna] = le
+        return encoders
+
+    def decodificar(self, colunas, linhas=None):
+        """DataFrame com os valores originais (categorias em texto, inteiros como int) das colunas informadas."""
+        linhas = slice(None) if linhas is None else linhas
+        decodificado = {}
+        for coluna in colunas:
+            valores = self.X[linhas, self.colunas.index(coluna)]
+            if self.tipos[coluna] == "categorica":
+                ausentes = np.isnan(valores) # Categorias desconhecidas pelos encoders (ver codificar_particao)
+                valores = np.asarray(self.categorias[coluna], dtype=object)[np.where(ausentes, 0, valores).astype(np.int64)]
+                valores[ausentes] = None
+            elif self.tipos[coluna] == "int":
+                valores = valores.astype(np.int64)
+            elif valores.dtype == np.float32: # Menor representação decimal (132.83 em vez de 132.830002)
+                valores = valores.astype(str).astype(np.float64)
+            decodificado[coluna] = valores
+        return pd.DataFrame(decodificado)
+
+
+@medido("leitura_csv")
+def ler_csv_compacto(caminho_csv=CAMINHO_CSV, tamanho_bloco=1_000_000):
+    """
+    Lê o CSV em blocos direto para uma matriz float32 pré-alocada, sem passar pelo cache em disco.
+
+    Cada bloco é lido com tipos compactos (float32 e categorias) e sem as colunas que não entram
+    no modelo; as categorias recebem códigos à medida que aparecem e, no final, são renumeradas
+    em ordem alfabética para coincidir com o LabelEncoder.
+
+    Retorna:
+    - DatasetCodificado em memória (previsores em float32, rótulos em int8)
+    """
+    cabecalho = pd.read_csv(caminho_csv, nrows=0).columns
+    ignoradas = set(colunas_descartadas) - {'fraude'}
+    usadas = [coluna for coluna in cabecalho if colunas_traduzidas.get(coluna, coluna) not in ignoradas]
+    colunas = [colunas_traduzidas.get(coluna, coluna) for coluna in usadas if colunas_traduzidas.get(coluna, coluna) != 'fraude']
+
+    linhas = contar_linhas(caminho_csv)
+    X = np.empty((linhas, len(colunas)), dtype=np.float32, order="F")
+    y = np.empty(linhas, dtype=np.int8)
+    codigos = {} # coluna -> {categoria: código provisório, na ordem em que apareceu}
+    tipos, inicio = {}, 0
+    # Inteiros dos previsores em float32 (o tipo da matriz), para campos em branco virarem NaN, como no cache
+    leitura = pd.read_csv(caminho_csv, usecols=usadas, chunksize=tamanho_bloco,
+                          dtype={coluna: np.float32 if _inteiro(tipo) and coluna != 'is_fraud' else tipo
+                                 for coluna, tipo in tipos_compactos.items() if coluna in usadas})
+    inteiras = {colunas_traduzidas.get(coluna, coluna) for coluna, tipo in tipos_compactos.items() if _inteiro(tipo)}
+    for bloco in leitura:
+        traduzir_dataset(bloco)
+        fim = inicio + len(bloco)
+        y[inicio:fim] = bloco['fraude'].to_numpy()
+        for j, coluna in enumerate(colunas):
+            serie = bloco[coluna]
+            if serie.dtype == 'object' or isinstance(serie.dtype, pd.CategoricalDtype):
+                serie = serie.astype('category')
+                indice = codigos.setdefault(coluna, {})
+                mapa = np.array([indice.setdefault(nome, len(indice)) for nome in serie.cat.categories.astype(str)])
+                codigos_bloco = serie.cat.codes.to_numpy()
+                if (codigos_bloco < 0).any(): # Ausentes (código -1, o último do mapa) viram 'nan', como no astype(str)
+                    mapa = np.append(mapa, indice.setdefault('nan', len(indice)))
+                X[inicio:fim, j] = mapa[codigos_bloco]
+                tipos[coluna] = "categorica"
+            else:
+                X[inicio:fim, j] = serie.to_numpy()
+                inteira = coluna in inteiras and tipos.get(coluna, "int") == "int" and not serie.isna().any()
+                tipos[coluna] = "int" if inteira else "float" # Com algum ausente, "float" em todo o arquivo
+        inicio = fim
+    X, y = X[:inicio], y[:inicio] # Linhas em branco não são lidas pelo pandas
+
+    categorias = {}
+    for coluna, indice in codigos.items():
+        classes = sorted(indice)
+        renumeracao = np.empty(len(indice), dtype=np.float32)
+        renumeracao[[indice[classe] for classe in classes]] = np.arange(len(classes))
+        j = colunas.index(coluna)
+        X[:, j] = renumeracao[X[:, j].astype(np.int64)]
+        categorias[coluna] = classes
+    return DatasetCodificado.em_memoria(X, y, colunas, tipos, categorias)
+
+
+def ler_colunas(caminho_csv, colunas, incluir=('fraude',), tamanho_bloco=None):
+    """
+    Lê do CSV bruto apenas as colunas informadas (nomes em português, normalmente as
+    colunas_selecionadas), já traduzidas e com tipos compactos.
+
+    Parâmetros:
+    - colunas: colunas obrigatórias
+    - incluir: colunas extras lidas apenas se existirem no arquivo (rótulo, id da transação etc.)
+    - tamanho_bloco: se informado, retorna um iterador de DataFrames com até esse número de linhas
+
+    Retorna:
+    - DataFrame (ou iterador de DataFrames) com as colunas na ordem informada, seguidas das extras;
+      colunas binárias em branco ficam NaN, e as inteiras com campos em branco, em float64 com NaN
+    """
+    cabecalho = pd.read_csv(caminho_csv, nrows=0).columns
+    no_arquivo = {colunas_traduzidas.get(coluna, coluna): coluna for coluna in cabecalho}
+    faltando = [coluna for coluna in colunas if coluna not in no_arquivo]
+    if faltando:
+        raise ValueError(f"Colunas ausentes em {caminho_csv}: {faltando}")
+    ordem = list(colunas) + [coluna for coluna in incluir if coluna in no_arquivo and coluna not in colunas]
+    usadas = [no_arquivo[coluna] for coluna in ordem]
+    # Decimais em float64, como na pontuação; inteiros também, até a conversão em _traduzir_bloco
+    tipos = {coluna: np.float64 if _inteiro(tipo) else tipo for coluna, tipo in tipos_compactos.items()
+             if coluna in usadas and tipo != np.float32}
+    inteiros = {colunas_traduzidas.get(coluna, coluna): tipos_compactos[coluna] for coluna in tipos
+                if _inteiro(tipos_compactos[coluna])}
+    if tamanho_bloco is None:
+        with medir("leitura_csv"):
+            return _traduzir_bloco(pd.read_csv(caminho_csv, usecols=usadas, dtype=tipos), ordem, inteiros)
+    return _blocos_traduzidos(pd.read_csv(caminho_csv, usecols=usadas, chunksize=tamanho_bloco, dtype=tipos), ordem,
+                              inteiros)
+
+
+def _inteiro(tipo):
+    return tipo != 'category' and np.dtype(tipo).kind in "iu"
+
+
+def _traduzir_bloco(bloco, ordem, inteiros):
+    """
+    Bloco traduzido, nas colunas de `ordem`. As colunas inteiras (ainda numéricas após a tradução)
+    voltam ao tipo compacto quando não têm ausentes; com campos em branco, ficam em float64 com
+    NaN, que a pontuação trata como valor ausente, em vez de a leitura falhar.
+    """
+    bloco = traduzir_dataset(bloco)[ordem]
+    for coluna, tipo in inteiros.items():
+        if coluna in bloco and bloco[coluna].dtype.kind == "f" and not bloco[coluna].isna().any():
+            bloco[coluna] = bloco[coluna].astype(tipo)
+    return bloco
+
+
+def _blocos_traduzidos(leitura, ordem, inteiros):
+    """Blocos do leitor do pandas já traduzidos, com o tempo de leitura de cada bloco medido."""
+    while True:
+        with medir("leitura_csv"):
+            bloco = next(leitura, None)
+            if bloco is None:
+                return
+            bloco = _traduzir_bloco(bloco, ordem, inteiros)
+        yield bloco
+
+
+@lru_cache(maxsize=None)
+def _abrir_versao(caminho_csv, tamanho, modificado, diretorio_cache):
+    destino = os.path.join(diretorio_cache, calcular_hash(caminho_csv))
+    if not os.path.isdir(destino):
+        converter_csv(caminho_csv, destino)
+    return DatasetCodificado(destino)
+
+
+def abrir_dataset(caminho_csv=CAMINHO_CSV, diretorio_cache=DIRETORIO_CACHE):
+    """
+    Abre o cache codificado do CSV, convertendo-o na primeira vez.
+
+    O hash do arquivo é calculado uma vez por processo para cada combinação de tamanho e
+    data de modificação; se o CSV mudar, um novo cache é gerado automaticamente.
+    """
+    estado = os.stat(caminho_csv)
+    return _abrir_versao(caminho_csv, estado.st_size, estado.st_mtime_ns, diretorio_cache)
+
+
+if __name__ == "__main__":
+    dataset = abrir_dataset()
+    print(f"Cache pronto em {dataset.diretorio}: {len(dataset):,} linhas, {len(dataset.colunas)} previsores")
@@ -0,0 +1,147 @@
+"""
+Gerador de transações sintéticas no formato do Fraud_transactions.csv, para testes de carga e escala.
+
+Os dados são gerados em blocos e gravados à medida que são produzidos, então a memória depende
+do tamanho do bloco (e do número de usuários), não do total de linhas.
+
+Uso:
+    python dados_sinteticos.py transacoes.csv --linhas 30000000 --tamanho-bloco 500000 --taxa-fraude 0.02
+    python dados_sinteticos.py transacoes_npy --formato npy --linhas 30000000
+"""
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+
+paises = ['DE', 'ES', 'FR', 'GB', 'IT', 'NL', 'PL', 'RO', 'TR', 'US']
+canais = ['app', 'web']
+categorias_comerciante = ['electronics', 'fashion', 'gaming', 'grocery', 'travel']
+
+INICIO_PERIODO = np.datetime64('2024-01-01T00:00:00', 's')
+SEGUNDOS_PERIODO = 365 * 24 * 3600 # As transações são distribuídas ao longo de um ano
+tipos_npy = {'transaction_id': np.int64, 'user_id': np.int64, 'account_age_days': np.int32,
+             'total_transactions_user': np.int32, 'avg_amount_user': np.float64, 'amount': np.float64,
+             'country': '<U2', 'bin_country': '<U2', 'channel': '<U3', 'merchant_category': '<U11',
+             'promo_used': np.int8, 'avs_match': np.int8, 'cvv_result': np.int8, 'three_ds_flag': np.int8,
+             'transaction_time': '<U20', 'shipping_distance_km': np.float64, 'is_fraud': np.int8} # Formato binário
+
+
+def _perfis_usuarios(usuarios, semente):
+    """Atributos fixos de cada usuário (data de criação da conta, país, ticket médio e atividade)."""
+    gerador = np.random.default_rng([semente, 0])
+    return {
+        "criacao_dias": gerador.integers(-3000, 0, usuarios), # Dias antes do início do período
+        "pais": gerador.integers(0, len(paises), usuarios),
+        "valor_medio": gerador.gamma(2.0, 60.0, usuarios).round(2),
+        "total_transacoes": gerador.integers(1, 80, usuarios),
+    }
+
+
+def _gerar_bloco(perfis, primeira_linha, linhas, total, taxa_fraude, gerador):
+    fraude = (gerador.random(linhas) < taxa_fraude).astype(np.int8)
+    e_fraude = fraude == 1
+    usuario = gerador.integers(0, len(perfis["pais"]), linhas)
+
+    # Cada bloco cobre a sua fração do período, então os horários ficam ordenados no arquivo inteiro
+    de = SEGUNDOS_PERIODO * primeira_linha // total
+    ate = max(SEGUNDOS_PERIODO * (primeira_linha + linhas) // total, de + 1)
+    segundos = np.sort(gerador.integers(de, ate, linhas))
+
+    idade_conta = segundos // 86_400 - perfis["criacao_dias"][usuario]
+    idade_conta = np.where(e_fraude, np.minimum(idade_conta, gerador.integers(1, 400, linhas)), idade_conta)
+    pais_usuario = perfis["pais"][usuario]
+    pais = np.where(gerador.random(linhas) < 0.9, pais_usuario, gerador.integers(0, len(paises), linhas))
+    pais_cartao = np.where(e_fraude | (gerador.random(linhas) < 0.05), gerador.integers(0, len(paises), linhas), pais_usuario)
+    verificacao = lambda: np.where(e_fraude, gerador.random(linhas) < 0.5, gerador.random(linhas) < 0.97).astype(np.int8)
+
+    return pd.DataFrame({
+        'transaction_id': np.arange(primeira_linha + 1, primeira_linha + linhas + 1),
+        'user_id': usuario + 1,
+        'account_age_days': idade_conta.astype(np.int32),
+        'total_transactions_user': perfis["total_transacoes"][usuario],
+        'avg_amount_user': perfis["valor_medio"][usuario],
+        'amount': (perfis["valor_medio"][usuario] * gerador.gamma(2.0, 0.5, linhas) * np.where(e_fraude, 4.0, 1.0)).round(2),
+        'country': np.asarray(paises)[pais],
+        'bin_country': np.asarray(paises)[pais_cartao],
+        'channel': np.asarray(canais)[gerador.integers(0, len(canais), linhas)],
+        'merchant_category': np.asarray(categorias_comerciante)[gerador.integers(0, len(categorias_comerciante), linhas)],
+        'promo_used': gerador.integers(0, 2, linhas).astype(np.int8),
+        'avs_match': verificacao(),
+        'cvv_result': verificacao(),
+        'three_ds_flag': gerador.integers(0, 2, linhas).astype(np.int8),
+        'transaction_time': np.datetime_as_string(INICIO_PERIODO + segundos.astype('timedelta64[s]'), unit='s', timezone='UTC'),
+        'shipping_distance_km': (gerador.gamma(2.0, 100.0, linhas) * np.where(e_fraude, 5.0, 1.0)).round(2),
+        'is_fraud': fraude,
+    })
+
+
+def gerar_em_blocos(linhas, tamanho_bloco=500_000, semente=1432, taxa_fraude=0.02, usuarios=None):
+    """
+    Gera as transações sintéticas em blocos (DataFrames com as colunas originais, em inglês).
+
+    Parâmetros:
+    - linhas: total de transações
+    - tamanho_bloco: transações por bloco (limita a memória usada)
+    - semente: semente do gerador (mesma semente e tamanho de bloco -> mesmos dados)
+    - taxa_fraude: proporção esperada de fraudes
+    - usuarios: número de usuários distintos (padrão: uma décima parte das linhas)
+
+    As fraudes têm valores e distâncias maiores, contas mais novas, país do cartão diferente
+    do país do usuário e mais falhas de CVV e endereço, para que o modelo tenha sinal a aprender.
+    """
+    perfis = _perfis_usuarios(usuarios or max(linhas // 10, 1), semente)
+    for indice, primeira_linha in enumerate(range(0, linhas, tamanho_bloco)):
+        gerador = np.random.default_rng([semente, indice + 1])
+        yield _gerar_bloco(perfis, primeira_linha, min(tamanho_bloco, linhas - primeira_linha), linhas, taxa_fraude, gerador)
+
+
+def gerar_transacoes(linhas, semente=1432, taxa_fraude=0.02):
+    """Gera todas as transações em um único DataFrame (para volumes que cabem em memória)."""
+    return next(gerar_em_blocos(linhas, max(linhas, 1), semente, taxa_fraude))
+
+
+def gravar(caminho, linhas, tamanho_bloco=500_000, semente=1432, taxa_fraude=0.02, usuarios=None, formato="csv"):
+    """
+    Grava as transações bloco a bloco em CSV ou em formato binário colunar ("npy": um arquivo
+    .npy por coluna no diretório `caminho`, pré-alocado e preenchido por mapeamento de memória).
+
+    Retorna:
+    - Tupla (linhas gravadas, segundos decorridos)
+    """
+    colunas = {}
+    if formato == "npy":
+        os.makedirs(caminho, exist_ok=True)
+        colunas = {nome: np.lib.format.open_memmap(os.path.join(caminho, f"{nome}.npy"), mode="w+", dtype=tipo, shape=(linhas,))
+                   for nome, tipo in tipos_npy.items()}
+
+    gravadas, inicio = 0, time.perf_counter()
+    for i, bloco in enumerate(gerar_em_blocos(linhas, tamanho_bloco, semente, taxa_fraude, usuarios)):
+        if formato == "npy":
+            for nome, destino in colunas.items():
+                destino[gravadas:gravadas + len(bloco)] = bloco[nome].to_numpy()
+        else:
+            bloco.to_csv(caminho, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+        gravadas += len(bloco)
+        decorrido = time.perf_counter() - inicio
+        print(f"{gravadas:,} linhas geradas ({gravadas / decorrido:,.0f} linhas/s)")
+
+    for destino in colunas.values():
+        destino.flush()
+    return gravadas, time.perf_counter() - inicio
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera transações sintéticas no formato do Fraud_transactions.csv.")
+    parser.add_argument("saida", help="Arquivo CSV (ou diretório, com --formato npy)")
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--tamanho-bloco", type=int, default=500_000, help="Linhas geradas e gravadas por vez")
+    parser.add_argument("--taxa-fraude", type=float, default=0.02)
+    parser.add_argument("--usuarios", type=int, default=None, help="Usuários distintos (padrão: linhas / 10)")
+    parser.add_argument("--semente", type=int, default=1432)
+    parser.add_argument("--formato", choices=["csv", "npy"], default="csv")
+    args = parser.parse_args()
+
+    total, segundos = gravar(args.saida, args.linhas, args.tamanho_bloco, args.semente, args.taxa_fraude,
+                             args.usuarios, args.formato)
+    print(f"Concluído: {total:,} linhas em {segundos:.1f}s")
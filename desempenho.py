@@ -0,0 +1,225 @@
+import atexit
+import bisect
+import functools
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+import numpy as np
+try:
+    import resource
+except ImportError: # Indisponível no Windows
+    resource = None
+
+LIMITES_HISTOGRAMA_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000) # Faixas dos histogramas de latência
+
+# Instrumentação das etapas (medir/medido): desligada, a menos que RADAR_METRICAS=1 ao iniciar o processo
+INSTRUMENTACAO_ATIVA = os.environ.get("RADAR_METRICAS", "0") not in ("", "0")
+ARQUIVO_METRICAS = os.environ.get("RADAR_METRICAS_ARQUIVO", "metricas_radar.prom")
+INTERVALO_EXPORTACAO = float(os.environ.get("RADAR_METRICAS_INTERVALO", "15")) # Segundos
+
+
+class JanelaLatencias:
+    """
+    Guarda as latências mais recentes (janela de tamanho fixo) e contadores de vazão.
+
+    Além da janela (percentis recentes), mantém contagens por faixa e a soma das latências desde a
+    criação, que só crescem, como exigem os histogramas do Prometheus.
+    Segura para uso por várias threads; a memória é limitada pelo tamanho da janela.
+    """
+
+    def __init__(self, tamanho_janela=10_000, limites_ms=LIMITES_HISTOGRAMA_MS):
+        self._latencias = deque(maxlen=tamanho_janela)
+        self._lock = threading.Lock()
+        self._inicio = time.perf_counter()
+        self.eventos = 0
+        self.total = 0
+        self.limites_ms = tuple(limites_ms)
+        self._limites_s = [limite / 1000 for limite in self.limites_ms]
+        self._por_faixa = [0] * (len(self.limites_ms) + 1) # Última posição: acima do maior limite
+        self._soma = 0.0
+
+    def registrar(self, segundos, quantidade=1):
+        """Registra a latência (em segundos) de um evento que processou `quantidade` itens."""
+        faixa = bisect.bisect_left(self._limites_s, segundos) # Primeiro limite >= latência ('le' do Prometheus)
+        with self._lock:
+            self._latencias.append(segundos)
+            self.eventos += 1
+            self.total += quantidade
+            self._por_faixa[faixa] += 1
+            self._soma += segundos
+
+    def resumo(self):
+        """Retorna p50, p99, média e máximo (em ms) da janela, eventos, total de itens e itens por segundo."""
+        with self._lock:
+            latencias = np.fromiter(self._latencias, dtype=float) * 1000
+            eventos, total = self.eventos, self.total
+        decorrido = time.perf_counter() - self._inicio
+        if latencias.size == 0:
+            return {"p50_ms": 0.0, "p99_ms": 0.0, "media_ms": 0.0, "max_ms": 0.0,
+                    "eventos": eventos, "total": total, "por_segundo": 0.0}
+        p50, p99 = np.percentile(latencias, [50, 99])
+        return {"p50_ms": round(float(p50), 3), "p99_ms": round(float(p99), 3),
+                "media_ms": round(float(latencias.mean()), 3), "max_ms": round(float(latencias.max()), 3),
+                "eventos": eventos, "total": total, "por_segundo": round(total / decorrido, 2) if decorrido > 0 else 0.0}
+
+    def histograma(self, limites_ms=LIMITES_HISTOGRAMA_MS):
+        """Contagem acumulada de latências da janela até cada limite (em ms), como os buckets 'le' do Prometheus."""
+        with self._lock:
+            latencias = np.fromiter(self._latencias, dtype=float) * 1000
+        contagens = np.searchsorted(np.sort(latencias), limites_ms, side="right")
+        return {**{f"{limite:g}": int(n) for limite, n in zip(limites_ms, contagens)}, "+Inf": int(latencias.size)}
+
+    def acumulado(self):
+        """
+        Histograma de todos os eventos desde a criação, lido de uma só vez (contagens, soma e total coerentes).
+
+        Retorna:
+        - Tupla (contagem acumulada até cada limite em ms, com "+Inf" no fim; soma em segundos; eventos)
+        """
+        with self._lock:
+            por_faixa, soma, eventos = list(self._por_faixa), self._soma, self.eventos
+        acumuladas = np.cumsum(por_faixa)
+        faixas = {f"{limite:g}": int(n) for limite, n in zip(self.limites_ms, acumuladas)}
+        faixas["+Inf"] = int(acumuladas[-1])
+        return faixas, soma, eventos
+
+
+_etapas = {} # Etapa -> JanelaLatencias (execuções recentes e histograma acumulado)
+_lock_etapas = threading.Lock()
+_SEM_MEDICAO = nullcontext()
+_exportador = None
+
+
+class _Medicao:
+    __slots__ = ("etapa", "inicio")
+
+    def __init__(self, etapa):
+        self.etapa = etapa
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excecao):
+        registrar_etapa(self.etapa, time.perf_counter() - self.inicio)
+        return False
+
+
+def registrar_etapa(etapa, segundos):
+    """Registra a duração de uma execução da etapa (e inicia a exportação periódica na primeira vez)."""
+    janela = _etapas.get(etapa)
+    if janela is None:
+        with _lock_etapas:
+            janela = _etapas.setdefault(etapa, JanelaLatencias(1_000))
+        _iniciar_exportacao()
+    janela.registrar(segundos)
+
+
+def medir(etapa):
+    """
+    Contexto que cronometra um trecho como uma execução de `etapa`:
+
+        with medir("predict_proba"):
+            ...
+
+    Com a instrumentação desligada, retorna um contexto vazio compartilhado (custo desprezível).
+    """
+    return _Medicao(etapa) if INSTRUMENTACAO_ATIVA else _SEM_MEDICAO
+
+
+def medido(etapa=None):
+    """
+    Decorador equivalente a medir() em volta da função inteira (etapa padrão: nome da função).
+    Com a instrumentação desligada, a função é retornada sem alteração.
+    """
+    def decorar(funcao):
+        if not INSTRUMENTACAO_ATIVA:
+            return funcao
+        nome = etapa or funcao.__name__
+
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            with _Medicao(nome):
+                return funcao(*args, **kwargs)
+        return medida
+    return decorar
+
+
+def resumo_etapas():
+    """Resumo (ver JanelaLatencias.resumo) de cada etapa medida, em ordem alfabética."""
+    with _lock_etapas:
+        etapas = sorted(_etapas.items())
+    return {etapa: janela.resumo() for etapa, janela in etapas}
+
+
+def texto_prometheus():
+    """
+    Métricas das etapas no formato de texto do Prometheus: histograma acumulado desde o início do
+    processo (contadores que só crescem, para rate() e histogram_quantile()) e total de execuções.
+    """
+    with _lock_etapas:
+        etapas = sorted(_etapas.items())
+    linhas = ["# HELP radar_etapa_segundos Duração das execuções de cada etapa desde o início do processo",
+              "# TYPE radar_etapa_segundos histogram"]
+    execucoes = []
+    for etapa, janela in etapas:
+        faixas, soma, eventos = janela.acumulado()
+        for limite, quantidade in faixas.items():
+            le = limite if limite == "+Inf" else f"{float(limite) / 1000:g}"
+            linhas.append(f'radar_etapa_segundos_bucket{{etapa="{etapa}",le="{le}"}} {quantidade}')
+        linhas.append(f'radar_etapa_segundos_sum{{etapa="{etapa}"}} {soma:.6f}')
+        linhas.append(f'radar_etapa_segundos_count{{etapa="{etapa}"}} {eventos}')
+        execucoes.append(f'radar_etapa_execucoes_total{{etapa="{etapa}"}} {eventos}')
+    linhas += ["# HELP radar_etapa_execucoes_total Execuções de cada etapa desde o início do processo",
+               "# TYPE radar_etapa_execucoes_total counter"] + execucoes
+    return "\n".join(linhas) + "\n"
+
+
+def exportar_prometheus(caminho=None):
+    """Grava texto_prometheus() em `caminho` (padrão: RADAR_METRICAS_ARQUIVO), com troca atômica do arquivo."""
+    caminho = caminho or ARQUIVO_METRICAS
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(caminho) or ".",
+                                     suffix=".tmp", delete=False) as arquivo:
+        arquivo.write(texto_prometheus())
+    os.replace(arquivo.name, caminho)
+
+
+def _iniciar_exportacao():
+    global _exportador
+    with _lock_etapas:
+        if _exportador is not None:
+            return
+        def exportar_periodicamente():
+            while True:
+                time.sleep(INTERVALO_EXPORTACAO)
+                exportar_prometheus()
+        _exportador = threading.Thread(target=exportar_periodicamente, daemon=True, name="exportador-metricas")
+        _exportador.start()
+    atexit.register(exportar_prometheus)
+
+
+def cronometrar(funcao, repeticoes=1, aquecimento=0):
+    """
+    Executa `funcao` repetidas vezes e retorna os tempos de cada execução, em milissegundos.
+    As `aquecimento` primeiras execuções são descartadas (caches, importações tardias etc.).
+    """
+    for _ in range(aquecimento):
+        funcao()
+    tempos = np.empty(repeticoes)
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos[i] = time.perf_counter() - inicio
+    return tempos * 1000
+
+
+def memoria_pico_mb():
+    """Pico de memória residente (RSS) do processo atual, em MB, ou None onde não é possível medir."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1 << 20) if sys.platform == "darwin" else pico / 1024 # Bytes no macOS, KB no Linux
@@ -0,0 +1,24 @@
+import pandas as pd
+import streamlit as st
+from desempenho import INSTRUMENTACAO_ATIVA, resumo_etapas, exportar_prometheus, ARQUIVO_METRICAS
+
+
+def painel_diagnostico():
+    """
+    Painel opcional na barra lateral com o tempo de cada etapa instrumentada (ver desempenho.medir).
+
+    Só aparece com a instrumentação ligada (RADAR_METRICAS=1); os números são do processo do
+    Streamlit, ou seja, somam todas as sessões e páginas atendidas por ele.
+    """
+    if not INSTRUMENTACAO_ATIVA:
+        return
+    with st.sidebar.expander("⏱️ Diagnóstico de desempenho"):
+        resumo = resumo_etapas()
+        if not resumo:
+            st.caption("Nenhuma etapa medida ainda.")
+            return
+        tabela = pd.DataFrame(resumo).T[["eventos", "p50_ms", "p99_ms", "media_ms", "max_ms"]]
+        st.dataframe(tabela, use_container_width=True)
+        if st.button("Exportar métricas (Prometheus)"):
+            exportar_prometheus()
+            st.caption(f"Gravado em {ARQUIVO_METRICAS}")
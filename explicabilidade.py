@@ -0,0 +1,174 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from joblib import dump
+from shap import TreeExplainer
+from artefatos import ler_artefatos, salvar_artefatos, DIRETORIO_OBJETOS
+from dados import abrir_dataset, ler_colunas
+from desempenho import medido
+from velocidade import calcular_velocidade, colunas_entrada
+
+colunas_segmento = ['pais', 'canal', 'categoria_comerciante'] # Segmentos da visão global de explicabilidade
+
+_explainer_processo = {} # TreeExplainer construído uma vez por processo de trabalho
+
+
+def _classe_positiva(valores):
+    """Versões antigas do shap retornam uma lista [classe 0, classe 1] para classificadores binários."""
+    return valores[1] if isinstance(valores, list) else valores
+
+
+def _iniciar_processo(modelo):
+    _explainer_processo["explainer"] = TreeExplainer(modelo)
+
+
+def _explicar_bloco(X):
+    return _classe_positiva(_explainer_processo["explainer"].shap_values(X)).astype(np.float32)
+
+
+@medido("shap")
+def calcular_shap(modelo, X, tamanho_lote=10_000, processos=1):
+    """
+    Calcula os valores SHAP (classe fraude) de todas as linhas de X em lotes.
+
+    O TreeExplainer é construído uma única vez (por processo) e cada lote é explicado em uma
+    só chamada, em vez de uma chamada por transação. Com `processos` > 1 (ou None = núcleos da
+    CPU), os lotes são distribuídos entre processos, com o mesmo resultado da execução serial.
+
+    Retorna:
+    - Tupla (valores SHAP float32 com o mesmo formato de X, valor base do modelo)
+    """
+    explainer = TreeExplainer(modelo)
+    valores = np.empty(X.shape, dtype=np.float32)
+    inicios = range(0, X.shape[0], tamanho_lote)
+    processos = processos or os.cpu_count()
+    if processos > 1 and len(inicios) > 1:
+        with ProcessPoolExecutor(min(processos, len(inicios)), initializer=_iniciar_processo, initargs=(modelo,)) as executor:
+            blocos = executor.map(_explicar_bloco, (X[inicio:inicio + tamanho_lote] for inicio in inicios))
+            for inicio, bloco in zip(inicios, blocos):
+                valores[inicio:inicio + tamanho_lote] = bloco
+    else:
+        for inicio in inicios:
+            valores[inicio:inicio + tamanho_lote] = _classe_positiva(explainer.shap_values(X[inicio:inicio + tamanho_lote]))
+    valor_base = np.ravel(explainer.expected_value)[-1] # Último elemento = classe fraude
+    return valores, float(valor_base)
+
+
+def gerar_explicabilidade_teste(modelo, X_teste, y_teste, dados_originais, colunas, segmentos=None, processos=1, ids=None):
+    """
+    Reúne tudo o que a página de explicabilidade exibe para o conjunto de teste.
+
+    Parâmetros:
+    - modelo: modelo treinado
+    - X_teste: matriz de teste já codificada e selecionada (n x colunas)
+    - y_teste: rótulos reais do teste
+    - dados_originais: DataFrame com os valores originais (não codificados) das mesmas linhas
+    - colunas: nomes das colunas selecionadas
+    - segmentos: DataFrame com os valores originais de colunas_segmento das mesmas linhas (opcional)
+    - processos: processos usados no cálculo do SHAP (ver calcular_shap)
+    - ids: id_transacao das mesmas linhas (opcional; usado pela busca da página, ver indice_transacoes.py)
+
+    Retorna:
+    - Dicionário com X_teste, y_teste, id_transacao, dados_originais, segmentos, probabilidades, shap e valor_base
+    """
+    X_teste = np.asarray(X_teste)
+    valores_shap, valor_base = calcular_shap(modelo, X_teste, processos=processos)
+    return {
+        "colunas": list(colunas),
+        "X_teste": X_teste,
+        "y_teste": np.asarray(y_teste, dtype=np.int8),
+        "id_transacao": None if ids is None else np.asarray(ids, dtype=np.int64),
+        "dados_originais": dados_originais.reset_index(drop=True),
+        "segmentos": None if segmentos is None else segmentos.reset_index(drop=True),
+        "probabilidades": modelo.predict_proba(X_teste)[:, 1],
+        "shap": valores_shap,
+        "valor_base": valor_base,
+    }
+
+
+def resumir_explicacoes(valores_shap, dados_originais, colunas, valor_base, segmentos=None, pontos_dependencia=2_000,
+                        semente=1432):
+    """
+    Agrega os valores SHAP de muitas transações no resumo compacto exibido pela visão global.
+
+    Parâmetros:
+    - valores_shap: matriz SHAP (n x colunas), ver calcular_shap
+    - dados_originais: DataFrame com os valores originais das colunas, nas mesmas linhas
+    - colunas: nomes das colunas (mesma ordem da matriz SHAP)
+    - valor_base: valor base do modelo
+    - segmentos: DataFrame com colunas_segmento das mesmas linhas (opcional)
+    - pontos_dependencia: tamanho da amostra guardada para os gráficos de dependência
+
+    Retorna:
+    - Dicionário com colunas, linhas, valor_base, importancia (média de |SHAP|), contribuicao_media
+      (média do SHAP), dependencia (amostra de valores originais e SHAP) e, por coluna de segmento,
+      categorias, contagens e a importância média de cada coluna em cada categoria
+    """
+    valores_shap = np.asarray(valores_shap, dtype=np.float32)
+    absolutos = np.abs(valores_shap)
+    linhas = valores_shap.shape[0]
+    amostra = np.sort(np.random.default_rng(semente).choice(linhas, min(linhas, pontos_dependencia), replace=False))
+
+    resumo_segmentos = {}
+    for segmento in ([] if segmentos is None else [coluna for coluna in colunas_segmento if coluna in segmentos]):
+        codigos, categorias = pd.factorize(segmentos[segmento], sort=True) # -1 = categoria ausente
+        validos = codigos >= 0
+        codigos, contagens = codigos[validos], np.bincount(codigos[validos], minlength=len(categorias))
+        somas = np.column_stack([np.bincount(codigos, weights=absolutos[validos, j], minlength=len(categorias))
+                                 for j in range(len(colunas))])
+        resumo_segmentos[segmento] = {
+            "categorias": categorias.tolist(),
+            "contagens": contagens,
+            "importancia": (somas / np.maximum(contagens, 1)[:, None]).astype(np.float32),
+        }
+
+    return {
+        "colunas": list(colunas),
+        "linhas": int(linhas),
+        "valor_base": float(valor_base),
+        "importancia": absolutos.mean(axis=0),
+        "contribuicao_media": valores_shap.mean(axis=0),
+        "dependencia": {"valores": dados_originais.iloc[amostra].reset_index(drop=True),
+                        "shap": valores_shap[amostra]},
+        "segmentos": resumo_segmentos,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pré-calcula as explicações globais (SHAP agregado) em paralelo.")
+    parser.add_argument("--csv", default="Fraud_transactions.csv")
+    parser.add_argument("--amostra", type=int, default=None,
+                        help="Linhas sorteadas do histórico completo (padrão: conjunto de teste do treinamento)")
+    parser.add_argument("--processos", type=int, default=None, help="Processos em paralelo (padrão: núcleos da CPU)")
+    parser.add_argument("--tamanho-bloco", type=int, default=10_000, help="Linhas explicadas por tarefa")
+    parser.add_argument("--pontos-dependencia", type=int, default=2_000)
+    parser.add_argument("--objetos", default=DIRETORIO_OBJETOS, help="Diretório dos artefatos do modelo")
+    parser.add_argument("--saida", default=None,
+                        help="Arquivo do resumo (padrão: nova versão do modelo com explicacoes_globais.pkl)")
+    args = parser.parse_args()
+
+    artefatos = ler_artefatos(args.objetos)
+    modelo, colunas = artefatos["modelo"], artefatos["colunas_selecionadas"]
+    if args.amostra is None:
+        teste = artefatos["explicabilidade_teste"]
+        X, dados_originais, segmentos = teste["X_teste"], teste["dados_originais"], teste.get("segmentos")
+    else:
+        dataset = abrir_dataset(args.csv)
+        if not set(colunas) <= set(dataset.colunas): # Modelo treinado com --velocidade
+            dataset = dataset.com_colunas(calcular_velocidade(ler_colunas(args.csv, colunas_entrada, incluir=())))
+        linhas = np.sort(np.random.default_rng(1432).choice(len(dataset), min(len(dataset), args.amostra), replace=False))
+        X = dataset.previsores(colunas, linhas).to_numpy()
+        dados_originais = dataset.decodificar(colunas, linhas)
+        segmentos = dataset.decodificar([coluna for coluna in colunas_segmento if coluna in dataset.colunas], linhas)
+
+    valores_shap, valor_base = calcular_shap(modelo, X, args.tamanho_bloco, args.processos)
+    globais = resumir_explicacoes(valores_shap, dados_originais, colunas, valor_base, segmentos, args.pontos_dependencia)
+    if args.saida is None:
+        versao = salvar_artefatos({"explicacoes_globais.pkl": globais}, args.objetos, descricao="explicações globais")
+        destino = f"a versão {versao}"
+    else:
+        dump(globais, args.saida)
+        destino = args.saida
+    print(f"{globais['linhas']:,} transações explicadas; resumo gravado em {destino}")
@@ -0,0 +1,182 @@
+"""
+Figuras da página de resultados, construídas uma única vez por versão do modelo e parâmetros.
+
+Cada visualização (radar de métricas, curvas PR/ROC, impacto financeiro, ROI e proporção de
+fraudes) tem um construtor que recebe as fontes (matriz de confusão, varredura de limiares e
+pontuações do teste, como em artefatos.carregar_artefatos) e os parâmetros da página. O resultado
+fica em um cache do processo, compartilhado entre as sessões, com a chave (identificador dos
+artefatos, visualização, parâmetros); o identificador é a versão do modelo ou, sem o registro, o
+diretório e o estado dos arquivos. As visualizações caras de construir (o bootstrap do impacto e
+do ROI, o gráfico do plotly.express) são geradas no treinamento com os parâmetros padrão e gravadas
+em JSON (objects/figuras_resultados.pkl), de modo que a primeira sessão já as recebe prontas. As
+curvas e o radar não são pré-renderizados: montá-los a partir da varredura custa menos que ler
+o JSON das curvas, com dezenas de milhares de pontos.
+"""
+import threading
+from collections import OrderedDict
+import plotly.graph_objects as go
+import plotly.io as pio
+from plots import (
+    calcular_metricas_fraude,
+    calcular_e_plotar_impacto,
+    bootstrap_impacto,
+    plot_bandas_impacto,
+    plot_proporcao_fraudes,
+    plot_radar_metricas,
+    plot_waterfall_roi,
+    matriz_no_limiar,
+    plot_curva_pr,
+    plot_curva_roc,
+)
+
+LIMIAR_PADRAO = 0.30 # Mesmo limiar da matriz de confusão do treinamento
+CUSTO_PADRAO = 80000 # Custo do projeto sugerido na página de ROI
+TAXA_JUROS = 0.29
+VALOR_MEDIO_EMPRESTIMO = 1200 # Usado quando as pontuações não trazem o valor de cada transação
+MAXIMO_ENTRADAS = 256 # Combinações de parâmetros guardadas no cache do processo
+
+
+def _matriz(fontes, limiar):
+    varredura = fontes["varredura_limiares"]
+    return fontes["matriz_confusao"] if varredura is None else matriz_no_limiar(varredura, limiar)
+
+
+def _com_valores(fontes):
+    pontuacoes = fontes["pontuacoes_teste"]
+    return pontuacoes is not None and "valores" in pontuacoes
+
+
+def _bandas(fontes, limiar, custo_projeto=None):
+    pontuacoes = fontes["pontuacoes_teste"]
+    return bootstrap_impacto(pontuacoes["y_teste"], pontuacoes["probabilidades"], pontuacoes["valores"],
+                             limiar, taxa_juros=TAXA_JUROS, custo_projeto=custo_projeto)
+
+
+def _metricas(fontes, limiar):
+    metricas = calcular_metricas_fraude(_matriz(fontes, limiar))
+    return metricas, plot_radar_metricas(metricas)
+
+
+def _impacto(fontes, limiar):
+    if _com_valores(fontes): # Valores reais das transações, com intervalos de confiança por bootstrap
+        return plot_bandas_impacto(_bandas(fontes, limiar))
+    return calcular_e_plotar_impacto(_matriz(fontes, limiar), VALOR_MEDIO_EMPRESTIMO, TAXA_JUROS)[1]
+
+
+def _roi(fontes, limiar, custo_projeto):
+    """Resumo do ROI (economia, retorno líquido, ROI e intervalos, se houver) e o gráfico waterfall."""
+    if _com_valores(fontes):
+        bandas = _bandas(fontes, limiar, custo_projeto).set_index("Cenário")
+        economia = bandas.loc["Economia por fraudes reprovadas", "Estimativa"]
+    else: # Só a economia com fraudes reprovadas (VP x valor médio), sem montar a tabela de impacto inteira
+        bandas = None
+        economia = _matriz(fontes, limiar)[1][1] * VALOR_MEDIO_EMPRESTIMO
+    retorno_liquido = economia - custo_projeto
+    resumo = {"economia": economia, "retorno_liquido": retorno_liquido,
+              "roi_percentual": retorno_liquido / custo_projeto * 100, "bandas": bandas}
+    return resumo, plot_waterfall_roi(economia, custo_projeto)
+
+
+def _curva_pr(fontes, limiar):
+    return plot_curva_pr(fontes["varredura_limiares"], limiar)
+
+
+def _curva_roc(fontes, limiar):
+    return plot_curva_roc(fontes["varredura_limiares"], limiar)
+
+
+def _proporcao(fontes, limiar):
+    return plot_proporcao_fraudes(_matriz(fontes, limiar))
+
+
+construtores = {
+    "metricas": _metricas,
+    "curva_pr": _curva_pr,
+    "curva_roc": _curva_roc,
+    "impacto": _impacto,
+    "roi": _roi,
+    "proporcao": _proporcao,
+}
+
+pre_renderizadas = ("impacto", "roi", "proporcao") # Ver a descrição do módulo
+
+parametros_padrao = {
+    "metricas": {"limiar": LIMIAR_PADRAO},
+    "curva_pr": {"limiar": LIMIAR_PADRAO},
+    "curva_roc": {"limiar": LIMIAR_PADRAO},
+    "impacto": {"limiar": LIMIAR_PADRAO},
+    "roi": {"limiar": LIMIAR_PADRAO, "custo_projeto": CUSTO_PADRAO},
+    "proporcao": {"limiar": LIMIAR_PADRAO},
+}
+
+
+def _para_json(resultado):
+    """Troca as figuras do resultado (figura ou tupla) pelo seu JSON."""
+    if isinstance(resultado, tuple):
+        return tuple(_para_json(parte) for parte in resultado)
+    return resultado.to_json() if isinstance(resultado, go.Figure) else resultado
+
+
+def _de_json(resultado):
+    if isinstance(resultado, tuple):
+        return tuple(_de_json(parte) for parte in resultado)
+    return pio.from_json(resultado) if isinstance(resultado, str) else resultado
+
+
+def _chave_parametros(parametros):
+    return tuple(sorted((nome, round(valor, 6) if isinstance(valor, float) else valor) for nome, valor in parametros.items()))
+
+
+def gerar_figuras_padrao(fontes):
+    """
+    Resultados das visualizações pré-renderizadas com os parâmetros padrão, com as figuras em JSON.
+
+    Parâmetros:
+    - fontes: mapeamento com matriz_confusao, varredura_limiares e pontuacoes_teste (None se ausentes)
+
+    Retorna:
+    - Dicionário visualização -> {"parametros": ..., "resultado": ...}, gravado em figuras_resultados.pkl
+    """
+    figuras = {}
+    for nome in pre_renderizadas:
+        parametros = parametros_padrao[nome]
+        figuras[nome] = {"parametros": _chave_parametros(parametros),
+                         "resultado": _para_json(construtores[nome](fontes, **parametros))}
+    return figuras
+
+
+_cache = OrderedDict() # (identificador dos artefatos, visualização, parâmetros) -> resultado, do menos para o mais recente
+_lock = threading.Lock()
+
+
+def obter(artefatos, nome, **parametros):
+    """
+    Resultado da visualização `nome` para os artefatos e parâmetros informados, construído uma única vez.
+
+    Parâmetros:
+    - artefatos: ArtefatosModelo (ver artefatos.carregar_artefatos); o identificador (a versão ou, sem
+      registro, o diretório e o tamanho e a data de modificação dos arquivos) faz parte da chave
+    - nome: uma das chaves de `construtores`
+    - parametros: limiar (e custo_projeto no ROI)
+
+    Retorna:
+    - Figura Plotly ou, em "metricas" e "roi", tupla (dados, figura). Os objetos são compartilhados
+      entre as sessões e não devem ser alterados.
+    """
+    chave = (artefatos.identificador, nome, _chave_parametros(parametros))
+    with _lock:
+        if chave in _cache:
+            _cache.move_to_end(chave)
+            return _cache[chave]
+
+    padrao = (artefatos.get("figuras_resultados") or {}).get(nome)
+    if padrao is not None and padrao["parametros"] == chave[2]:
+        resultado = _de_json(padrao["resultado"]) # Pré-renderizada no treinamento
+    else:
+        resultado = construtores[nome](artefatos, **parametros)
+
+    with _lock:
+        _cache[chave] = resultado
+        while len(_cache) > MAXIMO_ENTRADAS:
+            _cache.popitem(last=False)
+    return resultado
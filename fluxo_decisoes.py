@@ -0,0 +1,301 @@
+"""
+Pipeline contínuo de decisões: lê transações em JSONL (arquivo acompanhado em tempo real,
+entrada padrão ou socket TCP local), pontua em micro-lotes e grava cada decisão, com a faixa
+de risco (Fraude/Suspeita/Legítima), em um fluxo de saída JSONL.
+
+As etapas (leitura -> pontuação -> escrita) são ligadas por filas de tamanho limitado: se a
+saída ficar lenta, a pontuação e depois a leitura esperam (contrapressão), em vez de acumular
+transações na memória. O tamanho de cada lote acompanha a fila: com fila cheia, os lotes saem
+grandes e sem espera; com fila vazia, a pontuação espera no máximo `janela_ms` por mais transações.
+
+Uso:
+    python fluxo_decisoes.py --entrada transacoes.jsonl --seguir --saida decisoes.jsonl
+    cat transacoes.jsonl | python fluxo_decisoes.py --entrada - --saida -
+    python fluxo_decisoes.py --entrada tcp://127.0.0.1:9000 --saida decisoes.jsonl
+"""
+import argparse
+import asyncio
+import json
+import os
+import stat
+import sys
+import time
+from artefatos import carregar_artefatos, DIRETORIO_OBJETOS
+from armazem_usuarios import ArmazemUsuarios
+from desempenho import JanelaLatencias
+from monitor_drift import MonitorDrift
+from pontuacao import enriquecer_transacoes, preparar_matriz, prever_probabilidades, classificar_faixas
+from velocidade import MotorVelocidade
+
+FIM = None # Marca o fim da entrada nas filas
+BYTES_POR_LEITURA = 1 << 16 # Leitura de arquivos regulares em blocos de linhas
+LIMITE_LINHA = 1 << 20 # Maior linha aceita da entrada padrão, de pipes e do socket
+INTERVALO_ESPERA_ARQUIVO = 0.1 # Segundos entre verificações de linhas novas com --seguir
+
+
+class FluxoDecisoes:
+    """
+    Leitura, pontuação e escrita como tarefas asyncio ligadas por filas limitadas.
+
+    A pontuação (CPU) e o acesso a arquivos rodam em threads auxiliares, um lote por vez, de
+    modo que o laço de eventos continua recebendo transações enquanto o modelo trabalha e o
+    histórico (armazém e motor de velocidade) é sempre atualizado na ordem de chegada.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_OBJETOS, tamanho_lote=512, janela_ms=5.0, capacidade_fila=10_000, armazem=None,
+                 velocidade=None, monitor=None):
+        self.diretorio = diretorio # Artefatos relidos a cada lote: uma versão ativada entra em uso sem reinício
+        self.tamanho_lote = tamanho_lote
+        self.janela = janela_ms / 1000
+        self.capacidade_fila = capacidade_fila
+        self.armazem = armazem
+        self.velocidade = velocidade
+        self.monitor = monitor # Contagens de drift (monitor_drift.py) de cada lote pontuado
+        self.latencias = JanelaLatencias() # Ponta a ponta: da leitura da linha à gravação da decisão
+        self.latencias_lote = JanelaLatencias() # Pontuação de cada lote
+        self.invalidas = 0
+        self._entrada = self._saida = None
+
+    # ------------------------------ Leitura ------------------------------
+
+    def _item(self, linha):
+        """(instante da leitura, transação, erro) de uma linha JSON."""
+        instante = time.perf_counter()
+        try:
+            transacao = json.loads(linha)
+            if not isinstance(transacao, dict):
+                raise ValueError("cada linha deve ser um objeto JSON")
+        except ValueError as erro:
+            self.invalidas += 1
+            return instante, None, f"linha inválida: {erro}"
+        return instante, transacao, None
+
+    async def _ler_arquivo(self, arquivo, seguir):
+        loop = asyncio.get_running_loop()
+        resto = b""
+        while True:
+            linhas = await loop.run_in_executor(None, arquivo.readlines, BYTES_POR_LEITURA)
+            if not linhas:
+                if not seguir:
+                    break
+                await asyncio.sleep(INTERVALO_ESPERA_ARQUIVO)
+                continue
+            linhas[0] = resto + linhas[0]
+            resto = b""
+            if seguir and not linhas[-1].endswith(b"\n"): # Linha ainda sendo escrita
+                resto = linhas.pop()
+            for linha in linhas:
+                if linha.strip():
+                    await self._entrada.put(self._item(linha)) # Espera se a fila estiver cheia
+        if resto.strip():
+            await self._entrada.put(self._item(resto))
+
+    async def _ler_entrada(self, arquivo, seguir):
+        # Blocos de linhas só em arquivos regulares: em pipes, readlines esperaria o bloco inteiro ou o EOF
+        if stat.S_ISREG(os.fstat(arquivo.fileno()).st_mode):
+            await self._ler_arquivo(arquivo, seguir)
+        else:
+            await self._ler_pipe(arquivo)
+
+    async def _ler_pipe(self, arquivo):
+        """Entrada padrão, pipes e FIFOs: cada linha segue assim que chega, sem esperar um bloco inteiro."""
+        loop = asyncio.get_running_loop()
+        leitor = asyncio.StreamReader(limit=LIMITE_LINHA)
+        transporte, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(leitor), arquivo)
+        try:
+            while linha := await leitor.readline():
+                if linha.strip():
+                    await self._entrada.put(self._item(linha)) # Sem ler o pipe, quem escreve nele espera
+        finally:
+            transporte.close()
+
+    async def _ler_socket(self, host, porta):
+        async def atender(leitor, escritor):
+            while linha := await leitor.readline():
+                if linha.strip():
+                    await self._entrada.put(self._item(linha)) # Sem ler o socket, o TCP segura o cliente
+            escritor.close()
+
+        servidor = await asyncio.start_server(atender, host, porta, limit=LIMITE_LINHA)
+        print(f"Recebendo transações em tcp://{host}:{porta}", file=sys.stderr)
+        async with servidor:
+            await servidor.serve_forever()
+
+    async def _ler(self, origem, seguir):
+        try:
+            if origem.startswith("tcp://"):
+                host, porta = origem[len("tcp://"):].rsplit(":", 1)
+                await self._ler_socket(host, int(porta))
+            elif origem == "-":
+                await self._ler_entrada(sys.stdin.buffer, False)
+            else:
+                with open(origem, "rb") as arquivo:
+                    await self._ler_entrada(arquivo, seguir)
+        finally:
+            await self._entrada.put(FIM)
+
+    # ------------------------------ Pontuação ------------------------------
+
+    def _prever(self, dados):
+        artefatos = carregar_artefatos(self.diretorio) # Mesma versão para todo o lote
+        matriz = preparar_matriz(dados, artefatos)
+        probabilidades = prever_probabilidades(matriz, artefatos)
+        if self.monitor is not None and self.monitor.versao == artefatos.versao: # Perfil de drift da versão monitorada
+            self.monitor.atualizar(matriz, probabilidades)
+        return probabilidades
+
+    def _decidir(self, lote):
+        """Decisões de um lote, na ordem de entrada (executado fora do laço de eventos)."""
+        inicio = time.perf_counter()
+        validos = [transacao for _, transacao, erro in lote if erro is None]
+        resultados = []
+        dados = None
+        try:
+            dados = enriquecer_transacoes(validos, self.armazem, self.velocidade)
+            probabilidades = self._prever(dados) if validos else []
+            resultados = list(zip(probabilidades, classificar_faixas(probabilidades)))
+        except Exception:
+            # Um registro inválido não deve derrubar o lote inteiro: pontua cada transação separadamente
+            resultados = []
+            for i, transacao in enumerate(validos):
+                try:
+                    parte = enriquecer_transacoes([transacao], self.armazem, self.velocidade) if dados is None else dados[i:i + 1]
+                    probabilidade = self._prever(parte)[0]
+                    resultados.append((probabilidade, classificar_faixas(probabilidade)))
+                except Exception as erro:
+                    resultados.append(erro)
+        self.latencias_lote.registrar(time.perf_counter() - inicio, len(lote))
+
+        decisoes, posicao = [], 0
+        for instante, transacao, erro in lote:
+            decisao = {}
+            identificador = None if transacao is None else transacao.get("transaction_id", transacao.get("id_transacao"))
+            if identificador is not None:
+                decisao["id_transacao"] = identificador
+            if erro is None:
+                resultado, posicao = resultados[posicao], posicao + 1
+                if isinstance(resultado, Exception):
+                    erro = str(resultado)
+                else:
+                    decisao.update(probabilidade_fraude=round(float(resultado[0]), 6), faixa=str(resultado[1]))
+            if erro is not None:
+                decisao["erro"] = erro
+            decisoes.append((instante, decisao))
+        return decisoes
+
+    async def _pontuar(self):
+        loop = asyncio.get_running_loop()
+        fim = False
+        while not fim:
+            item = await self._entrada.get()
+            if item is FIM:
+                break
+            lote, limite = [item], loop.time() + self.janela
+            while len(lote) < self.tamanho_lote:
+                if self._entrada.empty(): # Sem fila acumulada: espera um pouco para formar o lote
+                    restante = limite - loop.time()
+                    if restante <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._entrada.get(), restante)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self._entrada.get_nowait()
+                if item is FIM:
+                    fim = True
+                    break
+                lote.append(item)
+            for decisao in await loop.run_in_executor(None, self._decidir, lote):
+                await self._saida.put(decisao) # Espera se a escrita estiver atrasada
+        await self._saida.put(FIM)
+
+    # ------------------------------ Escrita ------------------------------
+
+    @staticmethod
+    def _gravar(destino, texto):
+        destino.write(texto)
+        destino.flush()
+
+    async def _escrever(self, destino):
+        loop = asyncio.get_running_loop()
+        fim = False
+        while not fim:
+            item = await self._saida.get()
+            if item is FIM:
+                break
+            lote = [item]
+            while not self._saida.empty() and len(lote) < self.tamanho_lote:
+                item = self._saida.get_nowait()
+                if item is FIM:
+                    fim = True
+                    break
+                lote.append(item)
+            texto = "".join(json.dumps(decisao, ensure_ascii=False) + "\n" for _, decisao in lote)
+            await loop.run_in_executor(None, self._gravar, destino, texto)
+            agora = time.perf_counter()
+            for instante, _ in lote:
+                self.latencias.registrar(agora - instante)
+
+    # ------------------------------ Execução ------------------------------
+
+    def relatorio(self):
+        """Latência ponta a ponta (resumo e histograma), vazão, lotes e ocupação das filas."""
+        return {"ponta_a_ponta": self.latencias.resumo(), "histograma_ms": self.latencias.histograma(),
+                "lotes": self.latencias_lote.resumo(), "linhas_invalidas": self.invalidas,
+                "fila_entrada": self._entrada.qsize() if self._entrada else 0,
+                "fila_saida": self._saida.qsize() if self._saida else 0}
+
+    async def _relatar(self, intervalo):
+        while True:
+            await asyncio.sleep(intervalo)
+            print(json.dumps(self.relatorio(), ensure_ascii=False), file=sys.stderr)
+
+    async def executar(self, origem, destino, seguir=False, intervalo_relatorio=None):
+        """Processa a origem até o fim (ou indefinidamente, com --seguir e com sockets)."""
+        self._entrada = asyncio.Queue(self.capacidade_fila)
+        self._saida = asyncio.Queue(self.capacidade_fila)
+        relatorio = asyncio.create_task(self._relatar(intervalo_relatorio)) if intervalo_relatorio else None
+        try:
+            await asyncio.gather(self._ler(origem, seguir), self._pontuar(), self._escrever(destino))
+        finally:
+            if relatorio is not None:
+                relatorio.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline contínuo de decisões de fraude sobre um fluxo de transações.")
+    parser.add_argument("--entrada", default="-", help="Arquivo JSONL, '-' (entrada padrão) ou tcp://host:porta")
+    parser.add_argument("--seguir", action="store_true", help="Continua lendo as linhas acrescentadas ao arquivo")
+    parser.add_argument("--saida", default="-", help="Arquivo JSONL de decisões ou '-' (saída padrão)")
+    parser.add_argument("--tamanho-lote", type=int, default=512, help="Número máximo de transações por lote")
+    parser.add_argument("--janela-ms", type=float, default=5.0, help="Espera máxima para formar um lote com a fila vazia")
+    parser.add_argument("--capacidade-fila", type=int, default=10_000, help="Transações em cada fila antes da contrapressão")
+    parser.add_argument("--relatorio-s", type=float, default=10.0, help="Intervalo dos relatórios no stderr (0 desativa)")
+    parser.add_argument("--objetos", default=DIRETORIO_OBJETOS, help="Diretório dos artefatos do modelo")
+    parser.add_argument("--armazem", default=None, help="Snapshot do armazém de usuários (armazem_usuarios.py)")
+    parser.add_argument("--velocidade", default=None, help="Estado do motor de velocidade (velocidade.py)")
+    parser.add_argument("--monitor", default=None, help="Estado do monitor de drift (monitor_drift.py), gravado periodicamente")
+    args = parser.parse_args()
+
+    armazem = ArmazemUsuarios.carregar(args.armazem) if args.armazem else None
+    velocidade = MotorVelocidade.carregar(args.velocidade) if args.velocidade else None
+    monitor = MonitorDrift.carregar_ou_criar(args.monitor, carregar_artefatos(args.objetos)) if args.monitor else None
+    if monitor is not None:
+        monitor.gravar_periodicamente(args.monitor)
+    fluxo = FluxoDecisoes(args.objetos, args.tamanho_lote, args.janela_ms, args.capacidade_fila, armazem, velocidade, monitor)
+    destino = sys.stdout if args.saida == "-" else open(args.saida, "a", encoding="utf-8")
+    try:
+        asyncio.run(fluxo.executar(args.entrada, destino, args.seguir, args.relatorio_s or None))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if destino is not sys.stdout:
+            destino.close()
+        if armazem is not None:
+            armazem.salvar(args.armazem)
+        if velocidade is not None:
+            velocidade.salvar(args.velocidade)
+        if monitor is not None:
+            monitor.salvar(args.monitor)
+        print(json.dumps(fluxo.relatorio(), ensure_ascii=False), file=sys.stderr)
@@ -0,0 +1,146 @@
+"""
+Índice das transações do conjunto de teste, para a busca da página de explicabilidade.
+
+Construído no treinamento, junto com as explicações pré-calculadas: a posição de cada
+id_transacao (ids ordenados, busca binária), um bitmap por categoria de pais, canal e
+categoria_comerciante (np.packbits, um bit por transação), a ordem das transações por valor e
+por probabilidade prevista (faixas por busca binária) e o bitmap das previsões incorretas.
+Os filtros combinam os bitmaps com operações bit a bit, sem percorrer DataFrames.
+
+Uso (tempo de consulta sobre as explicações salvas):
+    python indice_transacoes.py --repeticoes 1000
+"""
+import argparse
+import time
+import numpy as np
+
+LIMIAR_CLASSE = 0.5 # Mesmo limiar da página de explicabilidade para "previsão correta / incorreta"
+colunas_indexadas = ['pais', 'canal', 'categoria_comerciante'] # Mesmas de explicabilidade.colunas_segmento
+faixas_indexadas = ['valor', 'probabilidade']
+
+
+class IndiceTransacoes:
+    """
+    Filtros e busca por id sobre as linhas do conjunto de teste (posições em explicabilidade_teste).
+
+    Todos os resultados são posições (0 a linhas - 1) nas matrizes das explicações pré-calculadas.
+    """
+
+    def __init__(self, ids, valores, probabilidades, y_teste, segmentos=None, limiar=LIMIAR_CLASSE):
+        self.linhas = len(probabilidades)
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.limiar = limiar
+        self._ordem_ids = np.argsort(self.ids, kind="stable")
+        self._ids_ordenados = self.ids[self._ordem_ids]
+
+        self.categorias = {} # Coluna -> categorias (texto), na ordem das linhas de bitmaps[coluna]
+        self.bitmaps = {}
+        if segmentos is not None:
+            for coluna in colunas_indexadas:
+                if coluna not in segmentos:
+                    continue
+                codigos, categorias = _codificar(segmentos[coluna])
+                self.categorias[coluna] = categorias
+                self.bitmaps[coluna] = np.packbits(codigos[None, :] == np.arange(len(categorias))[:, None], axis=1)
+
+        self._ordens, self._ordenados = {}, {} # Faixa -> posições em ordem crescente e os valores nessa ordem
+        for nome, dados in zip(faixas_indexadas, (valores, probabilidades)):
+            if dados is None:
+                continue
+            dados = np.asarray(dados, dtype=np.float64)
+            self._ordens[nome] = np.argsort(dados, kind="stable")
+            self._ordenados[nome] = dados[self._ordens[nome]]
+
+        erro = (np.asarray(probabilidades) >= limiar).astype(np.int8) != np.asarray(y_teste, dtype=np.int8)
+        self.bitmap_erro = np.packbits(erro)
+
+    @classmethod
+    def de_explicabilidade(cls, explicabilidade, pontuacoes=None):
+        """Índice das explicações pré-calculadas (ver explicabilidade.gerar_explicabilidade_teste)."""
+        ids = explicabilidade.get("id_transacao")
+        if ids is None: # Treinamentos sem os ids: a própria posição no teste serve de id
+            ids = np.arange(len(explicabilidade["y_teste"]))
+        valores = None
+        if pontuacoes is not None and "valores" in pontuacoes:
+            valores = pontuacoes["valores"]
+        elif "valor" in explicabilidade["dados_originais"]:
+            valores = explicabilidade["dados_originais"]["valor"].to_numpy()
+        return cls(ids, valores, explicabilidade["probabilidades"], explicabilidade["y_teste"],
+                   explicabilidade.get("segmentos"))
+
+    def posicao(self, id_transacao):
+        """Posição da transação no teste (None se o id não pertence ao conjunto de teste)."""
+        i = np.searchsorted(self._ids_ordenados, id_transacao)
+        if i < self.linhas and self._ids_ordenados[i] == id_transacao:
+            return int(self._ordem_ids[i])
+        return None
+
+    def limites(self, faixa):
+        """Menor e maior valor indexado da faixa ('valor' ou 'probabilidade'), ou None se não indexada."""
+        if faixa not in self._ordenados:
+            return None
+        return float(self._ordenados[faixa][0]), float(self._ordenados[faixa][-1])
+
+    def _bitmap_faixa(self, faixa, minimo, maximo):
+        ordenados = self._ordenados[faixa]
+        inicio, fim = np.searchsorted(ordenados, minimo, side="left"), np.searchsorted(ordenados, maximo, side="right")
+        marcados = np.zeros(self.linhas, dtype=bool)
+        marcados[self._ordens[faixa][inicio:fim]] = True
+        return np.packbits(marcados)
+
+    def filtrar(self, categorias=None, faixas=None, erro=None):
+        """
+        Posições das transações que atendem a todos os filtros.
+
+        Parâmetros:
+        - categorias: coluna -> categorias aceitas (qualquer uma delas; lista vazia ou ausente não filtra)
+        - faixas: 'valor' / 'probabilidade' -> (mínimo, máximo), inclusive
+        - erro: True para apenas previsões incorretas, False para apenas as corretas, None para todas
+
+        Retorna:
+        - Array com as posições, em ordem crescente
+        """
+        bitmap = np.full((self.linhas + 7) // 8, 0xFF, dtype=np.uint8)
+        for coluna, aceitas in (categorias or {}).items():
+            if not aceitas or coluna not in self.bitmaps:
+                continue
+            linhas = [self.categorias[coluna].index(categoria) for categoria in aceitas if categoria in self.categorias[coluna]]
+            bitmap &= np.bitwise_or.reduce(self.bitmaps[coluna][linhas], axis=0) if linhas else 0
+        for faixa, (minimo, maximo) in (faixas or {}).items():
+            if faixa in self._ordenados:
+                bitmap &= self._bitmap_faixa(faixa, minimo, maximo)
+        if erro is not None:
+            bitmap &= self.bitmap_erro if erro else ~self.bitmap_erro
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.linhas))
+
+
+def _codificar(valores):
+    """Códigos (posição na lista de categorias ordenadas) e categorias em texto de uma coluna."""
+    categorias, codigos = np.unique(np.asarray(valores).astype(str), return_inverse=True)
+    return codigos, categorias.tolist()
+
+
+if __name__ == "__main__":
+    from artefatos import ler_artefatos, DIRETORIO_OBJETOS
+
+    parser = argparse.ArgumentParser(description="Mede as consultas ao índice do conjunto de teste.")
+    parser.add_argument("--objetos", default=DIRETORIO_OBJETOS, help="Diretório dos artefatos do modelo")
+    parser.add_argument("--repeticoes", type=int, default=1000)
+    args = parser.parse_args()
+
+    artefatos = ler_artefatos(args.objetos)
+    indice = artefatos["indice_teste"]
+    coluna = next(iter(indice.categorias), None)
+    filtros = {"categorias": {coluna: indice.categorias[coluna][:1]} if coluna else None,
+               "faixas": {"probabilidade": (0.3, 1.0)}, "erro": True}
+
+    inicio = time.perf_counter()
+    for _ in range(args.repeticoes):
+        posicoes = indice.filtrar(**filtros)
+    filtro_ms = (time.perf_counter() - inicio) / args.repeticoes * 1000
+    inicio = time.perf_counter()
+    for id_transacao in indice.ids[:args.repeticoes]:
+        indice.posicao(id_transacao)
+    busca_us = (time.perf_counter() - inicio) / min(args.repeticoes, indice.linhas) * 1e6
+    print(f"{indice.linhas:,} transações indexadas; filtro {filtros}: {len(posicoes):,} encontradas em {filtro_ms:.3f} ms; "
+          f"busca por id: {busca_us:.1f} µs")
@@ -0,0 +1,246 @@
+"""
+Monitor de drift das características do modelo e da pontuação, com memória fixa.
+
+O perfil de referência (PerfilDrift) é construído no ModelCreation.py a partir da matriz do
+conjunto de teste (separado dos mesmos dados do treino) e das probabilidades previstas para ele:
+para cada coluna selecionada, faixas fixas (quantis nas numéricas, um código por categoria nas
+categóricas, mais uma faixa para valores ausentes) e a contagem de referência em cada faixa,
+incluindo a pontuação do modelo como uma coluna a mais. O MonitorDrift acumula, lote
+a lote, as contagens das transações pontuadas nas mesmas faixas, sem guardar nenhuma transação,
+e compara as duas distribuições por PSI e KS. Além do acumulado, guarda contagens por período
+(anel de tamanho fixo), para a comparação das transações mais recentes.
+
+Uso (relatório de um estado gravado pelos servidores ou pela pontuação em lote):
+    python monitor_drift.py objects/monitor_drift.pkl --recente
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+import pandas as pd
+from joblib import dump, load
+
+COLUNA_PONTUACAO = "probabilidade_fraude" # Nome da pontuação do modelo no relatório
+CAMINHO_MONITOR = "objects/monitor_drift.pkl"
+PROPORCAO_MINIMA = 1e-4 # Evita log(0) no PSI de faixas vazias
+LIMITES_PSI = (0.1, 0.25) # Até 0.1: estável; até 0.25: moderado; acima: significativo
+
+
+class PerfilDrift:
+    """
+    Faixas fixas de cada coluna e contagens de referência, em um único vetor de contagens.
+
+    As faixas de todas as colunas ficam lado a lado: a coluna j ocupa as posições
+    inicios[j]:inicios[j + 1], com a faixa de ausentes na última posição.
+    """
+
+    def __init__(self, colunas, limites, referencia, categorias=None):
+        self.colunas = list(colunas) # Colunas do modelo e, por último, COLUNA_PONTUACAO
+        self.limites = limites # Coluna -> limites internos das faixas (numéricas) ou número de categorias (int)
+        self.categorias = categorias or {} # Coluna categórica -> nomes das categorias, na ordem dos códigos
+        tamanhos = [self._faixas(coluna) + 1 for coluna in self.colunas]
+        self.inicios = np.r_[0, np.cumsum(tamanhos)]
+        self.referencia = np.asarray(referencia, dtype=np.int64)
+
+    def _faixas(self, coluna):
+        limites = self.limites[coluna]
+        return limites if isinstance(limites, int) else len(limites) + 1
+
+    @classmethod
+    def construir(cls, X, colunas, categorias, probabilidades, caixas=20):
+        """
+        Perfil de uma matriz de referência (já codificada) e das probabilidades previstas para ela.
+
+        Parâmetros:
+        - X: matriz (n x colunas) na mesma codificação da pontuação (ver preprocessamento.PreProcessador)
+        - categorias: coluna -> classes das colunas categóricas, na ordem dos códigos (PreProcessador.classes)
+        - probabilidades: probabilidades de fraude previstas para as linhas de X
+        - caixas: número de quantis usados como limites das colunas numéricas
+        """
+        X = np.asarray(X, dtype=np.float64)
+        quantis = np.linspace(0, 1, caixas + 1)[1:-1]
+        limites = {}
+        for j, coluna in enumerate(colunas):
+            if coluna in categorias:
+                limites[coluna] = len(categorias[coluna])
+            else:
+                valores = X[:, j][~np.isnan(X[:, j])]
+                limites[coluna] = np.unique(np.quantile(valores, quantis)) if valores.size else np.empty(0)
+        limites[COLUNA_PONTUACAO] = np.unique(np.quantile(probabilidades, quantis))
+        perfil = cls(list(colunas) + [COLUNA_PONTUACAO], limites, np.zeros(0),
+                     {coluna: [str(classe) for classe in classes] for coluna, classes in categorias.items() if coluna in colunas})
+        perfil.referencia = perfil.contar(X, probabilidades)
+        return perfil
+
+    def contar(self, X, probabilidades):
+        """Contagem de cada faixa de todas as colunas para um lote (matriz preparada e probabilidades)."""
+        X = np.column_stack([np.asarray(X, dtype=np.float64), np.asarray(probabilidades, dtype=np.float64)])
+        posicoes = np.empty(X.shape, dtype=np.int64)
+        for j, coluna in enumerate(self.colunas):
+            valores, limites = X[:, j], self.limites[coluna]
+            ausentes = np.isnan(valores)
+            if isinstance(limites, int): # Código da categoria; desconhecidas (NaN) vão para a faixa de ausentes
+                faixas = np.where(ausentes | (valores < 0) | (valores >= limites), limites, np.nan_to_num(valores))
+            else:
+                faixas = np.where(ausentes, len(limites) + 1, np.searchsorted(limites, valores, side="right"))
+            posicoes[:, j] = self.inicios[j] + faixas.astype(np.int64)
+        return np.bincount(posicoes.ravel(), minlength=self.inicios[-1])
+
+
+def _psi(referencia, atual):
+    """Population Stability Index entre duas contagens nas mesmas faixas."""
+    if referencia.sum() == 0 or atual.sum() == 0:
+        return np.nan
+    esperado = np.maximum(referencia / referencia.sum(), PROPORCAO_MINIMA)
+    observado = np.maximum(atual / atual.sum(), PROPORCAO_MINIMA)
+    return float(np.sum((observado - esperado) * np.log(observado / esperado)))
+
+
+def _ks(referencia, atual):
+    """Maior distância entre as distribuições acumuladas nas bordas das faixas (sem os ausentes)."""
+    referencia, atual = referencia[:-1], atual[:-1]
+    if referencia.sum() == 0 or atual.sum() == 0:
+        return np.nan
+    return float(np.max(np.abs(np.cumsum(referencia) / referencia.sum() - np.cumsum(atual) / atual.sum())))
+
+
+def classificar_psi(psi):
+    if np.isnan(psi):
+        return "Sem dados"
+    return "Estável" if psi < LIMITES_PSI[0] else "Moderado" if psi < LIMITES_PSI[1] else "Significativo"
+
+
+class MonitorDrift:
+    """
+    Contagens das transações pontuadas nas faixas do perfil: acumuladas e por período.
+
+    A memória é fixa: (periodos + 1) vetores de contagens, independentemente do volume
+    pontuado. Cada período reúne cerca de `tamanho_periodo` transações; o mais antigo é
+    descartado quando o anel se completa. Seguro para uso por várias threads.
+    """
+
+    def __init__(self, perfil, versao=None, tamanho_periodo=10_000, periodos=24):
+        self.perfil = perfil
+        self.versao = versao # Versão do modelo (registro_modelos.py) cujo perfil é usado
+        self.tamanho_periodo = tamanho_periodo
+        self.acumulado = np.zeros_like(perfil.referencia)
+        self.recentes = np.zeros((periodos, perfil.referencia.size), dtype=np.int64)
+        self.linhas_periodo = np.zeros(periodos, dtype=np.int64)
+        self.periodo = 0
+        self.linhas = 0
+        self.atualizado_em = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        del estado["_lock"]
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def de_artefatos(cls, artefatos, **kwargs):
+        """Monitor vazio com o perfil da versão de artefatos.carregar_artefatos (None se a versão não tem perfil)."""
+        perfil = artefatos["perfil_drift"]
+        return None if perfil is None else cls(perfil, artefatos.versao, **kwargs)
+
+    @classmethod
+    def carregar_ou_criar(cls, caminho, artefatos):
+        """Estado gravado em `caminho`, se for da mesma versão do modelo; senão, um monitor novo."""
+        if os.path.exists(caminho):
+            monitor = cls.carregar(caminho)
+            if monitor.versao == artefatos.versao:
+                return monitor
+        return cls.de_artefatos(artefatos)
+
+    def atualizar(self, matriz, probabilidades):
+        """Acrescenta um lote pontuado (matriz preparada e probabilidades) às contagens."""
+        contagens = self.perfil.contar(matriz, probabilidades)
+        with self._lock:
+            if self.linhas_periodo[self.periodo] >= self.tamanho_periodo:
+                self.periodo = (self.periodo + 1) % len(self.linhas_periodo)
+                self.recentes[self.periodo] = 0
+                self.linhas_periodo[self.periodo] = 0
+            self.acumulado += contagens
+            self.recentes[self.periodo] += contagens
+            self.linhas_periodo[self.periodo] += len(probabilidades)
+            self.linhas += len(probabilidades)
+            self.atualizado_em = time.time()
+
+    def contagens(self, recente=False):
+        """Contagens acumuladas ou apenas dos períodos guardados no anel (transações mais recentes)."""
+        with self._lock:
+            return self.recentes.sum(axis=0) if recente else self.acumulado.copy()
+
+    def relatorio(self, recente=False):
+        """
+        PSI, KS e situação de cada coluna em relação ao treino.
+
+        Retorna:
+        - DataFrame com coluna, psi, ks (None nas categóricas), situacao e linhas comparadas
+        """
+        atual, perfil = self.contagens(recente), self.perfil
+        linhas = []
+        for j, coluna in enumerate(perfil.colunas):
+            faixa = slice(perfil.inicios[j], perfil.inicios[j + 1])
+            psi = _psi(perfil.referencia[faixa], atual[faixa])
+            ks = None if isinstance(perfil.limites[coluna], int) else _ks(perfil.referencia[faixa], atual[faixa])
+            linhas.append({"coluna": coluna, "psi": psi, "ks": ks, "situacao": classificar_psi(psi),
+                           "linhas": int(atual[faixa].sum())})
+        return pd.DataFrame(linhas)
+
+    def distribuicoes(self, coluna, recente=False):
+        """
+        Proporção de cada faixa da coluna no treino e nas transações monitoradas.
+
+        Retorna:
+        - DataFrame com faixa (rótulo), referencia e atual
+        """
+        perfil = self.perfil
+        j = perfil.colunas.index(coluna)
+        faixa = slice(perfil.inicios[j], perfil.inicios[j + 1])
+        referencia, atual = perfil.referencia[faixa], self.contagens(recente)[faixa]
+        limites = perfil.limites[coluna]
+        if isinstance(limites, int):
+            rotulos = perfil.categorias.get(coluna) or [str(codigo) for codigo in range(limites)]
+        else:
+            bordas = np.r_[-np.inf, limites, np.inf]
+            rotulos = [f"[{inicio:.4g}, {fim:.4g})" for inicio, fim in zip(bordas[:-1], bordas[1:])]
+        return pd.DataFrame({"faixa": rotulos + ["ausente"],
+                             "referencia": referencia / max(referencia.sum(), 1),
+                             "atual": atual / max(atual.sum(), 1)})
+
+    def salvar(self, caminho=CAMINHO_MONITOR):
+        """Grava o estado (troca atômica do arquivo)."""
+        with self._lock:
+            descritor, temporario = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(caminho) or ".")
+            with os.fdopen(descritor, "wb") as arquivo:
+                dump(self, arquivo)
+        os.replace(temporario, caminho)
+
+    @staticmethod
+    def carregar(caminho=CAMINHO_MONITOR):
+        return load(caminho)
+
+    def gravar_periodicamente(self, caminho=CAMINHO_MONITOR, intervalo=30.0):
+        """Grava o estado a cada `intervalo` segundos em uma thread auxiliar (para o painel acompanhar)."""
+        def gravar():
+            while True:
+                time.sleep(intervalo)
+                self.salvar(caminho)
+        threading.Thread(target=gravar, daemon=True, name="gravacao-monitor-drift").start()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Relatório de drift de um estado do monitor.")
+    parser.add_argument("estado", nargs="?", default=CAMINHO_MONITOR)
+    parser.add_argument("--recente", action="store_true", help="Apenas os períodos mais recentes")
+    args = parser.parse_args()
+
+    monitor = MonitorDrift.carregar(args.estado)
+    print(f"Versão do modelo: {monitor.versao}  transações monitoradas: {monitor.linhas:,}")
+    print(monitor.relatorio(args.recente).to_string(index=False))
@@ -1,51 +1,66 @@
 import streamlit as st
 import pandas as pd
-from joblib import load
-import plotly.express as px
-import plotly.graph_objects as go
 from plots import (
-    calcular_metricas_fraude,
-    calcular_e_plotar_impacto,
-    plot_taxa_fraude,
-    plot_proporcao_fraudes,
-    plot_radar_metricas,
+    plot_psi_drift,
+    plot_distribuicao_drift,
     markdown
 )
+from artefatos import carregar_artefatos
+from figuras import obter, LIMIAR_PADRAO, CUSTO_PADRAO
+from diagnostico import painel_diagnostico
+from monitor_drift import MonitorDrift, CAMINHO_MONITOR
+import os
 
 # ---------------- Configuração da Página ----------------
 st.set_page_config(page_title="Relatório de Detecção de Fraudes", layout="wide")
 
 # ---------------- Carregamento da Matriz ----------------
-_, matriz = load("objects/metricas.pkl")
+artefatos = carregar_artefatos()
+varredura = artefatos["varredura_limiares"] # None em treinamentos sem as pontuações do teste
+pontuacoes = artefatos["pontuacoes_teste"]
+com_valores = pontuacoes is not None and "valores" in pontuacoes # Valor de cada transação do teste, para os intervalos
+limiar = LIMIAR_PADRAO
 
 # ---------------- Barra Lateral ----------------
 with st.sidebar:
     st.title("📈 Navegação")
     visualizacao = st.radio(
-        ":green[Selecione a visualização]", ("Métricas de Desempenho", "Impacto Financeiro", "ROI", "Proporção de Fraudes"), 
+        ":green[Selecione a visualização]", ("Métricas de Desempenho", "Impacto Financeiro", "ROI", "Proporção de Fraudes", "Drift"), 
         label_visibility="visible"
          )
+    if varredura is not None:
+        limiar = st.slider("Limiar de decisão:", min_value=0.01, max_value=0.99, value=LIMIAR_PADRAO, step=0.01,
+                           help="Probabilidade mínima para que uma transação gere alerta de fraude.")
     if visualizacao == "ROI":
-        custo_projeto = st.number_input("Custo do Projeto (R$):", min_value=1000, value=80000, step=1000)
+        custo_projeto = st.number_input("Custo do Projeto (R$):", min_value=1000, value=CUSTO_PADRAO, step=1000)
+    if visualizacao == "Drift":
+        periodo_drift = st.radio("Transações comparadas:", ("Recentes", "Acumuladas"),
+                                 help="Recentes: apenas os últimos períodos guardados pelo monitor.")
     visualizar = st.button("Visualizar", use_container_width=True,
                             help="Clique para gerar a visualização selecionada.", type='primary')
 
     st.markdown(markdown, unsafe_allow_html=True)
 
 # ---------------- Conteúdo Principal ----------------
+# As figuras vêm de figuras.obter: construídas uma vez por versão do modelo e parâmetros (as do
+# limiar e custo padrão já vêm prontas do treinamento) e compartilhadas entre as sessões
 if visualizar:
+    st.session_state["visualizacao_ativa"] = visualizacao
+
+# A visualização continua aberta enquanto o limiar (ou outro controle) é ajustado
+if st.session_state.get("visualizacao_ativa") == visualizacao:
 
     # ----------- MÉTRICAS DE DESEMPENHO -----------
     if visualizacao == "Métricas de Desempenho":        
         st.header("📊 Métricas de Desempenho do Modelo")
         progress = st.progress(50, text="Calculando Métricas de Desempenho...")
 
-        metricas = calcular_metricas_fraude(matriz)
+        metricas, fig_radar = obter(artefatos, "metricas", limiar=limiar)
 
         col1, col2, col3 = st.columns([0.55, 0.15, 0.3], border=True)
         with col1:
 
-            st.plotly_chart(plot_radar_metricas(metricas), use_container_width=True,
+            st.plotly_chart(fig_radar, use_container_width=True,
                              config={"displayModeBar": False, 'height': 700})        
         
             
@@ -78,6 +93,14 @@ if visualizar:
         ##### 7) - **F1-Score:**
          - *equilíbrio entre precisão e recall.*
         """)
+
+        if varredura is not None:
+            col1, col2 = st.columns(2, border=True)
+            with col1:
+                st.plotly_chart(obter(artefatos, "curva_pr", limiar=limiar), use_container_width=True)
+            with col2:
+                st.plotly_chart(obter(artefatos, "curva_roc", limiar=limiar), use_container_width=True)
+
         progress.progress(100, text="Cálculo Concluído!")
                 
             
@@ -87,7 +110,7 @@ if visualizar:
         st.header("💰 Impacto Financeiro da Detecção de Fraudes")
         progress = st.progress(50, text="Calculando Impacto Financeiro...")        
 
-        df_impacto, fig_impacto = calcular_e_plotar_impacto(matriz, valor_medio_emprestimo=1200, taxa_juros=0.29)
+        fig_impacto = obter(artefatos, "impacto", limiar=limiar) # Com valores: intervalos de confiança por bootstrap
 
         col1, col2 = st.columns([0.65, 0.35], border=True)
         with col1:
@@ -101,6 +124,11 @@ if visualizar:
         - **Perda por fraudes aprovadas**: prejuízo causado por fraudes que passaram.  
         - **Perda por bons reprovados**: receita perdida por clientes legítimos rejeitados.  
         - **Economia por fraudes reprovadas**: valor economizado ao bloquear fraudes corretamente.  
+        """)
+            if com_valores:
+                st.markdown("""
+        Cada transação entra com o seu próprio valor. As barras cinza mostram o **intervalo de confiança de 95%**,
+        obtido reamostrando as transações do conjunto de teste (bootstrap).
         """)
         progress.progress(100, text="Cálculo Concluído!")
             
@@ -110,29 +138,15 @@ if visualizar:
         st.header("📈 ROI da Detecção de Fraudes", divider="green")        
         progress = st.progress(50, text="Calculando ROI...")
 
-        df_impacto, _ = calcular_e_plotar_impacto(matriz, valor_medio_emprestimo=1200, taxa_juros=0.29)
-        economia = df_impacto.loc[df_impacto["Cenário"] == "Economia por fraudes reprovadas", "Valor (R$)"].values[0]                
-        retorno_liquido = economia - custo_projeto
-        roi_percentual = retorno_liquido / custo_projeto * 100
-
-        fig_waterfall = go.Figure(go.Waterfall(
-            name="ROI",
-            orientation="v",
-            measure=["relative", "relative", "total"],
-            x=["Economia com Fraudes Detectadas", "Custo do Projeto", "ROI Líquido"],
-            y=[economia, -custo_projeto, retorno_liquido],
-            connector={"line": {"color": "gray"}},
-            increasing={"marker": {"color": "#2ecc71"}},  # verde para economia
-            decreasing={"marker": {"color": "#e74c3c"}},  # vermelho para custo
-            totals={"marker": {"color": "#2ecc71"}}       # azul para ROI líquido
-        ))
-        fig_waterfall.update_layout(
-            title="💰 Retorno sobre Investimento (Waterfall)",
-            yaxis_title="Valor (R$)",
-            xaxis_title="Componentes",
-            height=400
-        )
-                    
+        resumo_roi, fig_waterfall = obter(artefatos, "roi", limiar=limiar, custo_projeto=custo_projeto)
+        economia, retorno_liquido = resumo_roi["economia"], resumo_roi["retorno_liquido"]
+        roi_percentual, bandas = resumo_roi["roi_percentual"], resumo_roi["bandas"]
+        ajuda_ic = {} # Intervalos de confiança exibidos na ajuda das métricas
+        if bandas is not None:
+            for cenario, formato in (("Retorno líquido", "R$ {:,.2f}"), ("Economia por fraudes reprovadas", "R$ {:,.2f}"),
+                                     ("ROI (%)", "{:.2f}%")):
+                ajuda_ic[cenario] = (f"IC 95%: {formato.format(bandas.loc[cenario, 'Inferior'])} a "
+                                     f"{formato.format(bandas.loc[cenario, 'Superior'])}")
 
         col1, col2 = st.columns([0.65, 0.35], border=True)
     
@@ -163,9 +177,13 @@ if visualizar:
         
             st.markdown("<hr style='border: 1px solid #2ecc71'>", unsafe_allow_html=True)            
             st.markdown("## Resumo Financeiro:")
-            st.metric("Retorno Líquido (R$)", f"{(retorno_liquido ):,.2f}")
-            st.metric("Economia Total (R$) -> Excluindo-se os custos do projeto ", f"{(economia ):,.2f}")
-            st.metric("ROI (%)", f"{roi_percentual:.2f}%")
+            st.metric("Retorno Líquido (R$)", f"{(retorno_liquido ):,.2f}", help=ajuda_ic.get("Retorno líquido"))
+            st.metric("Economia Total (R$) -> Excluindo-se os custos do projeto ", f"{(economia ):,.2f}",
+                      help=ajuda_ic.get("Economia por fraudes reprovadas"))
+            st.metric("ROI (%)", f"{roi_percentual:.2f}%", help=ajuda_ic.get("ROI (%)"))
+            if bandas is not None:
+                st.caption(f"ROI com 95% de confiança entre {bandas.loc['ROI (%)', 'Inferior']:.2f}% e "
+                           f"{bandas.loc['ROI (%)', 'Superior']:.2f}% (bootstrap das transações do teste).")
 
         progress.progress(100, text="Cálculo Concluído!")
             
@@ -193,6 +211,46 @@ if visualizar:
 
             
         with col2:
-            st.plotly_chart(plot_proporcao_fraudes(matriz), use_container_width=True)
+            st.plotly_chart(obter(artefatos, "proporcao", limiar=limiar), use_container_width=True)
+
+        progress.progress(100, text="Cálculo Concluído!")
+
+
+    # ----------- DRIFT -----------
+    if visualizacao == "Drift":
+        st.header("🌊 Drift das Características em Produção", divider="green")
+        if not os.path.exists(CAMINHO_MONITOR):
+            st.info("Nenhum estado do monitor encontrado. Pontue transações com `--monitor` "
+                    "(servidor.py, fluxo_decisoes.py ou pontuacao_lote.py) para acompanhar o drift.")
+            st.stop()
+        monitor = MonitorDrift.carregar(CAMINHO_MONITOR) # Gravado periodicamente pelos processos de pontuação
+        if monitor.versao != artefatos.versao:
+            st.warning(f"O monitor usa o perfil da versão {monitor.versao}, diferente da versão em uso ({artefatos.versao}).")
+        recente = periodo_drift == "Recentes"
+        relatorio = monitor.relatorio(recente)
+
+        col1, col2 = st.columns([0.65, 0.35], border=True)
+        with col1:
+            st.plotly_chart(plot_psi_drift(relatorio), use_container_width=True)
+        with col2:
+            st.markdown("""
+            ### ❓ O que significa?
+            Compara a distribuição de cada característica nas transações pontuadas com a do conjunto de referência
+            do treinamento, incluindo a própria pontuação do modelo (`probabilidade_fraude`).
+            - **PSI abaixo de 0,1**: distribuição estável.
+            - **PSI entre 0,1 e 0,25**: mudança moderada, vale acompanhar.
+            - **PSI acima de 0,25**: mudança significativa, considere retreinar o modelo.
+            - **KS**: maior distância entre as distribuições acumuladas (apenas nas características numéricas).
+            """)
+            st.metric("Transações monitoradas", f"{monitor.linhas:,}")
+            if monitor.atualizado_em is not None:
+                st.caption(f"Última atualização: {pd.Timestamp(monitor.atualizado_em, unit='s'):%d/%m/%Y %H:%M:%S} (UTC)")
+
+        st.dataframe(relatorio.rename(columns={"coluna": "Característica", "psi": "PSI", "ks": "KS",
+                                               "situacao": "Situação", "linhas": "Transações"}),
+                     hide_index=True, use_container_width=True)
+        coluna_drift = st.selectbox("Distribuição da característica:", monitor.perfil.colunas)
+        st.plotly_chart(plot_distribuicao_drift(monitor.distribuicoes(coluna_drift, recente), coluna_drift),
+                        use_container_width=True)
 
-        progress.progress(100, text="Cálculo Concluído!")
\ No newline at end of file
+painel_diagnostico() # Apenas com RADAR_METRICAS=1
@@ -1,9 +1,9 @@
 import streamlit as st
 import pandas as pd
-from shap import TreeExplainer
-from sklearn.model_selection import train_test_split
-from plots import colunas_traduzidas, markdown
-from joblib import load
+from plots import markdown, plot_importancia_global, plot_dependencia_shap, plot_importancia_segmentos
+from artefatos import carregar_artefatos
+from desempenho import medir
+from diagnostico import painel_diagnostico
 import plotly.graph_objects as go
 
 
@@ -11,61 +11,90 @@ import plotly.graph_objects as go
 st.set_page_config(layout="wide", page_title="Análise de Risco de Fraude em Tempo Real", page_icon="🕵️‍♂️")
 
 # --- Carregamento de objetos e dados ---
-modelo = st.session_state['modelo']
-colunas_selecionadas = st.session_state['colunas_selecionadas']
-seletor = load("objects/seletor.pkl")
-
-df = pd.read_csv('Fraud_transactions.csv')
-df.rename(columns=colunas_traduzidas, inplace=True)
-mapeamentos = {0: 'Não', 1: 'Sim'}
-df['autenticacao_3ds'] = df['autenticacao_3ds'].map(mapeamentos)
-df['promocao_usada'] = df['promocao_usada'].map(mapeamentos)
-df['resultado_cvv'] = df['resultado_cvv'].map(mapeamentos)
-df['verificacao_endereco'] = df['verificacao_endereco'].map(mapeamentos)  
-y = df['fraude']
-X_raw = df.drop(columns=['fraude', 'hora_transacao', 'id_transacao', 'id_usuario'])
-
-# Codificação das variáveis categóricas
-original_data = X_raw.copy()
-original_data = original_data[colunas_selecionadas]  # Dados originais para exibição posterior
-for coluna in X_raw.select_dtypes(include='object').columns:
-    le = load(f'objects/label_encoder_{coluna}.pkl')
-    X_raw[coluna] = le.transform(X_raw[coluna].astype(str))
-
-# Aplicar seletor de características
-X = seletor.transform(X_raw)
-_, X_test, _, y_teste = train_test_split(X, y, test_size=0.25, random_state=1432)
+artefatos = carregar_artefatos()
+visao = st.sidebar.radio("Visão:", ("Por transação", "Global"), horizontal=True)
+
+# --- Visão Global (resumo pré-calculado, ver explicabilidade.py) ---
+if visao == "Global":
+    st.header("Comportamento Global do Modelo de Fraude", divider="green")
+    globais = artefatos["explicacoes_globais"]
+    if globais is None:
+        st.warning("Explicações globais não encontradas. Execute o ModelCreation.py ou o explicabilidade.py para gerá-las.")
+    else:
+        col1, col2 = st.columns(2, border=True)
+        with col1:
+            st.plotly_chart(plot_importancia_global(globais), use_container_width=True)
+        with col2:
+            coluna = st.selectbox("Característica:", globais["colunas"],
+                                  index=int(globais["importancia"].argmax()))
+            st.plotly_chart(plot_dependencia_shap(globais, coluna), use_container_width=True)
+        if globais["segmentos"]:
+            segmento = st.radio("Segmento:", list(globais["segmentos"]), horizontal=True)
+            st.plotly_chart(plot_importancia_segmentos(globais, segmento), use_container_width=True)
+        st.markdown("""
+        ### ❓ O que significa?
+        - **Importância global**: quanto cada característica altera, em média, a previsão (vermelho: em média aumenta o risco; verde: reduz).
+        - **Dependência**: como a contribuição de uma característica varia com o seu valor, em uma amostra das transações.
+        - **Segmentos**: importância média das características dentro de cada país, canal ou categoria de comerciante.
+        """)
+    st.sidebar.markdown(markdown, unsafe_allow_html=True)
+    painel_diagnostico() # Apenas com RADAR_METRICAS=1
+    st.stop()
+
+explicabilidade = artefatos["explicabilidade_teste"] # Valores SHAP pré-calculados no ModelCreation.py
+if explicabilidade is None:
+    st.warning("Explicações pré-calculadas não encontradas. Execute o ModelCreation.py para gerá-las.")
+    st.stop()
+
+colunas_selecionadas = explicabilidade["colunas"]
+original_data = explicabilidade["dados_originais"]  # Dados originais das mesmas linhas do conjunto de teste
+y_teste = explicabilidade["y_teste"]
+indice = artefatos["indice_teste"] # Busca por id e filtros sem percorrer DataFrames (ver indice_transacoes.py)
+MAXIMO_OPCOES = 1000 # Transações listadas para escolha após os filtros
 
 
 st.header("Justificativa de Decisão do Modelo de Fraude", divider="green")    
 # --- Sidebar ---
 st.sidebar.header("Pesquisa de Transação")
-transaction_ids = list(range(len(X_test)))
-selected_id = st.sidebar.number_input("Selecione o ID da Transação:", min_value=0,
-                                      max_value=len(transaction_ids) - 1, value= 18, step=1)
+busca = st.sidebar.radio("Buscar por:", ("ID da transação", "Filtros"), horizontal=True)
+if busca == "ID da transação":
+    id_transacao = st.sidebar.number_input("Selecione o ID da Transação:", min_value=int(indice.ids.min()),
+                                           max_value=int(indice.ids.max()), value=int(indice.ids[min(18, indice.linhas - 1)]),
+                                           step=1)
+    selected_id = indice.posicao(id_transacao) # Posição da transação no conjunto de teste
+    if selected_id is None:
+        st.sidebar.warning("Transação não encontrada no conjunto de teste.")
+else:
+    categorias = {coluna: st.sidebar.multiselect(f"{coluna}:", valores) for coluna, valores in indice.categorias.items()}
+    faixas = {}
+    for faixa, rotulo in (("valor", "Valor da transação:"), ("probabilidade", "Probabilidade prevista:")):
+        limites = indice.limites(faixa)
+        if limites is not None and limites[0] < limites[1]:
+            faixas[faixa] = st.sidebar.slider(rotulo, min_value=limites[0], max_value=limites[1], value=limites)
+    situacao = st.sidebar.radio("Previsão:", ("Todas", "Corretas", "Incorretas"), horizontal=True)
+    with medir("indice.filtrar"):
+        posicoes = indice.filtrar(categorias, faixas, {"Todas": None, "Corretas": False, "Incorretas": True}[situacao])
+    st.sidebar.caption(f"{len(posicoes):,} transações encontradas" +
+                       (f" (listando as {MAXIMO_OPCOES:,} primeiras)" if len(posicoes) > MAXIMO_OPCOES else ""))
+    probabilidades = explicabilidade["probabilidades"]
+    selected_id = st.sidebar.selectbox("Transação:", posicoes[:MAXIMO_OPCOES].tolist(), index=None if not len(posicoes) else 0,
+                                       format_func=lambda p: f"ID {indice.ids[p]} (fraude: {probabilidades[p]:.1%})")
 
 
 # --- Lógica de Explicabilidade ---
-if st.sidebar.button("Analisar Transação", use_container_width=True, 
+if st.sidebar.button("Analisar Transação", use_container_width=True, disabled=selected_id is None,
                      type='primary', help="Clique para gerar a interpretação"):
     progress = st.sidebar.progress(50, "Aguarde.... Gerando Explicabilidade do Modelo")
-    transaction_data = pd.DataFrame([X_test[selected_id]], columns=colunas_selecionadas)
-    original_data_row = original_data.iloc[selected_id:selected_id+1]
-    y_true = y_teste.iloc[selected_id]
-
-
-    # Previsão
-    prediction_proba = (modelo.predict_proba(transaction_data)[:, 1][0])
-    prediction_class = modelo.predict(transaction_data)[0]
-
-    # Explicação SHAP
-    explainer = TreeExplainer(modelo)
-    shap_values_local = explainer.shap_values(transaction_data)
+    original_data_row = original_data.iloc[selected_id:selected_id+1].set_axis([indice.ids[selected_id]]) # Rótulo: id_transacao
+    y_true = y_teste[selected_id]
 
 
-    # Calcular valores SHAP
-    shap_values_local = explainer.shap_values(transaction_data)[0]  # para modelos binários
-    feature_names = transaction_data.columns.tolist()
+    # Previsão e explicação SHAP (consulta direta aos valores pré-calculados)
+    with medir("shap.consulta"):
+        prediction_proba = explicabilidade["probabilidades"][selected_id]
+        prediction_class = int(prediction_proba >= indice.limiar)
+        shap_values_local = explicabilidade["shap"][selected_id]
+    feature_names = colunas_selecionadas
 
     # Criar gráfico de barras ordenado
     shap_df = pd.DataFrame({
@@ -73,22 +102,23 @@ if st.sidebar.button("Analisar Transação", use_container_width=True,
         'shap_value': shap_values_local
     }).sort_values(by='shap_value', key=abs, ascending=False)
 
-    fig = go.Figure(go.Bar(
-        x=shap_df['shap_value'],
-        y=shap_df['feature'],
-        orientation='h',
-        marker=dict(color=['#e74c3c' if val > 0 else '#2ecc71' for val in shap_df['shap_value']], showscale=False),
-        hovertemplate='Feature: %{y}<br>SHAP Value: %{x:.4f}<extra></extra>'
-    ))
+    with medir("plotly.contribuicoes_shap"):
+        fig = go.Figure(go.Bar(
+            x=shap_df['shap_value'],
+            y=shap_df['feature'],
+            orientation='h',
+            marker=dict(color=['#e74c3c' if val > 0 else '#2ecc71' for val in shap_df['shap_value']], showscale=False),
+            hovertemplate='Feature: %{y}<br>SHAP Value: %{x:.4f}<extra></extra>'
+        ))
     
-    fig.update_layout(
-        title="Contribuição para a previsão",
-        xaxis_title="Valor da contribuição",
-        yaxis_title="Características da Transação",
-        height=500,
-        margin=dict(l=30, r=30, t=40, b=30),
-        xaxis=dict(zeroline=True, zerolinewidth=2, zerolinecolor='gray'),        
-    )
+        fig.update_layout(
+            title="Contribuição para a previsão",
+            xaxis_title="Valor da contribuição",
+            yaxis_title="Características da Transação",
+            height=500,
+            margin=dict(l=30, r=30, t=40, b=30),
+            xaxis=dict(zeroline=True, zerolinewidth=2, zerolinecolor='gray'),        
+        )
 
     progress.progress(80, "Quase lá... Finalizando a análise")
     col1, col2 = st.columns([0.65, 0.35], gap="medium", border=True)
@@ -112,7 +142,7 @@ if st.sidebar.button("Analisar Transação", use_container_width=True,
         
         # Apresentação dos resultados
         with col2:
-            st.subheader(f"Análise para Transação ID: {selected_id}")
+            st.subheader(f"Análise para Transação ID: {indice.ids[selected_id]}")
 
             if y_true ==prediction_class:
                 st.success("*A previsão do Modelo está:* **Correta**")
@@ -138,3 +168,4 @@ if st.sidebar.button("Analisar Transação", use_container_width=True,
         """)
 
 st.sidebar.markdown(markdown, unsafe_allow_html=True)
+painel_diagnostico() # Apenas com RADAR_METRICAS=1
@@ -1,9 +1,14 @@
         
+import json
+import os
+from math import exp, factorial
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from sklearn.preprocessing import LabelEncoder
 from joblib import dump
+from desempenho import medido
 
 # ------------------------ Cálculo de Métricas e Impacto -----------------------------
 
@@ -40,15 +45,107 @@ def calcular_metricas_fraude(matriz_confusao):
         "taxa_falsos_negativos": round(taxa_fn, 2)
     }
 
+def varrer_limiares(y_real, probabilidades):
+    """
+    Calcula a matriz de confusão e as métricas para todos os limiares possíveis de uma só vez.
+
+    As probabilidades são ordenadas uma única vez (O(n log n)) e as contagens saem de somas
+    cumulativas, então não é preciso chamar o modelo nem percorrer os dados a cada limiar.
+    Uma transação é alertada quando probabilidade >= limiar.
+
+    Retorna:
+    - DataFrame com uma linha por limiar distinto (em ordem decrescente) e as colunas
+      limiar, VP, FP, FN, VN, precisao, recall, taxa_fp e taxa_alerta (as três últimas de 0 a 1)
+    """
+    y_real = np.asarray(y_real, dtype=np.int64)
+    probabilidades = np.asarray(probabilidades, dtype=np.float64)
+    ordem = np.argsort(-probabilidades, kind="mergesort")
+    p, y = probabilidades[ordem], y_real[ordem]
+
+    fim_empates = np.r_[np.flatnonzero(np.diff(p)), len(p) - 1] # Último índice de cada probabilidade distinta
+    VP = np.cumsum(y)[fim_empates]
+    FP = (fim_empates + 1) - VP
+    total_fraudes, total = y.sum(), len(y)
+
+    # Primeira linha: limiar acima da maior probabilidade (nenhum alerta)
+    limiares = np.r_[np.nextafter(p[0], np.inf), p[fim_empates]]
+    VP, FP = np.r_[0, VP], np.r_[0, FP]
+    FN, VN = total_fraudes - VP, (total - total_fraudes) - FP
+    alertas = VP + FP
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return pd.DataFrame({
+            "limiar": limiares, "VP": VP, "FP": FP, "FN": FN, "VN": VN,
+            "precisao": np.where(alertas > 0, VP / alertas, 1.0),
+            "recall": VP / total_fraudes if total_fraudes > 0 else np.zeros(len(VP)),
+            "taxa_fp": FP / (total - total_fraudes) if total > total_fraudes else np.zeros(len(FP)),
+            "taxa_alerta": alertas / total,
+        })
+
+def matriz_no_limiar(varredura, limiar):
+    """
+    Matriz de confusão [[VN, FP], [FN, VP]] para um limiar qualquer, a partir de varrer_limiares.
+    Usa busca binária na varredura (a linha do menor limiar distinto >= limiar informado).
+    """
+    limiares = varredura["limiar"].to_numpy()[::-1] # Ordem crescente
+    linha = len(limiares) - 1 - min(np.searchsorted(limiares, limiar, side="left"), len(limiares) - 1)
+    VN, FP, FN, VP = varredura.loc[linha, ["VN", "FP", "FN", "VP"]].astype(int)
+    return np.array([[VN, FP], [FN, VP]])
+
+def area_sob_curva(x, y):
+    """Área sob a curva pela regra do trapézio (x em ordem crescente)"""
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    return float(np.sum(np.diff(x) * (y[1:] + y[:-1]) / 2))
+
+@medido("plotly.plot_curva_pr")
+def plot_curva_pr(varredura, limiar):
+    """Curva Precision-Recall com o ponto de operação do limiar atual destacado"""
+    matriz = matriz_no_limiar(varredura, limiar)
+    metricas = calcular_metricas_fraude(matriz)
+    area = area_sob_curva(varredura["recall"], varredura["precisao"])
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=varredura["recall"], y=varredura["precisao"], mode="lines", name="Curva PR",
+                             line=dict(color="#1ca038", width=3),
+                             customdata=varredura["limiar"],
+                             hovertemplate="Recall: %{x:.2%}<br>Precisão: %{y:.2%}<br>Limiar: %{customdata:.3f}<extra></extra>"))
+    fig.add_trace(go.Scatter(x=[metricas["recall_fraude"] / 100], y=[metricas["precisao_alerta"] / 100],
+                             mode="markers", name=f"Limiar {limiar:.2f}", marker=dict(color="#B11111", size=14)))
+    fig.update_layout(title=f"Curva Precision-Recall (AUC-PR = {area:.3f})",
+                      xaxis_title="Recall (Taxa de Fraudes Capturadas)", yaxis_title="Precisão dos Alertas",
+                      xaxis=dict(range=[0, 1.02], tickformat=".0%"), yaxis=dict(range=[0, 1.02], tickformat=".0%"))
+    return fig
+
+@medido("plotly.plot_curva_roc")
+def plot_curva_roc(varredura, limiar):
+    """Curva ROC com o ponto de operação do limiar atual destacado"""
+    matriz = matriz_no_limiar(varredura, limiar)
+    metricas = calcular_metricas_fraude(matriz)
+    area = area_sob_curva(varredura["taxa_fp"], varredura["recall"])
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=varredura["taxa_fp"], y=varredura["recall"], mode="lines", name="Curva ROC",
+                             line=dict(color="#1ca038", width=3),
+                             customdata=varredura["limiar"],
+                             hovertemplate="Falsos Positivos: %{x:.2%}<br>Recall: %{y:.2%}<br>Limiar: %{customdata:.3f}<extra></extra>"))
+    fig.add_trace(go.Scatter(x=[0, 1], y=[0, 1], mode="lines", name="Aleatório",
+                             line=dict(color="grey", dash="dash")))
+    fig.add_trace(go.Scatter(x=[metricas["taxa_falsos_positivos"] / 100], y=[metricas["recall_fraude"] / 100],
+                             mode="markers", name=f"Limiar {limiar:.2f}", marker=dict(color="#B11111", size=14)))
+    fig.update_layout(title=f"Curva ROC (AUC = {area:.3f})",
+                      xaxis_title="Taxa de Falsos Positivos", yaxis_title="Recall (Taxa de Fraudes Capturadas)",
+                      xaxis=dict(tickformat=".0%"), yaxis=dict(tickformat=".0%"))
+    return fig
+
 # --------------------------------- Impacto Financeiro ------------------------
+@medido("plotly.calcular_e_plotar_impacto")
 def calcular_e_plotar_impacto(matriz_confusao, valor_medio_emprestimo, taxa_juros):
     VN, FP = matriz_confusao[0][0], matriz_confusao[0][1]
     FN, VP = matriz_confusao[1][0], matriz_confusao[1][1]
 
     # Cálculo de valores financeiros
     ganho_bons = VN * valor_medio_emprestimo * taxa_juros
-    perda_fraudes_aprovadas = FP * valor_medio_emprestimo
-    perda_clientes_reprovados = FN * valor_medio_emprestimo * taxa_juros
+    perda_fraudes_aprovadas = FN * valor_medio_emprestimo # Fraudes não alertadas
+    perda_clientes_reprovados = FP * valor_medio_emprestimo * taxa_juros # Legítimas alertadas
     ganho_fraudes_reprovadas = VP * valor_medio_emprestimo
 
     df_impacto = pd.DataFrame({
@@ -70,7 +167,110 @@ def calcular_e_plotar_impacto(matriz_confusao, valor_medio_emprestimo, taxa_juro
 
     return df_impacto, fig
 
+_cdf_poisson = np.cumsum([exp(-1) / factorial(k) for k in range(11)]).astype(np.float32) # P(X <= k), X ~ Poisson(1)
+
+def _pesos_poisson(gerador, forma):
+    """Pesos Poisson(1) por inversão da distribuição acumulada: peso = número de limiares P(X <= k) abaixo do sorteio uniforme"""
+    uniformes = gerador.random(forma, dtype=np.float32)
+    pesos = (uniformes > _cdf_poisson[0]).astype(np.float32)
+    for limite in _cdf_poisson[1:]: # P(X > 10) ~ 1e-8, abaixo da resolução do float32
+        pesos += uniformes > limite
+    return pesos
+
+cenarios_impacto = ["Ganho com bons clientes", "Perda por fraudes aprovadas",
+                    "Perda por bons reprovados", "Economia por fraudes reprovadas"] # Mesma ordem de calcular_e_plotar_impacto
+
+def bootstrap_impacto(y_real, probabilidades, valores, limiar=0.3, taxa_juros=0.29, custo_projeto=None,
+                      reamostragens=2000, confianca=0.95, semente=1432, elementos_bloco=1 << 20):
+    """
+    Impacto financeiro com intervalos de confiança por bootstrap, ponderando cada transação pelo seu valor.
+
+    Cada transação do teste contribui para exatamente um cenário (legítima aprovada, fraude aprovada,
+    legítima reprovada ou fraude reprovada). Cada reamostragem dá a cada transação um peso de Poisson(1)
+    (bootstrap de Poisson, equivalente ao sorteio com reposição para muitas transações), e os totais de
+    um bloco inteiro de reamostragens saem de uma única multiplicação pesos (reamostragens x n) @
+    contribuições (n x 4), sem laço por reamostragem. Os blocos limitam a matriz de pesos a
+    `elementos_bloco` valores.
+
+    Parâmetros:
+    - y_real, probabilidades, valores: rótulos, probabilidades de fraude e valores das transações do teste
+    - limiar: probabilidade mínima para alertar (reprovar) a transação
+    - custo_projeto: se informado, acrescenta o retorno líquido e o ROI (%) da economia com fraudes reprovadas
+
+    Retorna:
+    - DataFrame com uma linha por cenário (ver cenarios_impacto; perdas negativas) e as colunas
+      Estimativa, Inferior e Superior (limites do intervalo de confiança)
+    """
+    y_real = np.asarray(y_real, dtype=bool)
+    valores = np.asarray(valores, dtype=np.float32)
+    alertas = np.asarray(probabilidades) >= limiar
+
+    contribuicoes = np.zeros((len(valores), 4), dtype=np.float32)
+    contribuicoes[~y_real & ~alertas, 0] = valores[~y_real & ~alertas] * taxa_juros
+    contribuicoes[y_real & ~alertas, 1] = -valores[y_real & ~alertas]
+    contribuicoes[~y_real & alertas, 2] = -valores[~y_real & alertas] * taxa_juros
+    contribuicoes[y_real & alertas, 3] = valores[y_real & alertas]
+
+    gerador = np.random.default_rng(semente)
+    totais = np.empty((reamostragens, 4))
+    bloco = max(1, elementos_bloco // max(len(valores), 1))
+    for inicio in range(0, reamostragens, bloco):
+        fim = min(inicio + bloco, reamostragens)
+        pesos = _pesos_poisson(gerador, (fim - inicio, len(valores))) # Mais rápido que gerador.poisson
+        totais[inicio:fim] = pesos @ contribuicoes
+
+    estimativas = contribuicoes.sum(axis=0, dtype=np.float64)
+    cenarios = list(cenarios_impacto)
+    if custo_projeto is not None:
+        cenarios += ["Retorno líquido", "ROI (%)"]
+        retorno = totais[:, 3] - custo_projeto
+        totais = np.column_stack([totais, retorno, retorno / custo_projeto * 100])
+        estimativas = np.r_[estimativas, estimativas[3] - custo_projeto, (estimativas[3] - custo_projeto) / custo_projeto * 100]
+    alfa = (1 - confianca) / 2
+    inferior, superior = np.quantile(totais, [alfa, 1 - alfa], axis=0)
+    return pd.DataFrame({"Cenário": cenarios, "Estimativa": estimativas, "Inferior": inferior, "Superior": superior})
+
+@medido("plotly.plot_bandas_impacto")
+def plot_bandas_impacto(df_bandas, confianca=0.95):
+    """Barras do impacto financeiro (valores reais das transações) com o intervalo de confiança do bootstrap"""
+    df_bandas = df_bandas[df_bandas["Cenário"].isin(cenarios_impacto)]
+    fig = go.Figure(go.Bar(
+        x=df_bandas["Cenário"], y=df_bandas["Estimativa"],
+        marker_color=["#186826" if valor > 0 else "#B11111" for valor in df_bandas["Estimativa"]],
+        error_y=dict(type="data", symmetric=False, array=df_bandas["Superior"] - df_bandas["Estimativa"],
+                     arrayminus=df_bandas["Estimativa"] - df_bandas["Inferior"], color="grey", thickness=2, width=12),
+        customdata=df_bandas[["Inferior", "Superior"]],
+        texttemplate="R$ %{y:,.2f}", textposition="auto",
+        hovertemplate="%{x}<br>R$ %{y:,.2f}<br>IC: R$ %{customdata[0]:,.2f} a R$ %{customdata[1]:,.2f}<extra></extra>"
+    ))
+    fig.update_layout(title=f"💰 Impacto Financeiro do Modelo (intervalo de confiança de {confianca:.0%})",
+                      yaxis_title="Valor (R$)", yaxis_zeroline=True, yaxis_zerolinecolor='grey', yaxis_zerolinewidth=1)
+    return fig
+
+@medido("plotly.waterfall_roi")
+def plot_waterfall_roi(economia, custo_projeto):
+    """Fluxo da economia com fraudes detectadas, menos o custo do projeto, até o ROI líquido"""
+    fig = go.Figure(go.Waterfall(
+        name="ROI",
+        orientation="v",
+        measure=["relative", "relative", "total"],
+        x=["Economia com Fraudes Detectadas", "Custo do Projeto", "ROI Líquido"],
+        y=[economia, -custo_projeto, economia - custo_projeto],
+        connector={"line": {"color": "gray"}},
+        increasing={"marker": {"color": "#2ecc71"}},  # verde para economia
+        decreasing={"marker": {"color": "#e74c3c"}},  # vermelho para custo
+        totals={"marker": {"color": "#2ecc71"}}       # azul para ROI líquido
+    ))
+    fig.update_layout(
+        title="💰 Retorno sobre Investimento (Waterfall)",
+        yaxis_title="Valor (R$)",
+        xaxis_title="Componentes",
+        height=400
+    )
+    return fig
+
 # ----------------------- Comparação de Fraudes -----------------------
+@medido("plotly.plot_taxa_fraude")
 def plot_taxa_fraude(fraude_sem_modelo, fraude_com_modelo):
     """
     Gera gráfico de barras comparando a taxa de fraudes detectadas com e sem o uso do modelo.
@@ -87,6 +287,7 @@ def plot_taxa_fraude(fraude_sem_modelo, fraude_com_modelo):
     return fig
 
 # ----------------------- Gráficos adicionais -----------------------
+@medido("plotly.plot_proporcao_fraudes")
 def plot_proporcao_fraudes(matriz_confusao):
     """Pizza mostrando proporção de fraudes detectadas vs não detectadas"""
     FN, VP = matriz_confusao[1]
@@ -105,6 +306,7 @@ def plot_proporcao_fraudes(matriz_confusao):
     
     return fig
 
+@medido("plotly.plot_radar_metricas")
 def plot_radar_metricas(metricas):
     """Radar chart para comparar métricas de desempenho"""
     categorias = list(metricas.keys())
@@ -126,6 +328,84 @@ def plot_radar_metricas(metricas):
     return fig
 
 
+# ------------------------ Explicabilidade Global (ver explicabilidade.py) -----------------------------
+
+@medido("plotly.plot_importancia_global")
+def plot_importancia_global(globais):
+    """Importância média (|SHAP|) de cada característica, com a direção média da contribuição na cor"""
+    ordem = np.argsort(globais["importancia"])
+    contribuicao = globais["contribuicao_media"][ordem]
+    fig = go.Figure(go.Bar(
+        x=globais["importancia"][ordem], y=np.array(globais["colunas"])[ordem], orientation='h',
+        marker=dict(color=['#e74c3c' if valor > 0 else '#2ecc71' for valor in contribuicao]),
+        customdata=contribuicao,
+        hovertemplate='%{y}<br>Média |SHAP|: %{x:.4f}<br>Média SHAP: %{customdata:.4f}<extra></extra>'
+    ))
+    fig.update_layout(title=f"Importância global ({globais['linhas']:,} transações)",
+                      xaxis_title="Média do |valor SHAP|", yaxis_title="Características da Transação", height=500)
+    return fig
+
+
+@medido("plotly.plot_dependencia_shap")
+def plot_dependencia_shap(globais, coluna):
+    """Valor original da característica x contribuição SHAP, na amostra guardada pelo resumo global"""
+    valores = globais["dependencia"]["valores"][coluna]
+    shap_coluna = globais["dependencia"]["shap"][:, globais["colunas"].index(coluna)]
+    fig = go.Figure(go.Scatter(
+        x=valores, y=shap_coluna, mode="markers",
+        marker=dict(color=shap_coluna, colorscale=[[0, '#2ecc71'], [0.5, '#f1c40f'], [1, '#e74c3c']], cmid=0, size=6, opacity=0.6),
+        hovertemplate=f'{coluna}: %{{x}}<br>SHAP: %{{y:.4f}}<extra></extra>'
+    ))
+    fig.add_hline(y=0, line_color="gray", line_dash="dash")
+    fig.update_layout(title=f"Dependência: {coluna}", xaxis_title=coluna, yaxis_title="Valor SHAP", height=500)
+    return fig
+
+
+@medido("plotly.plot_importancia_segmentos")
+def plot_importancia_segmentos(globais, segmento, maximo_categorias=15):
+    """Mapa de calor da importância média de cada característica nas categorias mais frequentes do segmento"""
+    resumo = globais["segmentos"][segmento]
+    ordem = np.argsort(resumo["contagens"])[::-1][:maximo_categorias]
+    categorias = [f"{resumo['categorias'][i]} ({resumo['contagens'][i]:,})" for i in ordem]
+    fig = go.Figure(go.Heatmap(
+        z=resumo["importancia"][ordem], x=globais["colunas"], y=categorias, colorscale="Greens",
+        hovertemplate='%{y}<br>%{x}<br>Média |SHAP|: %{z:.4f}<extra></extra>'
+    ))
+    fig.update_layout(title=f"Importância por {segmento}", yaxis=dict(autorange="reversed"),
+                      height=max(400, 30 * len(categorias) + 150))
+    return fig
+
+
+# ------------------------ Drift das Características (ver monitor_drift.py) -----------------------------
+
+@medido("plotly.plot_psi_drift")
+def plot_psi_drift(relatorio, limites=(0.1, 0.25)):
+    """PSI de cada coluna em relação ao treino, com as faixas de estável / moderado / significativo"""
+    relatorio = relatorio.dropna(subset=["psi"]).sort_values("psi")
+    cores = ['#2ecc71' if psi < limites[0] else '#f1c40f' if psi < limites[1] else '#e74c3c' for psi in relatorio["psi"]]
+    fig = go.Figure(go.Bar(
+        x=relatorio["psi"], y=relatorio["coluna"], orientation='h', marker=dict(color=cores),
+        customdata=relatorio["situacao"], hovertemplate='%{y}<br>PSI: %{x:.4f}<br>%{customdata}<extra></extra>'
+    ))
+    for limite in limites:
+        fig.add_vline(x=limite, line_color="gray", line_dash="dash")
+    fig.update_layout(title="Índice de estabilidade (PSI) por característica", xaxis_title="PSI",
+                      yaxis_title="Características da Transação", height=500)
+    return fig
+
+
+@medido("plotly.plot_distribuicao_drift")
+def plot_distribuicao_drift(distribuicoes, coluna):
+    """Proporção de cada faixa da coluna no treino e nas transações monitoradas"""
+    fig = go.Figure([
+        go.Bar(name="Treino", x=distribuicoes["faixa"], y=distribuicoes["referencia"] * 100, marker_color='#95a5a6'),
+        go.Bar(name="Monitorado", x=distribuicoes["faixa"], y=distribuicoes["atual"] * 100, marker_color='#3498db'),
+    ])
+    fig.update_layout(barmode="group", title=f"Distribuição: {coluna}", xaxis_title="Faixa",
+                      yaxis_title="Transações (%)", height=450)
+    return fig
+
+
 
 
 
@@ -150,6 +430,63 @@ def preprocessar_colunas_categoricas(X_treino, X_teste, colunas_categoricas):
     
     return X_treino, X_teste
 
+def traduzir_dataset(dataset):
+    """
+    Renomeia as colunas para o português e converte as colunas binárias (0/1) em 'Não'/'Sim'.
+    A alteração é feita no próprio DataFrame, que também é retornado.
+    """
+    dataset.rename(columns=colunas_traduzidas, inplace=True)
+    for coluna in colunas_binarias:
+        if coluna in dataset.columns:
+            dataset[coluna] = dataset[coluna].map(mapeamentos)
+    return dataset
+
+def gerar_metadados_formulario(dataset, colunas):
+    """
+    Resume as colunas usadas no formulário de avaliação, para que a aplicação não precise ler o CSV.
+
+    Parâmetros:
+    - dataset: DataFrame já traduzido (ver traduzir_dataset), antes da codificação
+    - colunas: colunas que compõem o formulário (colunas_selecionadas)
+
+    Retorna:
+    - Dicionário coluna -> {tipo, valores} para categóricas ou {tipo, mediana, minimo, maximo} para numéricas
+    """
+    metadados = {}
+    for coluna in colunas:
+        serie = dataset[coluna]
+        if serie.dtype == 'object':
+            metadados[coluna] = {"tipo": "categorica", "valores": serie.dropna().unique().tolist()}
+        else:
+            conversor = float if serie.dtype.kind == 'f' else int # Mantém o tipo esperado pelo st.number_input
+            metadados[coluna] = {"tipo": "numerica", "mediana": conversor(serie.median()),
+                                 "minimo": conversor(serie.min()), "maximo": conversor(serie.max())}
+    return metadados
+
+# Mediana e faixa das colunas numéricas no Fraud_transactions.csv (resumo estatístico do notebook),
+# usadas no formulário quando o treinamento não gerou metadados_formulario.pkl
+faixas_formulario_padrao = {
+    'idade_conta_dias': {"mediana": 975, "minimo": 1, "maximo": 1890},
+    'total_transacoes_usuario': {"mediana": 51, "minimo": 40, "maximo": 60},
+    'valor_medio_usuario': {"mediana": 90.13, "minimo": 3.52, "maximo": 4565.29},
+    'valor': {"mediana": 89.99, "minimo": 1.0, "maximo": 16994.74},
+    'distancia_envio_km': {"mediana": 273.02, "minimo": 0.0, "maximo": 3748.56},
+}
+
+def metadados_de_encoders(encoders, colunas):
+    """
+    Metadados do formulário sem o CSV: categorias dos LabelEncoders salvos (classes_) e, nas
+    numéricas, as faixas fixas de faixas_formulario_padrao (mesmo formato de gerar_metadados_formulario).
+    """
+    metadados = {}
+    for coluna in colunas:
+        if coluna in encoders:
+            metadados[coluna] = {"tipo": "categorica", "valores": [str(classe) for classe in encoders[coluna].classes_]}
+        else: # Colunas sem faixa conhecida (ex.: velocidade) começam em zero
+            metadados[coluna] = dict({"mediana": 0.0, "minimo": 0.0, "maximo": 0.0},
+                                     **faixas_formulario_padrao.get(coluna, {}), tipo="numerica")
+    return metadados
+
 colunas_traduzidas = {
     'transaction_id': 'id_transacao',
     'user_id': 'id_usuario',
@@ -175,10 +512,20 @@ colunas_traduzidas = {
     'is_weekend': 'fim_de_semana'
 } # Dicionário para renomear colunas do dataset
 
+mapeamentos = {0: 'Não', 1: 'Sim'} # Mapeamento das colunas binárias
+colunas_binarias = ['autenticacao_3ds', 'promocao_usada', 'resultado_cvv', 'verificacao_endereco']
+
 melhores_parametros = {'boosting_type': 'dart',  'colsample_bytree': 0.7282628285096816, 'learning_rate': 0.2, 'max_depth': 14,
                         'min_child_samples':  74, 'n_estimators': 486, 'num_leaves': 20, 'reg_alpha': 1.948983261569964, 'reg_lambda': 10.0, 
                         'scale_pos_weight': 1.2097547688535297, 'subsample': 0.5} # Melhores parâmetros obtidos via Bayesian Optimization
 
+def carregar_melhores_parametros(caminho="objects/melhores_parametros.json"):
+    """Parâmetros gravados pela última busca (busca_hiperparametros.py) ou, se não houver, os melhores_parametros acima."""
+    if not os.path.exists(caminho):
+        return dict(melhores_parametros)
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)["parametros"]
+
 markdown =  """
         <style>
         .footer {
@@ -0,0 +1,69 @@
+import numpy as np
+from desempenho import medido
+
+LIMIAR_FRAUDE = 0.5 # Probabilidade a partir da qual a transação é tratada como fraude
+LIMIAR_SUSPEITA = 0.3 # Probabilidade a partir da qual a transação é tratada como suspeita
+LINHAS_CAMINHO_RAPIDO = 8 # Até este tamanho de lote as árvores em NumPy são mais rápidas que o predict_proba
+
+
+def preparar_matriz(dados, artefatos):
+    """
+    Converte transações na matriz usada pelo modelo (ver preprocessamento.PreProcessador).
+
+    Parâmetros:
+    - dados: DataFrame, uma transação (dicionário) ou lista de transações, com os nomes das
+      colunas traduzidos ou originais
+    - artefatos: mapeamento retornado por artefatos.carregar_artefatos
+
+    Retorna:
+    - Array float64 com as colunas selecionadas, na ordem do treinamento, já codificadas
+    """
+    return artefatos["preprocessador"].transformar(dados)
+
+
+def enriquecer_transacoes(transacoes, armazem=None, velocidade=None):
+    """
+    Acrescenta às transações os campos calculados a partir do histórico e as registra nele.
+
+    Parâmetros:
+    - armazem: armazem_usuarios.ArmazemUsuarios (agregados por usuário) ou None
+    - velocidade: velocidade.MotorVelocidade (características de velocidade) ou None
+
+    Retorna:
+    - As próprias transações, se não houver armazém nem motor; senão, um DataFrame enriquecido
+    """
+    if armazem is None and velocidade is None:
+        return transacoes
+    dados = transacoes
+    if armazem is not None:
+        dados = armazem.enriquecer(dados)
+    if velocidade is not None:
+        dados = velocidade.enriquecer(dados) # Valida as entradas antes de alterar o estado
+    if armazem is not None:
+        armazem.registrar_transacoes(dados)
+    return dados
+
+
+@medido("predict_proba")
+def prever_probabilidades(matriz, artefatos):
+    """
+    Probabilidade de fraude para cada linha da matriz já preparada.
+
+    Lotes pequenos (como a avaliação de uma única transação) usam a floresta compilada em
+    NumPy, que evita o custo fixo do wrapper do scikit-learn; lotes maiores usam o LightGBM.
+    """
+    matriz = np.asarray(matriz, dtype=np.float64)
+    if matriz.shape[0] <= LINHAS_CAMINHO_RAPIDO and artefatos.get("floresta") is not None:
+        return artefatos["floresta"].probabilidade(matriz)
+    return artefatos["modelo"].predict_proba(matriz)[:, 1]
+
+
+def classificar_faixas(probabilidades):
+    """
+    Classifica probabilidades de fraude (0 a 1) nas faixas Fraude, Suspeita e Legítima.
+    Aceita um escalar ou um array e retorna o mesmo formato.
+    """
+    probabilidades = np.asarray(probabilidades)
+    faixas = np.select([probabilidades >= LIMIAR_FRAUDE, probabilidades >= LIMIAR_SUSPEITA],
+                       ["Fraude", "Suspeita"], default="Legítima")
+    return faixas.item() if faixas.ndim == 0 else faixas
@@ -0,0 +1,96 @@
+"""
+Pontuação em lote de arquivos CSV de transações, processados em blocos de tamanho fixo.
+
+Uso:
+    python pontuacao_lote.py transacoes.csv pontuacoes.csv --tamanho-bloco 200000
+"""
+import argparse
+import time
+import pandas as pd
+from armazem_usuarios import ArmazemUsuarios, colunas_usuario
+from artefatos import carregar_artefatos, DIRETORIO_OBJETOS
+from dados import ler_colunas
+from monitor_drift import MonitorDrift
+from pontuacao import preparar_matriz, prever_probabilidades, classificar_faixas
+from velocidade import colunas_entrada, colunas_velocidade, MotorVelocidade
+
+
+def pontuar_arquivo(caminho_entrada, caminho_saida, tamanho_bloco=200_000, diretorio=DIRETORIO_OBJETOS, armazem=None,
+                    velocidade=None, monitor=None):
+    """
+    Lê o CSV em blocos, pontua cada bloco com uma única chamada a predict_proba e grava o resultado.
+
+    Apenas as colunas usadas pelo modelo (e o id da transação, se existir) são lidas (ver dados.ler_colunas),
+    de modo que a memória depende do tamanho do bloco e não do tamanho do arquivo.
+
+    Com um `armazem` (armazem_usuarios.ArmazemUsuarios) e/ou um motor de `velocidade`
+    (velocidade.MotorVelocidade), os campos ausentes no arquivo são calculados a partir do
+    histórico, e cada bloco pontuado passa a fazer parte dele. Com um `monitor`
+    (monitor_drift.MonitorDrift), cada bloco entra nas contagens de drift.
+
+    Retorna:
+    - Tupla (total de linhas pontuadas, segundos decorridos)
+    """
+    artefatos = carregar_artefatos(diretorio)
+
+    colunas, incluir = artefatos["colunas_selecionadas"], ("id_transacao",)
+    calculadas = (colunas_usuario if armazem is not None else []) + (colunas_velocidade if velocidade is not None else [])
+    if calculadas: # Campos calculados a partir do histórico passam a ser opcionais no arquivo
+        incluir += tuple(coluna for coluna in calculadas if coluna in colunas) + tuple(colunas_entrada)
+        colunas = [coluna for coluna in colunas if coluna not in calculadas]
+    blocos = ler_colunas(caminho_entrada, colunas, incluir=incluir, tamanho_bloco=tamanho_bloco)
+
+    total, inicio = 0, time.perf_counter()
+    for i, bloco in enumerate(blocos):
+        if armazem is not None:
+            bloco = armazem.enriquecer(bloco)
+        if velocidade is not None:
+            bloco = velocidade.enriquecer(bloco)
+        matriz = preparar_matriz(bloco, artefatos)
+        probabilidades = prever_probabilidades(matriz, artefatos)
+        if monitor is not None:
+            monitor.atualizar(matriz, probabilidades)
+        if armazem is not None:
+            armazem.registrar_transacoes(bloco)
+
+        saida = pd.DataFrame({"probabilidade_fraude": probabilidades.round(6),
+                              "faixa": classificar_faixas(probabilidades)})
+        if "id_transacao" in bloco.columns:
+            saida.insert(0, "id_transacao", bloco["id_transacao"].to_numpy())
+        saida.to_csv(caminho_saida, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+
+        total += len(bloco)
+        decorrido = time.perf_counter() - inicio
+        print(f"Bloco {i + 1}: {total:,} linhas pontuadas ({total / decorrido:,.0f} linhas/s)")
+
+    return total, time.perf_counter() - inicio
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pontuação em lote de transações com o modelo de fraude.")
+    parser.add_argument("entrada", help="CSV de transações com as colunas originais (em inglês)")
+    parser.add_argument("saida", help="CSV de saída com probabilidade e faixa de risco por linha")
+    parser.add_argument("--tamanho-bloco", type=int, default=200_000, help="Linhas lidas e pontuadas por vez")
+    parser.add_argument("--objetos", default=DIRETORIO_OBJETOS, help="Diretório dos artefatos do modelo")
+    parser.add_argument("--armazem", default=None,
+                        help="Snapshot do armazém de usuários (armazem_usuarios.py) para calcular os agregados por usuário")
+    parser.add_argument("--velocidade", default=None,
+                        help="Estado do motor de velocidade (velocidade.py) para calcular as características de velocidade")
+    parser.add_argument("--salvar-estado", action="store_true", help="Grava o armazém e o motor de velocidade atualizados ao final")
+    parser.add_argument("--monitor", default=None,
+                        help="Estado do monitor de drift (monitor_drift.py); criado se não existir e gravado ao final")
+    args = parser.parse_args()
+
+    armazem = ArmazemUsuarios.carregar(args.armazem) if args.armazem else None
+    velocidade = MotorVelocidade.carregar(args.velocidade) if args.velocidade else None
+    monitor = MonitorDrift.carregar_ou_criar(args.monitor, carregar_artefatos(args.objetos)) if args.monitor else None
+    total, segundos = pontuar_arquivo(args.entrada, args.saida, args.tamanho_bloco, args.objetos, armazem, velocidade,
+                                      monitor)
+    if monitor is not None:
+        monitor.salvar(args.monitor)
+    if args.salvar_estado:
+        if armazem is not None:
+            armazem.salvar(args.armazem)
+        if velocidade is not None:
+            velocidade.salvar(args.velocidade)
+    print(f"Concluído: {total:,} linhas em {segundos:.1f}s ({total / max(segundos, 1e-9):,.0f} linhas/s)")
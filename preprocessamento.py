@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+from joblib import dump, load
+from desempenho import medido
+from plots import colunas_binarias, colunas_traduzidas, mapeamentos
+
+CODIGO_DESCONHECIDO = np.nan # Categoria não vista no treinamento: valor ausente para o LightGBM
+LINHAS_FATORAR = 256 # Acima disso as categóricas são codificadas pelos valores distintos (pd.factorize)
+
+
+class PreProcessador:
+    """
+    Conversão completa de transações brutas para a matriz do modelo: tradução dos nomes,
+    mapeamento das colunas binárias, codificação das categóricas e seleção das colunas.
+
+    Substitui os LabelEncoders (um arquivo por coluna), o seletor e o traduzir_dataset na
+    pontuação. As categorias são codificadas por busca binária nas classes ordenadas (o mesmo
+    código do LabelEncoder), e valores desconhecidos recebem CODIGO_DESCONHECIDO em vez de erro.
+    """
+
+    def __init__(self, colunas, classes):
+        self.colunas = list(colunas) # Colunas do modelo (em português), na ordem do treinamento
+        self.classes = {coluna: np.asarray(valores, dtype=str) for coluna, valores in classes.items()}
+        self.nomes_originais = {coluna: original for original, coluna in colunas_traduzidas.items()
+                                if coluna in self.colunas} # Nome no CSV original (em inglês)
+
+    @classmethod
+    def de_dataset(cls, dataset, colunas):
+        """Ajusta a partir do cache codificado (dados.DatasetCodificado), com as mesmas classes do treinamento."""
+        return cls(colunas, {coluna: dataset.categorias[coluna] for coluna in colunas if coluna in dataset.categorias})
+
+    @classmethod
+    def de_encoders(cls, encoders, colunas):
+        """Monta a partir dos LabelEncoders salvos por treinamentos antigos."""
+        return cls(colunas, {coluna: encoders[coluna].classes_ for coluna in colunas if coluna in encoders})
+
+    def salvar(self, caminho):
+        dump(self, caminho)
+
+    @staticmethod
+    def carregar(caminho):
+        return load(caminho)
+
+    def _valores(self, dados, coluna):
+        """Valores da coluna em um array, aceitando o nome em português ou o original."""
+        for nome in (coluna, self.nomes_originais.get(coluna)):
+            if isinstance(dados, pd.DataFrame):
+                if nome in dados.columns:
+                    return dados[nome].to_numpy()
+            elif nome in dados[0]:
+                return np.array([transacao[nome] for transacao in dados])
+        raise ValueError(f"Coluna ausente: {coluna}")
+
+    @medido("preprocessamento")
+    def transformar(self, dados):
+        """
+        Matriz float64 (linhas x colunas do modelo) pronta para o modelo, em uma única passada.
+
+        Parâmetros:
+        - dados: DataFrame, uma transação (dicionário) ou lista de transações, com os nomes
+          traduzidos ou os originais; as colunas binárias podem vir como 0/1 ou 'Não'/'Sim'
+        """
+        if isinstance(dados, dict):
+            dados = [dados]
+        matriz = np.empty((len(dados), len(self.colunas)), dtype=np.float64)
+        if len(dados) == 0:
+            return matriz
+        for j, coluna in enumerate(self.colunas):
+            valores = self._valores(dados, coluna)
+            classes = self.classes.get(coluna)
+            if classes is None:
+                matriz[:, j] = valores
+                continue
+            if coluna in colunas_binarias and valores.dtype.kind in "biuf": # 0/1 como no CSV original
+                valores = np.where(valores == 1, mapeamentos[1], np.where(valores == 0, mapeamentos[0], ""))
+            if len(valores) > LINHAS_FATORAR: # Busca só os valores distintos; ausentes (código -1) viram 'nan'
+                codigos, distintos = pd.factorize(valores)
+                matriz[:, j] = self._codificar(classes, np.append(np.asarray(distintos).astype(str), "nan"))[codigos]
+            else:
+                matriz[:, j] = self._codificar(classes, np.where(pd.isna(valores), "nan", valores.astype(str)))
+        return matriz
+
+    @staticmethod
+    def _codificar(classes, valores):
+        """Código de cada valor (posição nas classes ordenadas, como no LabelEncoder) ou CODIGO_DESCONHECIDO."""
+        posicoes = np.minimum(np.searchsorted(classes, valores), len(classes) - 1)
+        return np.where(classes[posicoes] == valores, posicoes, CODIGO_DESCONHECIDO)
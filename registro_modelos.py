@@ -0,0 +1,213 @@
+"""
+Registro de versões do modelo: cada treinamento (ou retreino) vira um diretório imutável em
+objects/versoes/<versão>/ com todos os artefatos juntos (modelo, seletor, encoders, colunas
+selecionadas, métricas...) e um manifesto com o hash de cada arquivo. O arquivo objects/ATUAL
+aponta para a versão em uso e é trocado de forma atômica, então um processo lendo os artefatos
+nunca mistura arquivos de dois treinamentos. Sem o ponteiro, o objects/ antigo (arquivos soltos)
+continua sendo usado.
+
+Uso:
+    python registro_modelos.py --listar
+    python registro_modelos.py --migrar            # Publica os arquivos soltos de objects/ como uma versão
+    python registro_modelos.py --ativar <versão>   # Volta (ou avança) o ponteiro para outra versão
+    python registro_modelos.py --verificar <versão>
+    python registro_modelos.py --podar 5           # Remove as versões antigas, mantendo as 5 mais recentes
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+from datetime import datetime
+from joblib import dump
+from arvores_numpy import FlorestaNumpy
+from dados import calcular_hash
+
+DIRETORIO_VERSOES = "versoes" # Dentro do diretório de objetos
+ARQUIVO_PONTEIRO = "ATUAL"
+ARQUIVO_MANIFESTO = "manifesto.json"
+
+
+class VersaoCorrompida(ValueError):
+    """Um arquivo da versão não confere com o hash gravado no manifesto."""
+
+
+def gravar_objeto(objeto, arquivo):
+    """Grava um artefato em um arquivo aberto (FlorestaNumpy em .npz; o resto com joblib)."""
+    if isinstance(objeto, FlorestaNumpy):
+        objeto.salvar(arquivo)
+    else:
+        dump(objeto, arquivo)
+
+
+def _gravar_atomico(caminho, texto):
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(caminho) or ".",
+                                     suffix=".tmp", delete=False) as arquivo:
+        arquivo.write(texto)
+    os.replace(arquivo.name, caminho)
+
+
+def versao_atual(raiz):
+    """Nome da versão apontada por raiz/ATUAL (None se o registro ainda não é usado em `raiz`)."""
+    try:
+        with open(os.path.join(raiz, ARQUIVO_PONTEIRO), encoding="utf-8") as arquivo:
+            return arquivo.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def diretorio_versao(raiz, versao):
+    return os.path.join(raiz, DIRETORIO_VERSOES, versao)
+
+
+def diretorio_ativo(raiz):
+    """Diretório com os artefatos em uso: o da versão atual ou, sem registro, a própria `raiz`."""
+    versao = versao_atual(raiz)
+    return raiz if versao is None else diretorio_versao(raiz, versao)
+
+
+def ler_manifesto(raiz, versao):
+    with open(os.path.join(diretorio_versao(raiz, versao), ARQUIVO_MANIFESTO), encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def verificar_versao(raiz, versao):
+    """Confere o hash de cada arquivo da versão com o manifesto (VersaoCorrompida se algum divergir)."""
+    diretorio = diretorio_versao(raiz, versao)
+    for nome, esperado in ler_manifesto(raiz, versao)["arquivos"].items():
+        caminho = os.path.join(diretorio, nome)
+        if not os.path.exists(caminho) or calcular_hash(caminho) != esperado:
+            raise VersaoCorrompida(f"Arquivo {nome} da versão {versao} ausente ou alterado")
+
+
+def ativar_versao(raiz, versao):
+    """Aponta raiz/ATUAL para `versao` (troca atômica; processos em execução passam a usá-la)."""
+    if not os.path.exists(os.path.join(diretorio_versao(raiz, versao), ARQUIVO_MANIFESTO)):
+        raise FileNotFoundError(f"Versão {versao} não encontrada em {os.path.join(raiz, DIRETORIO_VERSOES)}")
+    _gravar_atomico(os.path.join(raiz, ARQUIVO_PONTEIRO), versao + "\n")
+
+
+def publicar_versao(objetos, raiz, base=None, arquivos=(), ativar=True, descricao=""):
+    """
+    Grava uma nova versão imutável e, por padrão, aponta ATUAL para ela.
+
+    A versão é montada em um diretório temporário dentro de objects/versoes/ e só recebe o nome
+    definitivo (os.rename atômico) depois de todos os arquivos e do manifesto estarem gravados;
+    os arquivos ficam somente leitura.
+
+    Parâmetros:
+    - objetos: dicionário nome do arquivo -> objeto a gravar
+    - base: versão da qual os demais arquivos são herdados (ligações físicas, sem cópia), como no retreino
+    - arquivos: caminhos de arquivos já gravados a incluir na versão (copiados com o mesmo nome)
+    - descricao: texto livre guardado no manifesto
+
+    Retorna:
+    - Nome da versão publicada
+    """
+    pasta_versoes = os.path.join(raiz, DIRETORIO_VERSOES)
+    os.makedirs(pasta_versoes, exist_ok=True)
+    temporario = tempfile.mkdtemp(prefix=".nova-", dir=pasta_versoes)
+    try:
+        for nome, objeto in objetos.items():
+            with open(os.path.join(temporario, nome), "wb") as arquivo:
+                gravar_objeto(objeto, arquivo)
+        for caminho in arquivos:
+            shutil.copyfile(caminho, os.path.join(temporario, os.path.basename(caminho)))
+        if base is not None:
+            origem = diretorio_versao(raiz, base)
+            for nome in ler_manifesto(raiz, base)["arquivos"]:
+                if not os.path.exists(os.path.join(temporario, nome)):
+                    try:
+                        os.link(os.path.join(origem, nome), os.path.join(temporario, nome))
+                    except OSError: # Sistema de arquivos sem ligações físicas
+                        shutil.copyfile(os.path.join(origem, nome), os.path.join(temporario, nome))
+
+        hashes = {nome: calcular_hash(os.path.join(temporario, nome)) for nome in sorted(os.listdir(temporario))}
+        criada_em = datetime.now()
+        versao = f"{criada_em:%Y%m%d-%H%M%S}-{hashlib.sha256(json.dumps(hashes, sort_keys=True).encode()).hexdigest()[:8]}"
+        manifesto = {"versao": versao, "criada_em": criada_em.isoformat(timespec="microseconds"), "base": base,
+                     "descricao": descricao, "arquivos": hashes}
+        with open(os.path.join(temporario, ARQUIVO_MANIFESTO), "w", encoding="utf-8") as arquivo:
+            json.dump(manifesto, arquivo, ensure_ascii=False, indent=2)
+        for nome in os.listdir(temporario):
+            os.chmod(os.path.join(temporario, nome), stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        os.chmod(temporario, stat.S_IRWXU | stat.S_IRGRP | stat.S_IXGRP | stat.S_IROTH | stat.S_IXOTH) # mkdtemp cria com 0700
+        os.rename(temporario, diretorio_versao(raiz, versao))
+    except BaseException:
+        shutil.rmtree(temporario, ignore_errors=True)
+        raise
+    if ativar:
+        ativar_versao(raiz, versao)
+    return versao
+
+
+def listar_versoes(raiz):
+    """Manifestos de todas as versões publicadas, da mais antiga para a mais recente."""
+    pasta_versoes = os.path.join(raiz, DIRETORIO_VERSOES)
+    if not os.path.isdir(pasta_versoes):
+        return []
+    versoes = [nome for nome in os.listdir(pasta_versoes)
+               if not nome.startswith(".") and os.path.exists(os.path.join(pasta_versoes, nome, ARQUIVO_MANIFESTO))]
+    # Pela data de criação: no mesmo segundo, o nome da versão só difere pelo hash
+    return sorted((ler_manifesto(raiz, versao) for versao in versoes),
+                  key=lambda manifesto: (manifesto["criada_em"], manifesto["versao"]))
+
+
+def podar_versoes(raiz, manter=5):
+    """Remove as versões mais antigas, mantendo as `manter` mais recentes e sempre a atual. Retorna as removidas."""
+    atual = versao_atual(raiz)
+    antigas = [manifesto["versao"] for manifesto in listar_versoes(raiz)][:-manter or None]
+    removidas = [versao for versao in antigas if versao != atual]
+    for versao in removidas:
+        diretorio = diretorio_versao(raiz, versao)
+        # Basta poder escrever no diretório para remover as entradas; os arquivos não são tocados, pois
+        # podem ser hard links compartilhados com versões mantidas (que continuariam graváveis)
+        os.chmod(diretorio, stat.S_IRWXU)
+        shutil.rmtree(diretorio)
+    return removidas
+
+
+def migrar_objetos_soltos(raiz, objetos=None, descricao="migração dos arquivos soltos"):
+    """
+    Publica como primeira versão os artefatos soltos de `raiz` (formato anterior ao registro).
+
+    Os `objetos` informados entram na mesma versão, no lugar dos arquivos soltos de mesmo nome.
+    """
+    objetos = objetos or {}
+    arquivos = [os.path.join(raiz, nome) for nome in sorted(os.listdir(raiz))
+                if os.path.isfile(os.path.join(raiz, nome)) and nome.endswith((".pkl", ".npz"))
+                and nome != "velocidade.pkl" # Estado do motor de velocidade, atualizado pelos servidores
+                and nome not in objetos]
+    return publicar_versao(objetos, raiz, arquivos=arquivos, descricao=descricao)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Versões do modelo de fraude (objects/versoes e ponteiro ATUAL).")
+    parser.add_argument("--objetos", default="objects", help="Diretório dos artefatos do modelo")
+    acao = parser.add_mutually_exclusive_group()
+    acao.add_argument("--listar", action="store_true", help="Lista as versões publicadas (padrão)")
+    acao.add_argument("--migrar", action="store_true", help="Publica os arquivos soltos do diretório como uma versão")
+    acao.add_argument("--ativar", metavar="VERSAO", help="Aponta ATUAL para a versão informada")
+    acao.add_argument("--verificar", metavar="VERSAO", help="Confere os hashes dos arquivos da versão")
+    acao.add_argument("--podar", type=int, metavar="N", help="Mantém só as N versões mais recentes (e a atual)")
+    args = parser.parse_args()
+
+    if args.migrar:
+        print(f"Versão {migrar_objetos_soltos(args.objetos)} publicada e ativada")
+    elif args.ativar:
+        verificar_versao(args.objetos, args.ativar)
+        ativar_versao(args.objetos, args.ativar)
+        print(f"Versão {args.ativar} ativada")
+    elif args.verificar:
+        verificar_versao(args.objetos, args.verificar)
+        print(f"Versão {args.verificar} íntegra")
+    elif args.podar is not None:
+        print(f"{len(podar_versoes(args.objetos, args.podar))} versões removidas")
+    else:
+        atual = versao_atual(args.objetos)
+        for manifesto in listar_versoes(args.objetos):
+            marcador = "*" if manifesto["versao"] == atual else " "
+            print(f"{marcador} {manifesto['versao']}  {manifesto['criada_em'][:19]}  {len(manifesto['arquivos'])} arquivos  "
+                  f"{manifesto['descricao']}")
@@ -0,0 +1,187 @@
+"""
+Atualização incremental do modelo com uma nova partição de transações.
+
+Apenas a partição nova é lida e codificada (com os LabelEncoders já salvos) e guardada como
+mais um segmento do cache em cache/incrementais/. O seletor e os encoders são mantidos, e o
+LightGBM continua o treinamento a partir do booster atual, acrescentando novas árvores
+ajustadas à partição. Uma parte da partição é reservada para teste e somada ao teste já salvo
+(o do treinamento e os das partições anteriores): métricas, pontuações e explicações passam a
+ser as do modelo atualizado nesse teste acumulado, que não entra no treino. A leitura e o treino
+dependem do tamanho da partição, não do histórico; a avaliação, do tamanho do teste acumulado.
+O resultado é publicado como uma nova versão do registro (registro_modelos.py), que herda os
+demais arquivos da atual.
+
+Uso:
+    python retreino_incremental.py transacoes_2025-06-01.csv --arvores 50
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from lightgbm import LGBMClassifier
+from sklearn.metrics import accuracy_score, confusion_matrix
+from sklearn.model_selection import train_test_split
+from joblib import load
+from artefatos import ler_artefatos, carregar_encoders, salvar_artefatos, DIRETORIO_OBJETOS
+from arvores_numpy import FlorestaNumpy
+from dados import calcular_hash, codificar_particao, ler_colunas, DIRETORIO_CACHE
+from explicabilidade import gerar_explicabilidade_teste, resumir_explicacoes, colunas_segmento
+from figuras import gerar_figuras_padrao
+from indice_transacoes import IndiceTransacoes
+from plots import carregar_melhores_parametros, varrer_limiares
+from registro_modelos import diretorio_ativo
+from velocidade import colunas_entrada, colunas_velocidade, MotorVelocidade
+
+ARQUIVO_REGISTRO = "particoes_incrementais.pkl" # Partições já incorporadas ao modelo
+
+
+def atualizar_metadados(metadados, dados):
+    """Amplia mínimo e máximo das colunas numéricas do formulário com os valores da partição."""
+    atualizados = {}
+    for coluna, info in metadados.items():
+        info = dict(info)
+        if info["tipo"] == "numerica" and coluna in dados and dados[coluna].notna().any():
+            conversor = type(info["minimo"])
+            info["minimo"] = min(info["minimo"], conversor(dados[coluna].min()))
+            info["maximo"] = max(info["maximo"], conversor(dados[coluna].max()))
+        atualizados[coluna] = info
+    return atualizados
+
+
+def juntar_teste(historico, pontuacoes, novo):
+    """
+    Conjunto de teste acumulado: as linhas de teste já salvas seguidas da parte reservada da partição.
+
+    Parâmetros:
+    - historico: explicabilidade_teste da versão atual (None em treinamentos sem as explicações)
+    - pontuacoes: pontuacoes_teste da versão atual (fonte dos valores das transações, se houver)
+    - novo: X_teste, y_teste, id_transacao, dados_originais, segmentos e valores da parte reservada
+
+    Retorna:
+    - Dicionário com as mesmas chaves de `novo`; id_transacao, segmentos e valores ficam None se
+      faltarem em uma das partes
+    """
+    if historico is None:
+        return dict(novo, dados_originais=novo["dados_originais"].reset_index(drop=True))
+    valores = None
+    if pontuacoes is not None and "valores" in pontuacoes:
+        valores = pontuacoes["valores"]
+    elif "valor" in historico["dados_originais"]:
+        valores = historico["dados_originais"]["valor"].to_numpy(np.float32)
+
+    def juntar(anterior, atual):
+        if anterior is None or atual is None:
+            return None
+        if isinstance(atual, pd.DataFrame):
+            return pd.concat([anterior, atual], ignore_index=True)
+        return np.concatenate([anterior, atual])
+
+    return {
+        "X_teste": np.vstack([historico["X_teste"], novo["X_teste"]]),
+        "y_teste": np.concatenate([historico["y_teste"], novo["y_teste"]]).astype(np.int8),
+        "id_transacao": juntar(historico.get("id_transacao"), novo["id_transacao"]),
+        "dados_originais": juntar(historico["dados_originais"], novo["dados_originais"]),
+        "segmentos": juntar(historico.get("segmentos"), novo["segmentos"]),
+        "valores": juntar(valores, novo["valores"]),
+    }
+
+
+def retreinar(caminho_particao, arvores=50, diretorio=DIRETORIO_OBJETOS, diretorio_cache=DIRETORIO_CACHE):
+    """
+    Incorpora uma partição ao modelo salvo em `diretorio`.
+
+    Retorna:
+    - Dicionário com o resumo da atualização (ou None se a partição já tinha sido incorporada)
+    """
+    inicio = time.perf_counter()
+    artefatos = ler_artefatos(diretorio) # Sempre do disco, sem o cache do processo
+    caminho_registro = os.path.join(diretorio_ativo(diretorio), ARQUIVO_REGISTRO)
+    registro = load(caminho_registro) if os.path.exists(caminho_registro) else []
+    identificador = calcular_hash(caminho_particao)
+    if any(particao["hash"] == identificador for particao in registro):
+        print(f"A partição {caminho_particao} já foi incorporada ao modelo")
+        return None
+
+    segmento, desconhecidas = codificar_particao(caminho_particao, carregar_encoders(diretorio), # Todas as colunas
+                                                 os.path.join(diretorio_cache, "incrementais", identificador))
+    colunas = artefatos["colunas_selecionadas"]
+    objetos, motor = {}, None
+    if any(coluna in colunas_velocidade for coluna in colunas): # Modelo treinado com --velocidade
+        motor = MotorVelocidade.carregar(os.path.join(diretorio, "velocidade.pkl"))
+        segmento = segmento.com_colunas(motor.observar(ler_colunas(caminho_particao, colunas_entrada, incluir=())))
+    indices_treino, indices_teste = train_test_split(np.arange(len(segmento)), test_size=0.25, random_state=1432)
+    y = np.asarray(segmento.y)
+    X_treino = segmento.previsores(colunas, indices_treino).to_numpy()
+    X_teste = segmento.previsores(colunas, indices_teste).to_numpy()
+
+    # Continua o treinamento do booster atual: as árvores antigas são mantidas e as novas corrigem o erro na partição
+    parametros = dict(carregar_melhores_parametros(os.path.join(diretorio, "melhores_parametros.json")), n_estimators=arvores)
+    modelo = LGBMClassifier(**parametros).fit(X_treino, y[indices_treino], init_model=artefatos["modelo"].booster_)
+
+    # Avaliação no teste acumulado (teste do treinamento + partes reservadas das partições), não só na partição
+    y_particao = y[indices_teste]
+    originais = segmento.decodificar(colunas)
+    teste = juntar_teste(artefatos["explicabilidade_teste"], artefatos["pontuacoes_teste"], {
+        "X_teste": X_teste, "y_teste": y_particao, "id_transacao": segmento.id_transacao[indices_teste],
+        "dados_originais": originais.iloc[indices_teste], "segmentos": segmento.decodificar(colunas_segmento, indices_teste),
+        "valores": segmento.previsores(["valor"], indices_teste)["valor"].to_numpy(np.float32)})
+    y_teste = teste["y_teste"]
+    explicabilidade_teste = gerar_explicabilidade_teste(modelo, teste["X_teste"], y_teste, teste["dados_originais"], colunas,
+                                                        teste["segmentos"], ids=teste["id_transacao"])
+    y_pred = explicabilidade_teste["probabilidades"]
+    y_pred_bin = (y_pred >= 0.3).astype(int)
+    accuracy = accuracy_score(y_teste, y_pred_bin)
+    confusion = confusion_matrix(y_teste, y_pred_bin, labels=[0, 1])
+    acuracia_particao = accuracy_score(y_particao, y_pred_bin[-len(y_particao):]) # A partição vem no fim do teste
+
+    registro = registro + [{"hash": identificador, "arquivo": os.path.basename(caminho_particao), "linhas": len(segmento),
+                            "arvores": arvores, "incorporada_em": datetime.now().isoformat(timespec="seconds")}]
+    pontuacoes_teste = {"y_teste": y_teste.astype(np.int8), "probabilidades": y_pred}
+    if teste["valores"] is not None:
+        pontuacoes_teste["valores"] = teste["valores"]
+    objetos.update({
+        "modelo_fraude.pkl": modelo,
+        "modelo_fraude_arvores.npz": FlorestaNumpy.de_modelo(modelo),
+        "metricas.pkl": (accuracy, confusion),
+        "pontuacoes_teste.pkl": pontuacoes_teste,
+        "indice_teste.pkl": IndiceTransacoes.de_explicabilidade(explicabilidade_teste, pontuacoes_teste),
+        "figuras_resultados.pkl": gerar_figuras_padrao({"matriz_confusao": confusion, "pontuacoes_teste": pontuacoes_teste,
+                                                        "varredura_limiares": varrer_limiares(y_teste, y_pred)}),
+        "explicabilidade_teste.pkl": explicabilidade_teste,
+        "explicacoes_globais.pkl": resumir_explicacoes(explicabilidade_teste["shap"], explicabilidade_teste["dados_originais"],
+                                                       colunas, explicabilidade_teste["valor_base"],
+                                                       explicabilidade_teste["segmentos"]),
+        ARQUIVO_REGISTRO: registro,
+    })
+    if artefatos["metadados_formulario"] is not None:
+        objetos["metadados_formulario.pkl"] = atualizar_metadados(artefatos["metadados_formulario"], originais)
+    versao = salvar_artefatos(objetos, diretorio, descricao=f"retreino com {os.path.basename(caminho_particao)}")
+    if motor is not None: # O estado do motor fica fora das versões imutáveis
+        motor.salvar(os.path.join(diretorio, "velocidade.pkl"))
+
+    return {"linhas": len(segmento), "arvores_total": modelo.booster_.num_trees(), "acuracia": accuracy,
+            "matriz_confusao": confusion, "linhas_teste": len(y_teste), "acuracia_particao": acuracia_particao,
+            "categorias_desconhecidas": {c: n for c, n in desconhecidas.items() if n},
+            "segundos": time.perf_counter() - inicio, "versao": versao}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Atualiza o modelo de fraude com uma nova partição de transações.")
+    parser.add_argument("particao", help="CSV com as transações novas (colunas originais, em inglês)")
+    parser.add_argument("--arvores", type=int, default=50, help="Árvores acrescentadas ao modelo")
+    parser.add_argument("--objetos", default=DIRETORIO_OBJETOS, help="Diretório dos artefatos do modelo")
+    args = parser.parse_args()
+
+    resumo = retreinar(args.particao, args.arvores, args.objetos)
+    if resumo is not None:
+        print(f"{resumo['linhas']:,} transações incorporadas em {resumo['segundos']:.1f}s "
+              f"({resumo['arvores_total']} árvores no modelo)")
+        print(f"Acurácia no teste acumulado ({resumo['linhas_teste']:,} transações): {resumo['acuracia']*100:.2f}% | "
+              f"na parte reservada da partição: {resumo['acuracia_particao']*100:.2f}%")
+        print("Matriz de Confusão (teste acumulado):")
+        print(resumo["matriz_confusao"])
+        print(f"Versão {resumo['versao']} publicada e ativada")
+        if resumo["categorias_desconhecidas"]:
+            print(f"Categorias desconhecidas (tratadas como ausentes): {resumo['categorias_desconhecidas']}")
@@ -0,0 +1,224 @@
+"""
+Serviço HTTP local de pontuação de transações, com agrupamento de requisições em micro-lotes.
+
+Uso:
+    python servidor.py --porta 8000 --janela-ms 2 --tamanho-lote 256
+
+Endpoints:
+- POST /pontuar  -> corpo JSON com uma transação (objeto) ou várias (lista), nas colunas do CSV original
+                    (com --armazem e --velocidade, os campos calculados a partir do histórico podem ser omitidos)
+- GET  /metricas -> latência p50/p99 (no total e por resultado: 200, 400, interrompida), vazão e tamanho médio dos lotes
+- GET  /drift    -> PSI e KS de cada coluna em relação ao treino (com --monitor, ver monitor_drift.py)
+- GET  /saude    -> verificação simples de disponibilidade
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from armazem_usuarios import ArmazemUsuarios
+from artefatos import carregar_artefatos, DIRETORIO_OBJETOS
+from desempenho import JanelaLatencias
+from monitor_drift import MonitorDrift
+from pontuacao import enriquecer_transacoes, preparar_matriz, prever_probabilidades, classificar_faixas
+from velocidade import MotorVelocidade
+
+
+class AgrupadorLotes:
+    """
+    Acumula as transações recebidas por requisições concorrentes e as pontua em conjunto.
+
+    Um lote é fechado quando atinge `tamanho_lote` transações ou quando a janela de
+    `janela_ms` milissegundos, contada a partir da primeira requisição, expira.
+    Cada lote resulta em uma única chamada ao modelo (ver pontuacao.prever_probabilidades).
+    Com um `armazem` (agregados por usuário) e/ou um motor de `velocidade`, os campos
+    calculados a partir do histórico são preenchidos antes da pontuação, e cada transação
+    recebida passa a fazer parte do histórico (sempre nesta thread, sem concorrência).
+    Com um `monitor` (monitor_drift.MonitorDrift), cada lote pontuado entra nas contagens de drift.
+    Os artefatos são obtidos de `diretorio` a cada lote (artefatos.carregar_artefatos), de modo que
+    uma versão ativada no registro passa a ser usada sem reiniciar o serviço.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_OBJETOS, janela_ms=2.0, tamanho_lote=256, armazem=None, velocidade=None,
+                 monitor=None):
+        self.diretorio = diretorio
+        self.armazem = armazem
+        self.velocidade = velocidade
+        self.monitor = monitor
+        self.janela = janela_ms / 1000
+        self.tamanho_lote = tamanho_lote
+        self.latencias_lote = JanelaLatencias()
+        self._fila = queue.Queue()
+        threading.Thread(target=self._executar, daemon=True, name="agrupador-lotes").start()
+
+    def pontuar(self, transacoes):
+        """Enfileira uma lista de transações (dicionários) e retorna um Future com os resultados."""
+        futuro = Future()
+        self._fila.put((transacoes, futuro))
+        return futuro
+
+    def _executar(self):
+        while True:
+            pendentes = [self._fila.get()]
+            quantidade = len(pendentes[0][0])
+            limite = time.perf_counter() + self.janela
+            while quantidade < self.tamanho_lote:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    item = self._fila.get(timeout=restante)
+                except queue.Empty:
+                    break
+                pendentes.append(item)
+                quantidade += len(item[0])
+            self._pontuar_lote(pendentes, quantidade)
+
+    def _enriquecer(self, transacoes):
+        return enriquecer_transacoes(transacoes, self.armazem, self.velocidade)
+
+    def _calcular(self, dados):
+        artefatos = carregar_artefatos(self.diretorio) # Mesma versão para todo o lote
+        matriz = preparar_matriz(dados, artefatos)
+        probabilidades = prever_probabilidades(matriz, artefatos)
+        if self.monitor is not None and self.monitor.versao == artefatos.versao: # Perfil de drift da versão monitorada
+            self.monitor.atualizar(matriz, probabilidades)
+        return probabilidades
+
+    def _pontuar_lote(self, pendentes, quantidade):
+        inicio = time.perf_counter()
+        dados = None
+        try:
+            dados = self._enriquecer([t for transacoes, _ in pendentes for t in transacoes])
+            probabilidades = self._calcular(dados)
+        except Exception:
+            # Um registro inválido não deve derrubar o lote inteiro: pontua cada requisição separadamente,
+            # sem registrar de novo no histórico as transações de um lote já enriquecido
+            posicao = 0
+            for transacoes, futuro in pendentes:
+                try:
+                    parte = (self._enriquecer(transacoes) if dados is None
+                             else dados[posicao:posicao + len(transacoes)])
+                    futuro.set_result(self._formatar(self._calcular(parte)))
+                except Exception as erro:
+                    futuro.set_exception(erro)
+                posicao += len(transacoes)
+        else:
+            posicao = 0
+            for transacoes, futuro in pendentes:
+                futuro.set_result(self._formatar(probabilidades[posicao:posicao + len(transacoes)]))
+                posicao += len(transacoes)
+        self.latencias_lote.registrar(time.perf_counter() - inicio, quantidade)
+
+    @staticmethod
+    def _formatar(probabilidades):
+        return [{"probabilidade_fraude": float(p), "faixa": str(f)}
+                for p, f in zip(probabilidades, classificar_faixas(probabilidades))]
+
+
+def criar_servidor(host="127.0.0.1", porta=8000, janela_ms=2.0, tamanho_lote=256, diretorio=DIRETORIO_OBJETOS,
+                   armazem=None, velocidade=None, monitor=None):
+    """Cria o servidor HTTP (ainda sem iniciá-lo) com o agrupador de lotes e as métricas de latência."""
+    agrupador = AgrupadorLotes(diretorio, janela_ms, tamanho_lote, armazem, velocidade, monitor)
+    latencias = JanelaLatencias() # Todas as requisições de pontuação, com sucesso ou não
+    latencias_status = {} # Resultado ("200", "400", "interrompida") -> JanelaLatencias
+    trava_status = threading.Lock()
+
+    def registrar_latencia(resultado, segundos):
+        latencias.registrar(segundos)
+        with trava_status:
+            janela = latencias_status.setdefault(resultado, JanelaLatencias())
+        janela.registrar(segundos)
+
+    class Manipulador(BaseHTTPRequestHandler):
+
+        def _responder(self, status, conteudo):
+            corpo = json.dumps(conteudo, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def do_GET(self):
+            if self.path == "/saude":
+                self._responder(200, {"status": "ok"})
+            elif self.path == "/metricas":
+                lotes = agrupador.latencias_lote.resumo()
+                self._responder(200, {
+                    "requisicoes": latencias.resumo(),
+                    "requisicoes_por_resultado": {resultado: janela.resumo() for resultado, janela in sorted(latencias_status.items())},
+                    "lotes": lotes,
+                    "tamanho_medio_lote": round(lotes["total"] / max(lotes["eventos"], 1), 2),
+                })
+            elif self.path == "/drift" and monitor is not None:
+                relatorio = monitor.relatorio(recente=True).astype(object)
+                self._responder(200, {"transacoes": monitor.linhas,
+                                      "recente": relatorio.where(relatorio.notna(), None).to_dict(orient="records")})
+            else:
+                self._responder(404, {"erro": "rota não encontrada"})
+
+        def do_POST(self):
+            if self.path != "/pontuar":
+                self._responder(404, {"erro": "rota não encontrada"})
+                return
+            inicio = time.perf_counter()
+            resultado = "interrompida" # Conexão encerrada ou tempo esgotado antes de a resposta ser enviada
+            try:
+                try:
+                    conteudo = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                    transacoes = conteudo if isinstance(conteudo, list) else [conteudo]
+                    resultados = agrupador.pontuar(transacoes).result()
+                except Exception as erro:
+                    self._responder(400, {"erro": str(erro)})
+                    resultado = "400"
+                    return
+                self._responder(200, {"resultados": resultados})
+                resultado = "200"
+            finally: # Erros também entram na latência, senão as requisições lentas que falham somem do p99
+                registrar_latencia(resultado, time.perf_counter() - inicio)
+
+        def log_message(self, *args):
+            pass # Evita escrever uma linha no stderr por requisição
+
+    servidor = ThreadingHTTPServer((host, porta), Manipulador)
+    servidor.daemon_threads = True
+    return servidor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor HTTP local de pontuação de fraudes com micro-lotes.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8000)
+    parser.add_argument("--janela-ms", type=float, default=2.0, help="Tempo máximo de espera para formar um lote")
+    parser.add_argument("--tamanho-lote", type=int, default=256, help="Número máximo de transações por lote")
+    parser.add_argument("--objetos", default=DIRETORIO_OBJETOS, help="Diretório dos artefatos do modelo")
+    parser.add_argument("--armazem", default=None,
+                        help="Snapshot do armazém de usuários (armazem_usuarios.py); gravado de volta ao encerrar")
+    parser.add_argument("--velocidade", default=None,
+                        help="Estado do motor de velocidade (velocidade.py); gravado de volta ao encerrar")
+    parser.add_argument("--monitor", default=None,
+                        help="Estado do monitor de drift (monitor_drift.py); criado se não existir e gravado periodicamente")
+    args = parser.parse_args()
+
+    armazem = ArmazemUsuarios.carregar(args.armazem) if args.armazem else None
+    velocidade = MotorVelocidade.carregar(args.velocidade) if args.velocidade else None
+    monitor = MonitorDrift.carregar_ou_criar(args.monitor, carregar_artefatos(args.objetos)) if args.monitor else None
+    if monitor is not None:
+        monitor.gravar_periodicamente(args.monitor)
+    servidor = criar_servidor(args.host, args.porta, args.janela_ms, args.tamanho_lote, args.objetos, armazem, velocidade,
+                              monitor)
+    print(f"Servidor de pontuação em http://{args.host}:{args.porta} "
+          f"(janela {args.janela_ms} ms, lote máximo {args.tamanho_lote})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.server_close()
+        if armazem is not None:
+            armazem.salvar(args.armazem)
+        if velocidade is not None:
+            velocidade.salvar(args.velocidade)
+        if monitor is not None:
+            monitor.salvar(args.monitor)
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+from armazem_usuarios import ArmazemUsuarios, dias_desde_epoca
+
+
+def _armazem():
+    armazem = ArmazemUsuarios(capacidade=4)
+    horas = ["2024-01-01T00:00:00Z", "2024-01-02T00:00:00Z", "2024-01-03T00:00:00Z"]
+    armazem.registrar_lote([10, 10, 11], [100.0, 50.0, 20.0], dias_desde_epoca(horas))
+    return armazem
+
+
+def _bloco(indice):
+    return pd.DataFrame({
+        "id_usuario": [10, 11], "valor": [30.0, 40.0],
+        "hora_transacao": ["2024-01-11T00:00:00Z", "2024-01-04T00:00:00Z"],
+        "total_transacoes_usuario": [np.nan, 7.0], # Em branco só na primeira linha
+        "valor_medio_usuario": [np.nan, np.nan],
+        "idade_conta_dias": [np.nan, np.nan],
+    }, index=indice)
+
+
+def test_enriquecer_preenche_os_campos_em_branco():
+    dados = _armazem().enriquecer(_bloco([0, 1]))
+    assert dados["total_transacoes_usuario"].tolist() == [2, 7] # Informado prevalece
+    assert dados["valor_medio_usuario"].tolist() == [75.0, 20.0]
+    assert dados["idade_conta_dias"].tolist() == [10, 1]
+
+
+def test_enriquecer_bloco_com_indice_deslocado():
+    """Blocos da leitura em partes (ler_colunas com tamanho_bloco) não começam no índice 0."""
+    esperado = _armazem().enriquecer(_bloco([0, 1]))
+    obtido = _armazem().enriquecer(_bloco([200_000, 200_001]))
+    assert obtido.index.tolist() == [200_000, 200_001]
+    tm.assert_frame_equal(obtido.reset_index(drop=True), esperado)
+
+
+def test_registrar_e_snapshot(tmp_path):
+    armazem = _armazem()
+    armazem.registrar_transacoes(_bloco([5, 6]))
+    caminho = str(tmp_path / "armazem.npy")
+    armazem.salvar(caminho)
+    contagem, soma, _, existe = ArmazemUsuarios.carregar(caminho).consultar([10, 11, 99])
+    assert contagem.tolist() == [3, 2, 0] and soma.tolist() == [180.0, 60.0, 0.0] and existe.tolist() == [True, True, False]
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from lightgbm import LGBMClassifier
+from arvores_numpy import FlorestaNumpy
+
+
+def _dados(linhas=3000, semente=1432):
+    gerador = np.random.default_rng(semente)
+    X = gerador.normal(size=(linhas, 5))
+    X[:, 3] = gerador.integers(0, 4, linhas) # Coluna discreta: muitos valores iguais aos limiares
+    X[gerador.random(linhas) < 0.1, 1] = np.nan # Ausentes no treino (missing_type NaN)
+    y = ((np.nan_to_num(X[:, 0]) + np.nan_to_num(X[:, 1]) + X[:, 3] / 2 + gerador.normal(scale=0.5, size=linhas)) > 1)
+    return X, y.astype(int)
+
+
+def _linhas_de_teste(floresta, X, semente=7):
+    """Linhas do treino, linhas com NaN em cada coluna e linhas exatamente sobre os limiares das divisões."""
+    gerador = np.random.default_rng(semente)
+    com_nan = X[:200].copy()
+    for j in range(X.shape[1]):
+        com_nan[j::X.shape[1], j] = np.nan
+    empates = X[:200].copy()
+    internos = floresta.coluna >= 0
+    for coluna, limiar in zip(floresta.coluna[internos], floresta.limiar[internos]):
+        empates[gerador.integers(0, len(empates)), coluna] = limiar
+    zeros = X[:50].copy()
+    zeros[:, gerador.integers(0, X.shape[1], 50)] = 0.0
+    return np.vstack([X[:500], com_nan, empates, zeros])
+
+
+@pytest.mark.parametrize("parametros", [
+    {"boosting_type": "dart", "n_estimators": 40, "drop_rate": 0.2},
+    {"boosting_type": "gbdt", "n_estimators": 40},
+    {"boosting_type": "gbdt", "n_estimators": 40, "zero_as_missing": True},
+])
+def test_paridade_com_predict_proba(parametros):
+    X, y = _dados()
+    modelo = LGBMClassifier(num_leaves=15, random_state=1432, verbose=-1, **parametros).fit(X, y)
+    floresta = FlorestaNumpy.de_modelo(modelo)
+    X_teste = _linhas_de_teste(floresta, X)
+
+    assert np.isnan(X_teste).any()
+    assert np.allclose(floresta.probabilidade(X_teste), modelo.predict_proba(X_teste)[:, 1])
+
+
+def test_salvar_e_carregar_preserva_previsoes(tmp_path):
+    X, y = _dados(linhas=1000)
+    modelo = LGBMClassifier(boosting_type="dart", n_estimators=20, random_state=1432, verbose=-1).fit(X, y)
+    floresta = FlorestaNumpy.de_modelo(modelo)
+    caminho = tmp_path / "arvores.npz"
+    with open(caminho, "wb") as arquivo:
+        floresta.salvar(arquivo)
+
+    carregada = FlorestaNumpy.carregar(caminho)
+    assert np.array_equal(carregada.probabilidade(X), floresta.probabilidade(X))
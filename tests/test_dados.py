@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+from dados import abrir_dataset, ler_colunas, ler_csv_compacto
+
+CSV = """transaction_id,user_id,account_age_days,amount,country,promo_used,three_ds_flag,is_fraud
+1,10,893,132.83,IT,0,1,0
+2,11,,319.58,PL,,0,0
+3,12,15,12.5,,1,,1
+"""
+
+CSV_COMPLETO = """transaction_id,user_id,account_age_days,amount,country,promo_used,three_ds_flag,is_fraud
+1,10,893,132.83,IT,0,1,0
+2,11,20,319.58,PL,1,0,1
+"""
+
+
+def _colunas():
+    return ["idade_conta_dias", "valor", "pais", "promocao_usada", "autenticacao_3ds"]
+
+
+def test_campos_em_branco_viram_ausentes(tmp_path):
+    caminho = tmp_path / "transacoes.csv"
+    caminho.write_text(CSV)
+    dados = ler_colunas(caminho, _colunas(), incluir=("fraude", "id_transacao"))
+    assert dados["idade_conta_dias"].dtype == np.float64
+    assert dados["idade_conta_dias"].isna().tolist() == [False, True, False]
+    assert dados["promocao_usada"].tolist()[0] == "Não" and pd.isna(dados["promocao_usada"][1])
+    assert pd.isna(dados["autenticacao_3ds"][2]) and pd.isna(dados["pais"][2])
+    primeiro, segundo = ler_colunas(caminho, _colunas(), tamanho_bloco=2) # O tipo é decidido em cada bloco
+    assert primeiro["idade_conta_dias"].dtype == np.float64 and segundo["idade_conta_dias"].dtype == np.int32
+    pd.testing.assert_frame_equal(primeiro[_colunas()], dados[_colunas()].iloc[:2])
+
+
+def test_sem_campos_em_branco_mantem_tipos_compactos(tmp_path):
+    caminho = tmp_path / "transacoes.csv"
+    caminho.write_text(CSV_COMPLETO)
+    dados = ler_colunas(caminho, _colunas(), incluir=("fraude",))
+    assert dados["idade_conta_dias"].dtype == np.int32
+    assert dados["fraude"].dtype == np.int8
+    assert dados["promocao_usada"].tolist() == ["Não", "Sim"]
+
+
+
+def test_leitura_compacta_com_campos_em_branco_igual_ao_cache(tmp_path):
+    """ModelCreation --enxuto aceita os mesmos arquivos que o modo padrão (cache em disco)."""
+    caminho = tmp_path / "transacoes.csv"
+    caminho.write_text(CSV.replace("user_id,", "user_id,transaction_time,").replace("\n1,10,", "\n1,10,2024-01-01T00:00:00Z,")
+                       .replace("\n2,11,", "\n2,11,2024-01-01T00:01:00Z,").replace("\n3,12,", "\n3,12,2024-01-01T00:02:00Z,"))
+    compacto = ler_csv_compacto(caminho, tamanho_bloco=2)
+    cache = abrir_dataset(caminho, tmp_path / "cache")
+    assert (compacto.colunas, compacto.tipos, compacto.categorias) == (cache.colunas, cache.tipos, cache.categorias)
+    np.testing.assert_array_equal(compacto.X, cache.X.astype(np.float32)) # NaN nos campos em branco dos dois lados
+    np.testing.assert_array_equal(compacto.y, cache.y)
@@ -0,0 +1,16 @@
+from desempenho import JanelaLatencias
+
+
+def test_histograma_acumulado_continua_crescendo_com_a_janela_cheia():
+    janela = JanelaLatencias(tamanho_janela=5, limites_ms=(1, 10, 100))
+    for segundos in [0.0005, 0.001, 0.002, 0.05, 0.5] * 4: # 20 eventos, janela de 5
+        janela.registrar(segundos)
+    faixas, soma, eventos = janela.acumulado()
+    assert faixas == {"1": 8, "10": 12, "100": 16, "+Inf": 20} # 'le': 1 ms entra na faixa de 1 ms
+    assert eventos == 20 and abs(soma - 4 * 0.5535) < 1e-9
+    assert janela.histograma()["+Inf"] == 5 # A janela só guarda os mais recentes
+
+    janela.registrar(0.003)
+    mais_tarde, _, _ = janela.acumulado()
+    assert all(mais_tarde[limite] >= faixas[limite] for limite in faixas)
+    assert mais_tarde["10"] == 13
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from sklearn.metrics import confusion_matrix
+from plots import matriz_no_limiar, varrer_limiares
+
+
+def _metricas_sklearn(y, probabilidades, limiar):
+    """Precisão, recall e taxa de falsos positivos com a matriz de confusão do scikit-learn (alerta se p >= limiar)."""
+    (VN, FP), (FN, VP) = confusion_matrix(y, (probabilidades >= limiar).astype(int), labels=[0, 1])
+    precisao = VP / (VP + FP) if VP + FP else 1.0 # Mesma convenção da varredura: sem alertas, precisão 1
+    recall = VP / (VP + FN) if VP + FN else 0.0
+    taxa_fp = FP / (FP + VN) if FP + VN else 0.0
+    return np.array([[VN, FP], [FN, VP]]), (precisao, recall, taxa_fp)
+
+
+def _rotulos(caso, linhas, gerador):
+    if caso == "todos_legitimos":
+        return np.zeros(linhas, dtype=int)
+    if caso == "todos_fraude":
+        return np.ones(linhas, dtype=int)
+    return (gerador.random(linhas) < 0.2).astype(int)
+
+
+@pytest.mark.parametrize("caso", ["misturado", "todos_legitimos", "todos_fraude"])
+def test_varredura_igual_a_matriz_do_sklearn(caso):
+    gerador = np.random.default_rng(1432)
+    probabilidades = np.round(gerador.random(500), 1) # Poucos valores distintos: muitos empates
+    y = _rotulos(caso, len(probabilidades), gerador)
+    varredura = varrer_limiares(y, probabilidades)
+
+    # Cada linha da varredura, no seu próprio limiar
+    for linha in varredura.itertuples():
+        matriz, (precisao, recall, taxa_fp) = _metricas_sklearn(y, probabilidades, linha.limiar)
+        assert (linha.VN, linha.FP, linha.FN, linha.VP) == tuple(matriz.ravel())
+        assert linha.precisao == pytest.approx(precisao)
+        assert linha.recall == pytest.approx(recall)
+        assert linha.taxa_fp == pytest.approx(taxa_fp)
+
+    # Limiares quaisquer: iguais a um valor empatado, entre dois valores, abaixo do menor e acima do maior
+    for limiar in [0.0, 0.05, 0.3, 0.35, 0.5, 0.7000001, 1.0, 1.5, -0.1]:
+        esperada, _ = _metricas_sklearn(y, probabilidades, limiar)
+        np.testing.assert_array_equal(matriz_no_limiar(varredura, limiar), esperada)
@@ -0,0 +1,71 @@
+import os
+import stat
+import numpy as np
+import pytest
+from lightgbm import LGBMClassifier
+from arvores_numpy import FlorestaNumpy
+from artefatos import ler_artefatos
+from registro_modelos import (VersaoCorrompida, ativar_versao, diretorio_versao, listar_versoes, podar_versoes,
+                              publicar_versao, versao_atual)
+
+COLUNAS = ["valor", "idade_conta_dias"]
+
+
+def _objetos(acuracia):
+    """Artefatos mínimos de um treinamento (só colunas numéricas, sem encoders)."""
+    gerador = np.random.default_rng(1432)
+    X = gerador.normal(size=(300, len(COLUNAS)))
+    modelo = LGBMClassifier(n_estimators=5, verbose=-1).fit(X, (X[:, 0] > 0).astype(int))
+    return {
+        "modelo_fraude.pkl": modelo,
+        "modelo_fraude_arvores.npz": FlorestaNumpy.de_modelo(modelo),
+        "colunas_selecionadas.pkl": COLUNAS,
+        "metricas.pkl": (acuracia, np.array([[90, 5], [2, 3]])),
+    }
+
+
+def _gravavel(caminho):
+    return bool(os.stat(caminho).st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+def test_publicar_ativar_e_ler(tmp_path):
+    raiz = str(tmp_path)
+    primeira = publicar_versao(_objetos(0.9), raiz, descricao="treino")
+    segunda = publicar_versao({"metricas.pkl": (0.95, np.array([[91, 4], [1, 4]]))}, raiz, base=primeira)
+    assert versao_atual(raiz) == segunda
+    assert [manifesto["versao"] for manifesto in listar_versoes(raiz)] == [primeira, segunda]
+
+    artefatos = ler_artefatos(raiz)
+    assert (artefatos.versao, artefatos["acuracia"], artefatos["colunas_selecionadas"]) == (segunda, 0.95, COLUNAS)
+
+    ativar_versao(raiz, primeira) # Volta para a versão anterior
+    assert (ler_artefatos(raiz).versao, ler_artefatos(raiz)["acuracia"]) == (primeira, 0.9)
+    with pytest.raises(FileNotFoundError):
+        ativar_versao(raiz, "inexistente")
+
+
+def test_arquivo_alterado_gera_versao_corrompida(tmp_path):
+    raiz = str(tmp_path)
+    versao = publicar_versao(_objetos(0.9), raiz)
+    caminho = os.path.join(diretorio_versao(raiz, versao), "metricas.pkl")
+    assert not _gravavel(caminho)
+    os.chmod(caminho, stat.S_IRUSR | stat.S_IWUSR)
+    with open(caminho, "ab") as arquivo:
+        arquivo.write(b"alterado")
+    with pytest.raises(VersaoCorrompida):
+        ler_artefatos(raiz)
+
+
+def test_podar_mantem_somente_leitura_os_arquivos_compartilhados(tmp_path):
+    raiz = str(tmp_path)
+    versoes = [publicar_versao(_objetos(0.9), raiz)]
+    for acuracia in (0.91, 0.92):
+        versoes.append(publicar_versao({"metricas.pkl": (acuracia, None)}, raiz, base=versoes[-1]))
+    compartilhado = os.path.join(diretorio_versao(raiz, versoes[-1]), "modelo_fraude.pkl")
+    assert os.stat(compartilhado).st_nlink == 3 # Ligações físicas com as duas versões anteriores
+
+    assert podar_versoes(raiz, manter=1) == versoes[:2]
+    assert [manifesto["versao"] for manifesto in listar_versoes(raiz)] == versoes[-1:]
+    diretorio = diretorio_versao(raiz, versoes[-1])
+    assert all(not _gravavel(os.path.join(diretorio, nome)) for nome in os.listdir(diretorio))
+    assert ler_artefatos(raiz)["acuracia"] == 0.92
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+from velocidade import MotorVelocidade, calcular_velocidade
+
+
+def _transacoes(linhas=400, semente=1432):
+    """Transações fora de ordem cronológica, com empates, horários sobre as bordas dos baldes e saltos maiores que 7 dias."""
+    gerador = np.random.default_rng(semente)
+    inicio = pd.Timestamp("2024-01-01T00:00:00Z")
+    segundos = np.cumsum(gerador.choice([0, 1, 299, 300, 3_600, 86_400, 700_000], size=linhas,
+                                        p=[0.15, 0.2, 0.2, 0.2, 0.15, 0.07, 0.03]))
+    segundos[::37] = (segundos[::37] // 300) * 300 # Início exato de um balde de 1 h (largura de 300 s)
+    dados = pd.DataFrame({
+        "id_usuario": gerador.integers(1, 8, linhas),
+        "pais_cartao": gerador.choice(["BR", "US", "IT", None], size=linhas),
+        "valor": np.round(gerador.uniform(1, 500, linhas), 2),
+        "hora_transacao": (inicio + pd.to_timedelta(segundos, unit="s")).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    })
+    return dados.sample(frac=1, random_state=semente).reset_index(drop=True) # Embaralha os horários
+
+
+def _cronologica(dados):
+    return np.argsort(pd.to_datetime(dados["hora_transacao"]).to_numpy(), kind="stable")
+
+
+def test_motor_em_lote_igual_ao_calculo_em_lote():
+    dados = _transacoes()
+    tm.assert_frame_equal(MotorVelocidade().observar(dados), calcular_velocidade(dados))
+
+
+def test_motor_linha_a_linha_igual_ao_calculo_em_lote():
+    dados = _transacoes()
+    esperado = calcular_velocidade(dados)
+    motor = MotorVelocidade()
+    obtido = [motor.observar(dados.iloc[[i]]).set_axis([i]) # Uma transação por vez, na ordem de chegada ao servidor
+              for i in _cronologica(dados)]
+    tm.assert_frame_equal(pd.concat(obtido).sort_index(), esperado)
+
+
+def test_motor_construido_continua_o_historico():
+    dados = _transacoes()
+    ordem = _cronologica(dados)
+    historico, novas = dados.iloc[ordem[:250]], dados.iloc[ordem[250:]]
+    esperado = calcular_velocidade(dados).iloc[ordem[250:]].reset_index(drop=True)
+    tm.assert_frame_equal(MotorVelocidade.construir(historico).observar(novas), esperado)
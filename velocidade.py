@@ -0,0 +1,236 @@
+"""
+Características de velocidade: quantidade e soma dos valores das transações anteriores de cada
+usuário e de cada país do cartão nas últimas 1 h, 24 h e 7 dias.
+
+Cada janela é dividida em baldes de tempo de largura fixa (anel de contadores por chave), e a
+janela de uma transação são os últimos `baldes` baldes até o dela, inclusive. Há dois caminhos
+com os mesmos valores:
+- MotorVelocidade: modo contínuo, para a pontuação. Memória fixa por chave e custo por transação
+  limitado pelo número de baldes (cada balde expira uma única vez).
+- calcular_velocidade: modo em lote, vetorizado, para gerar as colunas do histórico no treinamento.
+
+Os valores são somados em centavos inteiros, de modo que a ordem das somas não altera o resultado.
+
+Uso (estado do motor a partir do histórico):
+    python velocidade.py --csv Fraud_transactions.csv --saida objects/velocidade.pkl
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from joblib import dump, load
+from armazem_usuarios import nanossegundos_desde_epoca, obter_coluna
+
+janelas = {"1h": (3_600, 12), "24h": (86_400, 24), "7d": (604_800, 28)} # Duração em segundos e número de baldes
+chaves_velocidade = {"usuario": "id_usuario", "pais_cartao": "pais_cartao"} # Sufixo da coluna -> chave
+colunas_entrada = ["id_usuario", "pais_cartao", "valor", "hora_transacao"] # Lidas do CSV para o cálculo
+colunas_velocidade = [f"{medida}_{sufixo}_{janela}" for sufixo in chaves_velocidade
+                      for janela in janelas for medida in ("transacoes", "valor")]
+CAMINHO_VELOCIDADE = "objects/velocidade.pkl"
+
+
+def _coluna(dados, nome):
+    coluna = obter_coluna(dados, nome)
+    if coluna is None:
+        raise ValueError(f"Coluna ausente: {nome}")
+    return coluna
+
+
+def _tabela(dados):
+    if isinstance(dados, dict):
+        dados = [dados]
+    return dados if isinstance(dados, pd.DataFrame) else pd.DataFrame(dados)
+
+
+def _entradas(dados):
+    """Chaves, segundos desde a época e valores em centavos de cada transação (nomes em português ou originais)."""
+    dados = _tabela(dados)
+    chaves = {}
+    for sufixo, nome in chaves_velocidade.items():
+        valores = _coluna(dados, nome)
+        chaves[sufixo] = (valores.to_numpy(dtype=np.int64) if sufixo == "usuario"
+                          else valores.astype(str).to_numpy()) # País ausente vira a chave 'nan'
+    segundos = nanossegundos_desde_epoca(_coluna(dados, "hora_transacao")) // 10**9
+    centavos = np.rint(_coluna(dados, "valor").to_numpy(dtype=np.float64) * 100).astype(np.int64)
+    return chaves, segundos, centavos
+
+
+def _montar(contagens, somas):
+    """DataFrame com as colunas_velocidade a partir de {sufixo: matriz linhas x janelas}."""
+    colunas = {}
+    for sufixo in chaves_velocidade:
+        for w, janela in enumerate(janelas):
+            colunas[f"transacoes_{sufixo}_{janela}"] = contagens[sufixo][:, w]
+            colunas[f"valor_{sufixo}_{janela}"] = somas[sufixo][:, w] / 100
+    return pd.DataFrame(colunas)
+
+
+def calcular_velocidade(dados):
+    """
+    Modo em lote: características de velocidade de todas as transações de um histórico.
+
+    Equivale a passar as transações, em ordem cronológica (empates na ordem do arquivo), por
+    um MotorVelocidade vazio, mas sem laço em Python: dentro de cada chave, o início da janela
+    é encontrado por busca binária e as somas saem de somas acumuladas.
+
+    Parâmetros:
+    - dados: DataFrame (ou lista de transações) com id_usuario, pais_cartao, valor e hora_transacao
+
+    Retorna:
+    - DataFrame com as colunas_velocidade, na ordem das linhas de `dados`
+    """
+    chaves, segundos, centavos = _entradas(dados)
+    linhas_total = len(segundos)
+    ordem = np.argsort(segundos, kind="stable")
+    contagens, somas = {}, {}
+    for sufixo, valores in chaves.items():
+        grupos = pd.factorize(valores[ordem])[0].astype(np.int64)
+        por_grupo = np.argsort(grupos, kind="stable") # Agrupa por chave mantendo a ordem cronológica
+        linhas, grupos = ordem[por_grupo], grupos[por_grupo]
+        acumulado = np.concatenate(([0], np.cumsum(centavos[linhas])))
+        posicoes = np.arange(linhas_total)
+        contagens[sufixo] = np.zeros((linhas_total, len(janelas)), dtype=np.int64)
+        somas[sufixo] = np.zeros((linhas_total, len(janelas)), dtype=np.int64)
+        for w, (duracao, baldes) in enumerate(janelas.values()):
+            balde = segundos[linhas] // (duracao // baldes)
+            balde = balde - (balde.min() if linhas_total else 0)
+            escala = (balde.max() if linhas_total else 0) + baldes + 1 # Separa as chaves em uma única ordenação
+            inicio = np.searchsorted(grupos * escala + balde, grupos * escala + balde - baldes + 1, side="left")
+            contagens[sufixo][linhas, w] = posicoes - inicio
+            somas[sufixo][linhas, w] = acumulado[posicoes] - acumulado[inicio]
+    return _montar(contagens, somas)
+
+
+class _Aneis:
+    """Anéis de baldes de todas as janelas para um tipo de chave, uma linha por chave."""
+
+    def __init__(self, capacidade=1024):
+        self.indice = {} # Valor da chave -> linha
+        total_baldes = sum(baldes for _, baldes in janelas.values())
+        self.contagem = np.zeros((capacidade, total_baldes), dtype=np.int32)
+        self.centavos = np.zeros((capacidade, total_baldes), dtype=np.int64)
+        self.totais = np.zeros((capacidade, len(janelas), 2), dtype=np.int64) # Contagem e centavos na janela
+        self.ultimo = np.zeros((capacidade, len(janelas)), dtype=np.int64) # Balde mais recente de cada janela
+
+    def linha(self, chave, baldes_atuais):
+        linha = self.indice.get(chave)
+        if linha is None:
+            linha = len(self.indice)
+            if linha == self.contagem.shape[0]:
+                for nome in ("contagem", "centavos", "totais", "ultimo"):
+                    atual = getattr(self, nome)
+                    setattr(self, nome, np.concatenate([atual, np.zeros_like(atual)]))
+            self.ultimo[linha] = baldes_atuais
+            self.indice[chave] = linha
+        return linha
+
+
+class MotorVelocidade:
+    """
+    Modo contínuo das características de velocidade, com memória fixa por chave
+    (64 baldes por usuário e por país do cartão).
+
+    As transações devem chegar em ordem cronológica; uma transação atrasada é contada no
+    balde mais recente da sua chave. Nesse caso (e só nele) o resultado pode diferir do
+    calcular_velocidade.
+    """
+
+    def __init__(self):
+        self.aneis = {sufixo: _Aneis() for sufixo in chaves_velocidade}
+        self._janelas, deslocamento = [], 0
+        for duracao, baldes in janelas.values():
+            self._janelas.append((duracao // baldes, baldes, deslocamento))
+            deslocamento += baldes
+
+    def __len__(self):
+        return len(self.aneis["usuario"].indice)
+
+    def _observar(self, aneis, chave, segundo, centavos, saida_contagem, saida_soma):
+        """Escreve as contagens e somas anteriores à transação e a acrescenta aos anéis da chave."""
+        baldes_atuais = [segundo // largura for largura, _, _ in self._janelas]
+        linha = aneis.linha(chave, baldes_atuais)
+        contagem, soma, totais, ultimo = aneis.contagem[linha], aneis.centavos[linha], aneis.totais[linha], aneis.ultimo[linha]
+        for w, (largura, baldes, deslocamento) in enumerate(self._janelas):
+            balde, anterior = baldes_atuais[w], int(ultimo[w])
+            if balde > anterior: # Expira os baldes que saíram da janela
+                if balde - anterior >= baldes:
+                    contagem[deslocamento:deslocamento + baldes] = 0
+                    soma[deslocamento:deslocamento + baldes] = 0
+                    totais[w] = 0
+                else:
+                    for expirado in range(anterior + 1, balde + 1):
+                        posicao = deslocamento + expirado % baldes
+                        totais[w, 0] -= contagem[posicao]
+                        totais[w, 1] -= soma[posicao]
+                        contagem[posicao] = soma[posicao] = 0
+                ultimo[w] = balde
+            else:
+                balde = anterior # Transação atrasada: entra no balde mais recente
+            saida_contagem[w], saida_soma[w] = totais[w]
+            posicao = deslocamento + balde % baldes
+            contagem[posicao] += 1
+            soma[posicao] += centavos
+            totais[w, 0] += 1
+            totais[w, 1] += centavos
+
+    def observar(self, dados):
+        """
+        Calcula as características de velocidade das transações e as acrescenta ao estado.
+
+        As transações do lote são processadas em ordem cronológica (empates na ordem recebida).
+
+        Retorna:
+        - DataFrame com as colunas_velocidade, na ordem das linhas de `dados`
+        """
+        chaves, segundos, centavos = _entradas(dados) # Valida tudo antes de alterar o estado
+        contagens = {sufixo: np.zeros((len(segundos), len(janelas)), dtype=np.int64) for sufixo in chaves}
+        somas = {sufixo: np.zeros((len(segundos), len(janelas)), dtype=np.int64) for sufixo in chaves}
+        chaves_lista = {sufixo: valores.tolist() for sufixo, valores in chaves.items()}
+        segundos_lista, centavos_lista = segundos.tolist(), centavos.tolist()
+        for i in np.argsort(segundos, kind="stable").tolist():
+            for sufixo, aneis in self.aneis.items():
+                self._observar(aneis, chaves_lista[sufixo][i], segundos_lista[i], centavos_lista[i],
+                               contagens[sufixo][i], somas[sufixo][i])
+        return _montar(contagens, somas)
+
+    def enriquecer(self, transacoes):
+        """Transações (DataFrame) com as colunas_velocidade calculadas; o estado passa a incluí-las."""
+        dados = _tabela(transacoes).copy()
+        dados[colunas_velocidade] = self.observar(dados).to_numpy()
+        return dados
+
+    @classmethod
+    def construir(cls, dados):
+        """
+        Estado do motor ao final de um histórico, processando apenas as transações que ainda
+        podem entrar em alguma janela de uma transação futura.
+        """
+        dados = _tabela(dados)
+        _, segundos, _ = _entradas(dados)
+        motor = cls()
+        if len(segundos):
+            largura, baldes, _ = max(motor._janelas, key=lambda janela: janela[0] * janela[1])
+            motor.observar(dados[segundos >= (segundos.max() // largura - baldes + 1) * largura])
+        return motor
+
+    def salvar(self, caminho=CAMINHO_VELOCIDADE):
+        dump(self, caminho)
+
+    @staticmethod
+    def carregar(caminho=CAMINHO_VELOCIDADE):
+        return load(caminho)
+
+
+if __name__ == "__main__":
+    from dados import ler_colunas
+
+    parser = argparse.ArgumentParser(description="Gera o estado do motor de velocidade a partir do histórico.")
+    parser.add_argument("--csv", default="Fraud_transactions.csv")
+    parser.add_argument("--saida", default=CAMINHO_VELOCIDADE)
+    args = parser.parse_args()
+
+    historico = ler_colunas(args.csv, colunas_entrada, incluir=())
+    inicio = time.perf_counter()
+    motor = MotorVelocidade.construir(historico)
+    motor.salvar(args.saida)
+    print(f"Estado com {len(motor):,} usuários gerado em {time.perf_counter() - inicio:.1f}s e gravado em {args.saida}")